@@ -1,31 +1,41 @@
 import os
-import httpx
-from google import genai
-from google.genai import types
-from pydantic import BaseModel, Field
-from dotenv import load_dotenv
 import re
+from dotenv import load_dotenv
 
 # 1. Load the environment variables from the hidden.env file
 load_dotenv()
 
-# 2. Initialize the client (it will securely pull the key from your system)
-client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+# 2. The client and schema are created on first use so importing this module stays cheap
+_client = None
+
+
+def get_client():
+    """Returns the shared Gemini client, creating it (and importing google-genai) on first use."""
+    global _client
+    if _client is None:
+        from qix_clients import create_genai_client
 
-class ProjectExtraction(BaseModel):
-    project_title: str = Field(description="The title of the quality improvement project.")
-    department: str = Field(description="The hospital department submitting the project.")
-    category: str = Field(description="The framework category: 6S, Process Excellence, or Service Experience.")
-    problem_statement: str = Field(description="The core problem or initial state being addressed.")
-    smart_goals: str = Field(description="Specific, measurable, achievable, realistic, and time-bound goals.")
-    methodology: list[str] = Field(description="List of Lean, Design Thinking, or PDCA tools applied (e.g., Value Stream Map, Gap Analysis).")
-    key_results: str = Field(description="Quantitative and qualitative benefits, financial savings, or sustained improvements extracted from text or charts.")
-    follow_up_plan: str = Field(description="Plans to sustain the results or spread the implementation to other departments.")
+        # It will securely pull the key from your system
+        _client = create_genai_client(os.environ.get("GEMINI_API_KEY"))
+    return _client
 
-def extract_clinical_project(local_pdf_path: str) -> ProjectExtraction:
+
+def __getattr__(name):
+    if name == "ProjectExtraction":
+        from qix_schemas import ProjectExtraction
+
+        return ProjectExtraction
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def extract_clinical_project(local_pdf_path: str) -> "ProjectExtraction":
     """
     Reads a local clinical project submission (PDF) and extracts structured data.
     """
+    from google.genai import types
+    from qix_schemas import ProjectExtraction
+
     # Read the local file in binary mode
     with open(local_pdf_path, "rb") as file:
         doc_data = file.read()
@@ -38,7 +48,7 @@ def extract_clinical_project(local_pdf_path: str) -> ProjectExtraction:
     """
 
     # Generate content using Gemini Flash with Structured Outputs
-    response = client.models.generate_content(
+    response = get_client().models.generate_content(
         model="gemini-2.5-flash",
         contents=[
             types.Part.from_bytes(data=doc_data, mime_type='application/pdf'),
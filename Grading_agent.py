@@ -1,15 +1,29 @@
 import os
 import json
 import time
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the new Gemini Client
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+# The Gemini client is created on first use so importing this module stays cheap
+_client = None
+
+
+def get_client():
+    """Returns the shared Gemini client, creating it (and importing google-genai) on first use."""
+    global _client
+    if _client is None:
+        from qix_clients import create_genai_client
+
+        _client = create_genai_client(os.getenv("GEMINI_API_KEY"))
+    return _client
+
+
+def __getattr__(name):
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 MODEL_NAME = "gemini-2.5-flash"
@@ -50,6 +64,7 @@ Assessment Score (Minimum): Outstanding-85; Merit-70; Recognition - 50
 def upload_pdf_to_gemini(pdf_path):
     """Uploads the PDF using the new Client.files API."""
     print(f"Uploading {pdf_path} to Gemini...")
+    client = get_client()
     pdf_file = client.files.upload(
         file=pdf_path, 
         config={'mime_type': 'application/pdf'}
@@ -69,7 +84,8 @@ def upload_pdf_to_gemini(pdf_path):
 
 def call_gemini_agent(system_instruction, pdf_file, text_prompt, require_json=False):
     """Helper function to call Gemini using the new models.generate_content API."""
-    
+    from google.genai import types
+
     # Configure the generation parameters using types
     config = types.GenerateContentConfig(
         system_instruction=system_instruction,
@@ -80,7 +96,7 @@ def call_gemini_agent(system_instruction, pdf_file, text_prompt, require_json=Fa
     # Pass both the uploaded PDF file object and the text prompt
     contents = [pdf_file, text_prompt]
     
-    response = client.models.generate_content(
+    response = get_client().models.generate_content(
         model=MODEL_NAME,
         contents=contents,
         config=config
@@ -196,7 +212,7 @@ def grade_project(pdf_filepath, json_filepath):
     finally:
         # 6. Clean up the file from Gemini's servers after processing
         print("Cleaning up PDF from Gemini servers...")
-        client.files.delete(name=pdf_file.name)
+        get_client().files.delete(name=pdf_file.name)
         print("Cleanup successful.")
 
 if __name__ == "__main__":
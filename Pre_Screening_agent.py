@@ -1,31 +1,28 @@
 import os
 import json
-from google import genai
-from google.genai import types
-from pydantic import BaseModel, Field
-from typing import List
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# 1. Define the Structured Output Schema for the Screener
-class ScreeningCheck(BaseModel):
-    criterion: str = Field(description="The Level-4 exclusion rule being evaluated.")
-    violation_found: bool = Field(description="True if the project meets this exclusion criteria.")
-    evidence_found: str = Field(description="Specific evidence from the PDF or JSON justifying the decision.")
+# 1. The Structured Output Schema for the Screener lives in qix_schemas and is loaded on first use
+def __getattr__(name):
+    if name in ("ScreeningCheck", "ScreeningResult"):
+        import qix_schemas
 
-class ScreeningResult(BaseModel):
-    is_eligible: bool = Field(description="Overall eligibility. True if NO violations are found.")
-    primary_violation: str = Field(description="The specific rule that failed, or 'None'.")
-    detailed_audit: List[ScreeningCheck]
+        return getattr(qix_schemas, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 2. Pre-Screening Agent Implementation
 def run_pre_screening(json_path: str, pdf_path: str):
     """
     Reads the extracted JSON and original PDF to perform a Level-4 eligibility audit.
     """
-    client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    from google.genai import types
+    from qix_clients import create_genai_client
+    from qix_schemas import ScreeningResult
+
+    client = create_genai_client(os.environ.get("GEMINI_API_KEY"))
 
     # Load the extracted JSON data
     with open(json_path, "r", encoding="utf-8") as f:
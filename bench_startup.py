@@ -0,0 +1,71 @@
+import os
+import statistics
+import subprocess
+import sys
+
+
+# -----------------------------
+# Startup / Import-Time Benchmark
+# -----------------------------
+# Guards the lazy-import layout: fails (exit code 1) if the CLI or any module adds more
+# than the budget on top of a bare interpreter, or if importing a module pulls in a
+# heavy dependency that should only load when a stage needs it.
+BUDGET_MS = 100
+REPEATS = 7
+HEAVY_MODULES = ["google.genai", "pydantic", "openpyxl"]
+
+CHECKS = [
+    ("qix --help", [os.path.join(os.path.dirname(os.path.abspath(__file__)), "qix.py"), "--help"]),
+    ("qix report --help", [os.path.join(os.path.dirname(os.path.abspath(__file__)), "qix.py"), "report", "--help"]),
+    ("import nuh_qix_pipeline", ["-c", "import nuh_qix_pipeline"]),
+    ("import Extraction_agent", ["-c", "import Extraction_agent"]),
+    ("import Grading_agent", ["-c", "import Grading_agent"]),
+    ("import Pre_Screening_agent", ["-c", "import Pre_Screening_agent"]),
+]
+
+LAZY_MODULES = ["qix", "nuh_qix_pipeline", "Extraction_agent", "Grading_agent", "Pre_Screening_agent"]
+
+
+def median_ms(argv) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        result = subprocess.run(
+            [sys.executable, "-c", "import subprocess, sys, time; "
+             "t = time.perf_counter(); subprocess.run([sys.executable] + sys.argv[1:], stdout=subprocess.DEVNULL); "
+             "print((time.perf_counter() - t) * 1000)"] + argv,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(result.stdout.strip()))
+    return statistics.median(timings)
+
+
+def heavy_imports(module: str) -> list:
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def main() -> int:
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    baseline = median_ms(["-c", "pass"])
+    print(f"Bare interpreter: {baseline:.0f} ms (subtracted below)")
+
+    failed = False
+    for name, argv in CHECKS:
+        added = median_ms(argv) - baseline
+        status = "OK" if added <= BUDGET_MS else "TOO SLOW"
+        failed |= added > BUDGET_MS
+        print(f"{status:8} {name}: +{added:.0f} ms (budget {BUDGET_MS} ms)")
+
+    for module in LAZY_MODULES:
+        loaded = heavy_imports(module)
+        failed |= bool(loaded)
+        print(f"{'OK' if not loaded else 'EAGER':8} import {module}: heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,102 @@
+from __future__ import annotations
+
 import argparse
 import json
 import os
 import platform
 import re
 import time
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 from dotenv import load_dotenv
-from google import genai
-from google.genai import types
-from pydantic import BaseModel, Field
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font
+
+from qix_budget import BUDGET_STOPPED, MODE_LABELS, BudgetExhausted, RunBudget, calls_cost, run_spend
+from qix_clients import ClientPool, create_genai_client, parse_api_keys, transport_stats
+from qix_dedup import DEFAULT_NEAR_DUPLICATE_THRESHOLD, Fingerprint, find_duplicate_clusters
+from qix_documents import extract_page_texts, file_sha256
+from qix_packing import document_id, plan_packs, validate_packed
+from qix_pages import PageCache, load_chart_images
+from qix_pptx import read_slides, render_slides
+from qix_report import (
+    BLOCK_SHEETS,
+    DUPLICATE_HEADERS,
+    SUMMARY_HEADERS,
+    Formula,
+    SheetRows,
+    blocks_for,
+    shard_rows,
+    write_workbook,
+)
+from qix_quotes import QuoteIndex, annotate_quotes, is_flagged, is_unverified, normalize_words
+from qix_profile import profiled_project, span, start_profiling, stop_profiling, write_profile
+from qix_prompts import (
+    LEVEL_4_CRITERIA,
+    NO_DEBATE_ARGUMENT,
+    Prompt,
+    TokenLedger,
+    build_criterion_screening_prompt,
+    build_extraction_prompt,
+    build_judge_prompt,
+    build_judge_repair_prompt,
+    build_negative_prompt,
+    build_packed_extraction_prompt,
+    build_positive_prompt,
+    build_screening_prompt,
+    current_ledger,
+    record_call,
+    track_tokens,
+)
+from qix_rubric import (
+    CHART_EVIDENCE_CATEGORIES,
+    LABEL_THRESHOLDS,
+    RUBRIC,
+    merge_assessments,
+    score_to_label,
+    validate_assessments,
+)
+from qix_shard import assign_shard, parse_shard, round_digest, shard_db_path
+from qix_scheduler import (
+    DEFAULT_MEMORY_BUDGET_MB,
+    MB,
+    SCHEDULE_POLICIES,
+    JobEstimate,
+    MemoryBudget,
+    compare_with_fifo,
+    estimate_job,
+    format_mb,
+    order_jobs,
+    parse_priorities,
+    priority_for,
+    process_peak_rss_bytes,
+)
+from qix_store import DEFAULT_DB_PATH, ResultsStore
+
+# google-genai, pydantic and openpyxl are imported where they are first needed so that
+# report-only commands and --help start quickly.
+if TYPE_CHECKING:
+    from google import genai
+
+    from qix_schemas import ProjectExtraction, ScreeningResult
+
+_LAZY_SCHEMAS = ("ProjectExtraction", "ScreeningCheck", "ScreeningResult")
+
+
+def __getattr__(name: str):
+    if name in _LAZY_SCHEMAS:
+        import qix_schemas
+
+        return getattr(qix_schemas, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_client(api_key: Optional[str] = None) -> genai.Client:
+    return create_genai_client(api_key or GEMINI_API_KEY)
+
+
+def create_client_pool() -> ClientPool:
+    """One client per key in GEMINI_API_KEYS ("key1:rpm,key2:rpm"), or just GEMINI_API_KEY."""
+    return ClientPool(parse_api_keys(GEMINI_API_KEYS) or [(GEMINI_API_KEY, 0)], create_client)
 
 
 # -----------------------------
@@ -20,39 +105,47 @@ from openpyxl.styles import Alignment, Font
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Optional comma-separated keys, each with an optional requests-per-minute quota: "key1:60,key2:15".
+GEMINI_API_KEYS = os.getenv("GEMINI_API_KEYS", "")
 MODEL_NAME = "gemini-2.5-flash"
 
-FULL_RUBRIC = """
-Assessment Score (Minimum): Outstanding-85; Merit-70; Recognition - 50
-
-1. Header (Max Score: 5)
-- Meet Expectations (3): Are appropriate team members, leader & sponsor identified to participate?
-- Above Expectations (5): Does the title clearly explain the goal of the project?
-
-2. Background (Max Score: 10)
-- Meet Expectations (6): Is the nature of the problem clearly explained? Is the problem worthwhile resolving? Is the scope clearly defined and manageable for the Improvement Sprints /project length?
-- Above Expectations (10): Is appropriate data collected and presented to quantify and understand the problem?
-
-3. Goal (Max Score: 5)
-- Meet Expectations (3): Is the goal SMART? (Specific, measurable, achievable, realistic & time based)
-- Above Expectations (5): Is the goal linked to NUH / department objectives and to the problem defined?
-
-4. Problem Analysis (Max Score: 20)
-- Meet Expectations (12): Are the appropriate lean / PDCA tools applied to analyze the problems? Does the analysis link back to the problem and goals?
-- Above Expectations (20): Are the root causes and main delays/bottlenecks of the problem well identified?
-
-5. Implementation Plan (Max Score: 20)
-- Meet Expectations (12): Do the solutions and implementation plan directly address the root causes of problems? Is the implementation plan clear and timely? Does it include specific what, who & when?
-- Above Expectations (20): For Improvement Sprints, was a rapid experiment carried out and were insights gained from it? Were some changes started immediately during the event or the next week?
-
-6. Benefits / Results (Max Score: 30)
-- Meet Expectations (20): Is there a clear significant improvement? Do the results match the goal? Are the benefits quantified? Are there intangible results? Are clear charts used to show results/improvement? Are dips explained?
-- Above Expectations (30): Are the results sustained over the time? (Ideally show results >= 3 months)
-
-7. Follow-up, Spread & Insights (Max Score: 10)
-- Meet Expectations (6): Has the team created a plan to overcome any outstanding or potential issues? Has the team created and/or implemented an effective plan to spread the project?
-- Above Expectations (10): Has reflection taken place and insights / lessons learned been identified?
-"""
+# Model tiers, cheapest first. A stage may name a tier or a raw model name.
+MODEL_TIERS = {
+    "lite": "gemini-2.5-flash-lite",
+    "flash": MODEL_NAME,
+    "pro": "gemini-2.5-pro",
+}
+
+# Default tier per stage. "escalation" is only used to re-judge borderline or contested projects.
+DEFAULT_STAGE_TIERS = {
+    "extraction": "lite",
+    "screening": "lite",
+    "grading": "flash",
+    "escalation": "pro",
+}
+
+DEFAULT_ESCALATION_MARGIN = 3
+DEFAULT_DISAGREEMENT_GAP = 25
+
+# Files above this size are streamed from disk through the Files API instead of inlined in the request.
+DEFAULT_INLINE_THRESHOLD_MB = 10
+# Inlining holds the raw bytes, their base64 encoding and the serialized request body at once.
+INLINE_MEMORY_FACTOR = 2.5
+# The Files API upload reads the file in chunks of this size.
+UPLOAD_CHUNK_BYTES = 8 * MB
+
+# Parallel pre-screening: Level-4 rules per call, calls in flight at once, and the confidence a
+# violation needs before the calls still outstanding are cancelled.
+SCREENING_GROUP_SIZE = 2
+SCREENING_PARALLEL_CALLS = 4
+SHORT_CIRCUIT_CONFIDENCE = 0.8
+# Follow-up calls allowed for rules a screening call leaves out of its answer, and the share of a
+# rule's words a returned check must repeat to be taken as that rule.
+SCREENING_REPAIR_ATTEMPTS = 1
+RULE_MATCH_OVERLAP = 0.5
+
+# Follow-up calls allowed to re-rule judge categories that fail rubric validation.
+JUDGE_REPAIR_ATTEMPTS = 1
 
 
 # -----------------------------
@@ -66,27 +159,57 @@ def sanitize_filename(name: str) -> str:
     return re.sub(r'[\\/*?:"<>|]', "", name).strip()
 
 
-def autosize_columns(ws, max_width: int = 80) -> None:
-    for col in ws.columns:
-        max_len = 0
-        col_letter = col[0].column_letter
-        for cell in col:
-            if cell.value is None:
-                continue
-            cell_len = len(str(cell.value))
-            if cell_len > max_len:
-                max_len = cell_len
-        ws.column_dimensions[col_letter].width = min(max_len + 2, max_width)
+# -----------------------------
+# Model Routing
+# -----------------------------
+class RoutingPolicy:
+    """Maps each pipeline stage to a model tier and decides when grading escalates."""
+
+    def __init__(
+        self,
+        stage_tiers: Optional[Dict[str, str]] = None,
+        escalation_margin: int = DEFAULT_ESCALATION_MARGIN,
+        disagreement_gap: int = DEFAULT_DISAGREEMENT_GAP,
+    ) -> None:
+        self.stage_tiers = dict(DEFAULT_STAGE_TIERS)
+        self.stage_tiers.update({stage: tier for stage, tier in (stage_tiers or {}).items() if tier})
+        self.escalation_margin = escalation_margin
+        self.disagreement_gap = disagreement_gap
+
+    def tier_for(self, stage: str) -> str:
+        return self.stage_tiers[stage]
+
+    def model_for(self, stage: str) -> str:
+        tier = self.tier_for(stage)
+        return MODEL_TIERS.get(tier, tier)
+
+    def escalation_reason(self, total_score: int, pos_total: Optional[int], neg_total: Optional[int]) -> str:
+        """Returns why a first-pass grade should be re-judged by the escalation tier, or ''."""
+        if self.model_for("escalation") == self.model_for("grading"):
+            return ""
+
+        for threshold, label in LABEL_THRESHOLDS:
+            if abs(total_score - threshold) <= self.escalation_margin:
+                return f"score {total_score} within {self.escalation_margin} of {label} ({threshold})"
+
+        if pos_total is not None and neg_total is not None and pos_total - neg_total >= self.disagreement_gap:
+            return f"debate disagreement (defense {pos_total} vs prosecution {neg_total})"
+
+        return ""
+
+
+def routing_from_options(options: dict) -> RoutingPolicy:
+    """The routing of a run from its command-line options, e.g. the config recorded with the run."""
+    return RoutingPolicy(
+        stage_tiers={stage: options.get(f"{stage}_tier") for stage in DEFAULT_STAGE_TIERS},
+        escalation_margin=options.get("escalation_margin", DEFAULT_ESCALATION_MARGIN),
+        disagreement_gap=options.get("disagreement_gap", DEFAULT_DISAGREEMENT_GAP),
+    )
 
 
-def apply_table_formatting(ws) -> None:
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-    ws.freeze_panes = "A2"
-    for row in ws.iter_rows(min_row=2):
-        for cell in row:
-            cell.alignment = Alignment(wrap_text=True, vertical="top")
-    autosize_columns(ws)
+def parse_proposed_total(argument: str) -> Optional[int]:
+    matches = re.findall(r"PROPOSED TOTAL:\s*\**\s*(\d{1,3})", argument or "", flags=re.IGNORECASE)
+    return int(matches[-1]) if matches else None
 
 
 # -----------------------------
@@ -147,126 +270,511 @@ def convert_pptx_folder_to_pdf(input_folder: str, output_folder: str, force: boo
 
 
 # -----------------------------
-# Extraction Agent
+# Submission Documents
+# -----------------------------
+class SubmissionDocument:
+    """
+    One submission's PDF as sent to Gemini. Small files are inlined per request; files above
+    the inline threshold are streamed from disk through the Files API once and the upload is
+    shared by every stage until cleanup(). A .pptx is read locally instead and sent as the text
+    of its slides, tables and chart data, with nothing uploaded.
+    """
+
+    def __init__(
+        self, client: genai.Client, path: str, inline_threshold_bytes: int = DEFAULT_INLINE_THRESHOLD_MB * MB
+    ) -> None:
+        self.client = client
+        self.path = path
+        self.native = path.lower().endswith(".pptx")
+        self.inline_threshold_bytes = inline_threshold_bytes
+        self.uploaded = None
+        self._slides = None
+        self._deck_text = None
+        self._chart_parts = None
+        self._quote_index = None
+
+    @property
+    def size(self) -> int:
+        return len(self.deck_text().encode("utf-8")) if self.native else os.path.getsize(self.path)
+
+    @property
+    def streamed(self) -> bool:
+        return not self.native and self.size > self.inline_threshold_bytes
+
+    def slides(self):
+        if self._slides is None:
+            with span("read_pptx"):
+                self._slides = read_slides(self.path)
+        return self._slides
+
+    def deck_text(self) -> str:
+        if self._deck_text is None:
+            self._deck_text = render_slides(self.slides())
+        return self._deck_text
+
+    def request_bytes(self) -> int:
+        """Estimated memory a request holds for this document while in flight."""
+        if self.streamed:
+            return 0 if self.uploaded is not None else min(self.size, UPLOAD_CHUNK_BYTES)
+        return int(self.size * INLINE_MEMORY_FACTOR)
+
+    def upload_bytes(self) -> int:
+        return 0 if self.native or self.uploaded is not None else min(self.size, UPLOAD_CHUNK_BYTES)
+
+    def part(self):
+        from google.genai import types
+
+        if self.native:
+            return types.Part.from_text(text=self.deck_text())
+        if self.streamed:
+            return self.upload()
+        with span("read_pdf"), open(self.path, "rb") as f:
+            return types.Part.from_bytes(data=f.read(), mime_type="application/pdf")
+
+    def chart_parts(self, cache: Optional[PageCache] = None) -> List[tuple]:
+        """(page_number, image part) for each chart page, rendered locally once; [] if unavailable."""
+        if self.native:
+            return []  # the deck text already carries every chart's data
+        if self._chart_parts is None:
+            from google.genai import types
+
+            with span("chart_pages"):
+                images = load_chart_images(self.path, cache)
+            self._chart_parts = [
+                (page, types.Part.from_bytes(data=image, mime_type="image/jpeg")) for page, image in images
+            ]
+        return self._chart_parts
+
+    def quote_index(self, extraction: Optional[dict] = None) -> Optional[QuoteIndex]:
+        """Trigram index of the page text and extracted JSON for checking quotes; None if the text cannot be read."""
+        if self._quote_index is None:
+            with span("quote_index"):
+                page_texts = [slide.text for slide in self.slides()] if self.native else extract_page_texts(self.path)
+                extraction_text = json.dumps(extraction, ensure_ascii=False) if extraction else ""
+                self._quote_index = QuoteIndex(page_texts, extraction_text) if any(page_texts) else False
+        return self._quote_index or None
+
+    def upload(self):
+        if self.uploaded is None:
+            self.uploaded = upload_pdf_to_gemini(self.client, self.path)
+        return self.uploaded
+
+    def resume_upload(self, name: str) -> bool:
+        """Reattaches an upload left by an earlier attempt; False if it has expired or been deleted."""
+        try:
+            pdf_file = self.client.files.get(name=name)
+        except Exception:
+            return False
+        if pdf_file.state.name != "ACTIVE":
+            return False
+        self.uploaded = pdf_file
+        return True
+
+    def cleanup(self) -> None:
+        if self.uploaded is not None:
+            print("Cleaning up PDF from Gemini servers...")
+            self.client.files.delete(name=self.uploaded.name)
+            self.uploaded = None
+            print("Cleanup successful.")
+
+
+# -----------------------------
+# Stage Checkpoints
+# -----------------------------
+class ProjectCheckpoint:
+    """
+    Output of every completed step for one submission (extraction, screening, upload, positive,
+    negative, judge, escalation), saved as soon as the step succeeds. A retry, in this run or a
+    later one, replays saved steps and calls the API only from the first missing step onwards.
+    Without a store the checkpoint lives in memory and only covers retries within this process.
+    """
+
+    def __init__(self, store: Optional[ResultsStore] = None, project_hash: str = "", resume: bool = True) -> None:
+        self.store = store if project_hash else None
+        self.project_hash = project_hash
+        self.steps: Dict[str, dict] = {}
+        if self.store is not None:
+            if resume:
+                self.steps = self.store.load_checkpoints(project_hash)
+            else:
+                self.store.clear_checkpoints(project_hash)
+
+    @property
+    def persistent(self) -> bool:
+        return self.store is not None
+
+    def get(self, step: str, model: Optional[str] = None):
+        saved = self.steps.get(step)
+        if saved is None or (model is not None and saved["model"] != model):
+            return None
+        return saved["payload"]
+
+    def save(self, step: str, model: str, payload) -> None:
+        self.steps[step] = {"model": model, "payload": payload}
+        if self.store is not None:
+            self.store.save_checkpoint(self.project_hash, step, model, payload)
+
+    def run(self, step: str, model: str, call):
+        """Returns the saved output of step if it was produced by the same model, otherwise calls and saves it."""
+        saved = self.get(step, model)
+        if saved is not None:
+            print(f"-> Reusing checkpointed {step} step")
+            return saved
+        payload = call()
+        self.save(step, model, payload)
+        return payload
+
+    def attach_upload(self, document: SubmissionDocument):
+        if document.native:
+            return document.part()
+        saved = self.get("upload")
+        if saved and document.uploaded is None and document.resume_upload(saved["name"]):
+            print(f"-> Reusing checkpointed upload {saved['name']}")
+        pdf_file = document.upload()
+        if not saved or saved["name"] != pdf_file.name:
+            # Uploads are only visible to the key that created them.
+            self.save("upload", "", {"name": pdf_file.name, "key": getattr(document.client, "key_id", "")})
+        return pdf_file
+
+    @property
+    def upload_key(self) -> str:
+        return (self.get("upload") or {}).get("key", "")
+
+    def clear(self) -> None:
+        self.steps = {}
+        if self.store is not None:
+            self.store.clear_checkpoints(self.project_hash)
+
+
 # -----------------------------
-class ProjectExtraction(BaseModel):
-    project_title: str = Field(description="The title of the quality improvement project.")
-    department: str = Field(description="The hospital department submitting the project.")
-    category: str = Field(description="The framework category: 6S, Process Excellence, or Service Experience.")
-    problem_statement: str = Field(description="The core problem or initial state being addressed.")
-    smart_goals: str = Field(description="Specific, measurable, achievable, realistic, and time-bound goals.")
-    methodology: List[str] = Field(description="List of Lean, Design Thinking, or PDCA tools applied.")
-    key_results: str = Field(description="Quantitative and qualitative benefits, financial savings, or sustained improvements extracted.")
-    follow_up_plan: str = Field(description="Plans to sustain the results or spread the implementation to other departments.")
-
-
-def extract_clinical_project(client: genai.Client, local_pdf_path: str) -> ProjectExtraction:
-    with open(local_pdf_path, "rb") as file:
-        doc_data = file.read()
-
-    prompt = """
-    You are the Extraction Agent for a hospital's continuous improvement assessment pipeline.
-    Analyze the provided project submission document. Your task is to extract the relevant information 
-    to populate the required schema. Pay close attention to both unstructured narrative text and 
-    visual elements like charts, graphs, and tables to capture the full scope of the methodologies and results.
+# Model Calls
+# -----------------------------
+def generate_content(client: genai.Client, prompt: Prompt, model: str, contents: list, config):
+    """
+    Every model call goes through here so its tokens and latency land in the active TokenLedger,
+    and no call is sent once the ledger's run budget is spent.
     """
+    ledger = current_ledger()
+    if ledger is not None and ledger.run_budget is not None:
+        ledger.run_budget.check()
+    started = time.perf_counter()
+    with span(prompt.stage, "model", model=model):
+        response = client.models.generate_content(model=model, contents=contents, config=config)
+    record_call(prompt.stage, model, prompt, response, time.perf_counter() - started)
+    return response
+
+
+# -----------------------------
+# Extraction Agent
+# -----------------------------
+def extract_clinical_project(
+    client: genai.Client,
+    local_pdf_path: str,
+    model: str = MODEL_NAME,
+    document: Optional["SubmissionDocument"] = None,
+) -> ProjectExtraction:
+    from qix_schemas import ProjectExtraction
+
+    owns_document = document is None
+    document = document or SubmissionDocument(client, local_pdf_path)
 
-    response = client.models.generate_content(
-        model=MODEL_NAME,
-        contents=[
-            types.Part.from_bytes(data=doc_data, mime_type="application/pdf"),
+    prompt = build_extraction_prompt()
+
+    try:
+        response = generate_content(
+            client,
             prompt,
-        ],
+            model,
+            contents=[document.part(), prompt.text],
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": ProjectExtraction,
+                "temperature": 0.1,
+            },
+        )
+    finally:
+        if owns_document:
+            document.cleanup()
+
+    return response.parsed
+
+
+def extract_packed_projects(client: genai.Client, pdf_paths: List[str], model: str = MODEL_NAME) -> tuple:
+    """
+    Extracts several small submissions in one call, each PDF preceded by its document ID. Returns
+    the extraction data by path for those that passed validation, and the reason for every other
+    path; callers extract those on their own.
+    """
+    from google.genai import types
+
+    from qix_schemas import PackedExtraction
+
+    paths = {document_id(i): path for i, path in enumerate(pdf_paths, start=1)}
+    prompt = build_packed_extraction_prompt(list(paths))
+    contents: list = []
+    for doc_id, path in paths.items():
+        with span("read_pdf"), open(path, "rb") as f:
+            contents += [f"[{doc_id}]", types.Part.from_bytes(data=f.read(), mime_type="application/pdf")]
+    response = generate_content(
+        client,
+        prompt,
+        model,
+        contents=contents + [prompt.text],
         config={
             "response_mime_type": "application/json",
-            "response_schema": ProjectExtraction,
+            "response_schema": PackedExtraction,
             "temperature": 0.1,
         },
     )
+    if response.parsed is None:
+        return {}, {path: "unparseable packed response" for path in pdf_paths}
+    with span("pack_validation"):
+        accepted, problems = validate_packed(
+            [item.model_dump() for item in response.parsed.extractions],
+            {doc_id: extract_page_texts(path) for doc_id, path in paths.items()},
+        )
+    return (
+        {paths[doc_id]: data for doc_id, data in accepted.items()},
+        {paths[doc_id]: problem for doc_id, problem in problems.items()},
+    )
 
-    return response.parsed
+
+def split_pack_usage(calls: List[dict], jobs: List[JobEstimate]) -> Dict[str, List[dict]]:
+    """Each project's share of a packed call's tokens and latency, in proportion to its pages."""
+    pages = sum(job.pages for job in jobs) or 1
+    shares: Dict[str, List[dict]] = {}
+    for job in jobs:
+        weight = job.pages / pages
+        shares[job.path] = [
+            {
+                **call,
+                **{
+                    key: round(call[key] * weight)
+                    for key in ("estimated_tokens", "prompt_tokens", "output_tokens", "latency_ms")
+                },
+            }
+            for call in calls
+        ]
+    return shares
+
+
+def run_packed_extraction(
+    pool: ClientPool,
+    store: ResultsStore,
+    jobs: List[JobEstimate],
+    project_hashes: Dict[str, str],
+    model: str,
+    budget: MemoryBudget,
+    workers: int = 1,
+    run_budget: Optional[RunBudget] = None,
+) -> tuple:
+    """
+    Extracts small submissions in packs before the per-project workers start. Each accepted
+    extraction is saved as the project's extraction checkpoint, so process_project picks it up and
+    anything rejected, or in a pack whose call failed, is extracted on its own as usual. Returns
+    each packed project's share of the token usage and the figures for the run metrics.
+    """
+    packs, _ = plan_packs(jobs)
+    usage: Dict[str, List[dict]] = {}
+    fallbacks: Dict[str, str] = {}
+
+    def run_pack(pack: List[JobEstimate]) -> None:
+        label = f"pack of {len(pack)}"
+        ledger = TokenLedger(label, run_budget)
+        try:
+            request_bytes = int(sum(job.size_bytes for job in pack) * INLINE_MEMORY_FACTOR)
+            with pool.lease() as client, track_tokens(ledger), budget.reserve("extraction", label, request_bytes):
+                accepted, problems = extract_packed_projects(client, [job.path for job in pack], model=model)
+        except Exception as exc:
+            accepted, problems = {}, {job.path: f"packed call failed: {exc}" for job in pack}
+        for path, data in accepted.items():
+            ProjectCheckpoint(store, project_hashes[path]).save("extraction", model, data)
+        fallbacks.update(problems)
+        usage.update(split_pack_usage(ledger.calls, pack))
+
+    with span("packed_extraction"), ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        list(executor.map(run_pack, packs))
+
+    packed = sum(len(pack) for pack in packs)
+    if packs:
+        print(
+            f"Packed extraction: {packed} submissions in {len(packs)} requests; "
+            f"{len(fallbacks)} fall back to their own request"
+        )
+    for path, problem in sorted(fallbacks.items()):
+        print(f"  {os.path.basename(path)}: {problem}")
+    metrics = {"packs": len(packs), "packed_projects": packed, "fallbacks": len(fallbacks)}
+    return usage, metrics
 
 
 # -----------------------------
 # Pre-Screening Agent
 # -----------------------------
-class ScreeningCheck(BaseModel):
-    criterion: str = Field(description="The Level-4 exclusion rule being evaluated.")
-    violation_found: bool = Field(description="True if the project meets this exclusion criteria.")
-    evidence_found: str = Field(description="Specific evidence from the PDF or JSON justifying the decision.")
-
-
-class ScreeningResult(BaseModel):
-    is_eligible: bool = Field(description="Overall eligibility. True if NO violations are found.")
-    primary_violation: str = Field(description="The specific rule that failed, or 'None'.")
-    detailed_audit: List[ScreeningCheck]
+def run_pre_screening(
+    client: genai.Client,
+    json_path: str,
+    pdf_path: str,
+    model: str = MODEL_NAME,
+    document: Optional["SubmissionDocument"] = None,
+) -> ScreeningResult:
+    with open(json_path, "r", encoding="utf-8") as f:
+        prompt = build_screening_prompt(json.load(f))
 
+    from qix_schemas import ScreeningResult
 
-def run_pre_screening(client: genai.Client, json_path: str, pdf_path: str) -> ScreeningResult:
-    with open(json_path, "r", encoding="utf-8") as f:
-        extracted_data = f.read()
-
-    with open(pdf_path, "rb") as f:
-        doc_data = f.read()
-
-    level_4_rules = """
-    Your sole responsibility is to be a strict auditor, flagging rule violations and missing criteria. You are looking only for reasons to classify the project as Level 4.
-    Task: Analyze the provided project PDF and identify if it meets ANY of the following strict criteria for a Level 4 classification.
-    Level 4 'Rejection' Criteria:
-    - A solution is already decided (thus not able to apply improvement methodologies).
-    - It is a simple just-do-it or straightforward project with solutions like video/print booklets, pamphlets, leaflets, sending reminders, or just reinforcing current processes.
-    - It is an IT project (including Excel or programming) that does not involve any actual process change.
-    - There is no measurement or documentation of standard work or results.
-    - It is a trial or assessment without a concrete implementation.
-    - It involves research, randomized control trials, or studies that have pre-empted an intervention.
-    - It is just the fine-tuning of new services during a setting-up phase.
-    - It's a service development plan like buying new equipment or starting a new service.
-    - It's a Regular operation review or fine-tuning (e.g., PAR level, slot allocations, schedules).
-    - It's an RCA (Root Cause Analysis) without meaningful supporting data or for a single incident.
-    - It's an implementation of Evidence-based practice without measurement.
-    """
+    owns_document = document is None
+    document = document or SubmissionDocument(client, pdf_path)
 
-    prompt = f"""
-    You are the Pre-Screening Agent for a hospital's continuous improvement assessment pipeline.
-    Evaluate the provided project (JSON data and full PDF) against the Level-4 Exclusionary Rules.
+    try:
+        response = generate_content(
+            client,
+            prompt,
+            model,
+            contents=[document.part(), prompt.text],
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": ScreeningResult,
+                "temperature": 0.0,
+            },
+        )
+    finally:
+        if owns_document:
+            document.cleanup()
 
-    RULES:
-    {level_4_rules}
+    return response.parsed
 
-    EXTRACTED JSON SUMMARY:
-    {extracted_data}
 
-    INSTRUCTIONS:
-    If you find any violations, you must state the criterion that was met and provide the specific evidence or quote from the document that proves it.
+def match_screening_checks(criteria: List[str], checks: list) -> Dict[str, object]:
+    """
+    Pairs the checks a screening call returned with the rules it was asked about, by wording, since
+    the model may reorder, shorten or leave out rules. Matched checks get the rule text back.
+    """
+    asked = {criterion: set(normalize_words(criterion)) for criterion in criteria}
+    matched: Dict[str, object] = {}
+    for check in checks:
+        words = set(normalize_words(check.criterion))
+        overlap, criterion = max(
+            (
+                (len(words & rule_words) / max(min(len(words), len(rule_words)), 1), criterion)
+                for criterion, rule_words in asked.items()
+                if criterion not in matched
+            ),
+            default=(0.0, None),
+        )
+        if criterion is not None and overlap >= RULE_MATCH_OVERLAP:
+            matched[criterion] = check.model_copy(update={"criterion": criterion})
+    return matched
+
+
+def run_parallel_pre_screening(
+    client: genai.Client,
+    json_path: str,
+    pdf_path: str,
+    model: str = MODEL_NAME,
+    document: Optional["SubmissionDocument"] = None,
+    group_size: int = SCREENING_GROUP_SIZE,
+    max_parallel: int = SCREENING_PARALLEL_CALLS,
+    min_confidence: float = SHORT_CIRCUIT_CONFIDENCE,
+) -> ScreeningResult:
+    """
+    Screens small groups of Level-4 rules in concurrent calls. Once any call reports a violation
+    with at least min_confidence, calls not yet sent are cancelled and calls in flight are left to
+    finish unread. detailed_audit then covers only the rules that were evaluated; otherwise every
+    rule must have been answered, and rules a call leaves out are asked again.
     """
+    from qix_schemas import CriterionScreening, ScreeningCheck, ScreeningResult
 
-    response = client.models.generate_content(
-        model=MODEL_NAME,
-        contents=[
-            types.Part.from_bytes(data=doc_data, mime_type="application/pdf"),
-            prompt,
+    with open(json_path, "r", encoding="utf-8") as f:
+        project_json = json.load(f)
+    groups = [LEVEL_4_CRITERIA[i:i + group_size] for i in range(0, len(LEVEL_4_CRITERIA), group_size)]
+
+    owns_document = document is None
+    document = document or SubmissionDocument(client, pdf_path)
+    ledger = current_ledger()
+
+    def screen_group(criteria: List[str], evidence) -> list:
+        matched: Dict[str, object] = {}
+        missing = criteria
+        for attempt in range(SCREENING_REPAIR_ATTEMPTS + 1):
+            if attempt:
+                print(f"-> Re-asking {len(missing)} screening rule(s) left out of the answer")
+            prompt = build_criterion_screening_prompt(project_json, missing)
+            with track_tokens(ledger):
+                response = generate_content(
+                    client,
+                    prompt,
+                    model,
+                    contents=[evidence, prompt.text],
+                    config={
+                        "response_mime_type": "application/json",
+                        "response_schema": CriterionScreening,
+                        "temperature": 0.0,
+                    },
+                )
+            if response.parsed is None:
+                raise ValueError(f"Unparseable screening response for rules: {'; '.join(missing)}")
+            matched.update(match_screening_checks(missing, response.parsed.checks))
+            missing = [criterion for criterion in criteria if criterion not in matched]
+            if not missing:
+                return [matched[criterion] for criterion in criteria]
+        raise ValueError(f"Screening response left out rules: {'; '.join(missing)}")
+
+    checks: Dict[str, object] = {}
+    decisive = None
+    futures: list = []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(groups))))
+    try:
+        # The PDF part is read, or uploaded, once and shared by every call.
+        evidence = document.part()
+        futures = [executor.submit(screen_group, group, evidence) for group in groups]
+        for future in as_completed(futures):
+            for check in future.result():
+                checks[check.criterion] = check
+                if decisive is None and check.violation_found and check.confidence >= min_confidence:
+                    decisive = check
+            if decisive is not None:
+                break
+    finally:
+        cancelled = sum(future.cancel() for future in futures)
+        executor.shutdown(wait=False, cancel_futures=True)
+        if owns_document:
+            document.cleanup()
+
+    evaluated = [checks[criterion] for criterion in LEVEL_4_CRITERIA if criterion in checks]
+    if decisive is None and len(evaluated) < len(LEVEL_4_CRITERIA):
+        raise ValueError(f"Screening evaluated only {len(evaluated)} of {len(LEVEL_4_CRITERIA)} rules")
+    violations = [check for check in evaluated if check.violation_found]
+    primary = decisive or max(violations, key=lambda check: check.confidence, default=None)
+    if decisive is not None:
+        print(
+            f"-> Screening stopped early on a violation ({decisive.confidence:.2f} confidence) after "
+            f"{len(evaluated)} of {len(LEVEL_4_CRITERIA)} rules; {cancelled} calls cancelled"
+        )
+    return ScreeningResult(
+        is_eligible=not violations,
+        primary_violation=primary.criterion if primary is not None else "None",
+        detailed_audit=[
+            ScreeningCheck(
+                criterion=check.criterion, violation_found=check.violation_found, evidence_found=check.evidence_found
+            )
+            for check in evaluated
         ],
-        config={
-            "response_mime_type": "application/json",
-            "response_schema": ScreeningResult,
-            "temperature": 0.0,
-        },
     )
 
-    return response.parsed
-
 
 # -----------------------------
 # Grading Agent
 # -----------------------------
 def upload_pdf_to_gemini(client: genai.Client, pdf_path: str):
     print(f"Uploading {pdf_path} to Gemini...")
-    pdf_file = client.files.upload(file=pdf_path, config={"mime_type": "application/pdf"})
+    with span("upload", "upload"):
+        pdf_file = client.files.upload(file=pdf_path, config={"mime_type": "application/pdf"})
 
-    while pdf_file.state.name == "PROCESSING":
-        print(".", end="", flush=True)
-        time.sleep(2)
-        pdf_file = client.files.get(name=pdf_file.name)
+    with span("upload_processing", "wait"):
+        while pdf_file.state.name == "PROCESSING":
+            print(".", end="", flush=True)
+            time.sleep(2)
+            pdf_file = client.files.get(name=pdf_file.name)
 
     if pdf_file.state.name == "FAILED":
         raise ValueError(f"Failed to process PDF: {pdf_file.name}")
@@ -275,124 +783,209 @@ def upload_pdf_to_gemini(client: genai.Client, pdf_path: str):
     return pdf_file
 
 
-def call_gemini_agent(client: genai.Client, system_instruction: str, pdf_file, text_prompt: str, require_json: bool = False) -> str:
+def call_gemini_agent(
+    client: genai.Client,
+    prompt: Prompt,
+    pdf_file,
+    require_json: bool = False,
+    model: str = MODEL_NAME,
+) -> str:
+    from google.genai import types
+
     config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
+        system_instruction=prompt.system,
         temperature=0.2,
         response_mime_type="application/json" if require_json else "text/plain",
     )
 
-    contents = [pdf_file, text_prompt]
-    response = client.models.generate_content(model=MODEL_NAME, contents=contents, config=config)
+    # pdf_file may also be a list of parts, e.g. rendered chart pages standing in for the document.
+    evidence = list(pdf_file) if isinstance(pdf_file, list) else [pdf_file]
+    response = generate_content(client, prompt, model, contents=evidence + [prompt.text], config=config)
     return response.text
 
 
-def positive_assessor(client: genai.Client, pdf_file, json_text: str) -> str:
+def positive_assessor(client: genai.Client, pdf_file, project_json: dict, model: str = MODEL_NAME) -> str:
     print("-> Positive Assessor (Defense) analyzing...")
-    prompt = f"""You are the Positive Advocate for this clinical project. 
-    Using BOTH the provided PDF document and the JSON summary, review the project against this rubric:
-    {FULL_RUBRIC}
-
-    Your goal is to highlight all strengths. Find specific evidence, charts, or quotes in the PDF and JSON that justify 'Above Expectations' scores for every category. Formulate a strong defensive argument."""
+    return call_gemini_agent(client, build_positive_prompt(project_json), pdf_file, model=model)
 
-    text_prompt = f"EXTRACTED PROJECT JSON:\n{json_text}\n\n{prompt}"
-    return call_gemini_agent(client, "Act as a strict but highly supportive positive advocate.", pdf_file, text_prompt)
 
-
-def negative_assessor(client: genai.Client, pdf_file, json_text: str) -> str:
+def negative_assessor(client: genai.Client, pdf_file, project_json: dict, model: str = MODEL_NAME) -> str:
     print("-> Negative Assessor (Prosecution) analyzing...")
-    prompt = f"""You are a ruthless, veteran clinical auditor known for extreme strictness. 
-    Using BOTH the provided PDF document and the JSON summary, review the project against this rubric:
-    {FULL_RUBRIC}
-
-    Your goal is to aggressively drag the score down. You must actively search for technicalities, missing long-term data, or subjective claims. 
-    - If a criterion requires multiple elements (e.g., 'quantified benefits' AND 'intangible results'), and they only have one, aggressively attack the missing element.
-    - If they claim 'sustained results', strictly verify if the charts in the PDF explicitly prove >= 3 months. If it's only 2.5 months, flag it as a failure.
-    - Argue fiercely why this project DOES NOT deserve 'Above Expectations' and must be capped at 'Meet Expectations' or 'Below Expectations'."""
-
-    text_prompt = f"EXTRACTED PROJECT JSON:\n{json_text}\n\n{prompt}"
-    return call_gemini_agent(client, "Act as a hostile, highly critical project auditor who penalizes missing data heavily.", pdf_file, text_prompt)
-
-
-def independent_judge(client: genai.Client, pdf_file, json_text: str, pos_arg: str, neg_arg: str) -> dict:
+    return call_gemini_agent(client, build_negative_prompt(project_json), pdf_file, model=model)
+
+
+def independent_judge(
+    client: genai.Client,
+    pdf_file,
+    project_json: dict,
+    pos_arg: str,
+    neg_arg: str,
+    model: str = MODEL_NAME,
+    document: Optional["SubmissionDocument"] = None,
+) -> dict:
     print("-> Independent Judge finalizing scores...")
-    system_prompt = f"""You are the Lead Meta-Judge for the NUH QIX awards. 
-    You have the original PDF submission, the extracted JSON, a Positive Advocate's review, and a Strict Skeptic's review.
-
-    RUBRIC & THRESHOLDS:
-    {FULL_RUBRIC}
-    - Outstanding: >= 85 (HARD REQUIREMENT: Only the top 10% of elite projects achieve this. Evidence must be flawless.)
-    - Merit: >= 70
-    - Recognition: >= 50
-
-    CRITICAL GRADING RULES:
-    1. THE BURDEN OF PROOF: You MUST default to 'Meet Expectations' or lower. You are strictly forbidden from awarding 'Above Expectations' unless the Positive Advocate provides explicit, undeniable quotes/charts from the source documents that satisfy EVERY SINGLE requirement in that rubric tier.
-    2. PENALIZE VAGUENESS: If the Skeptic successfully points out that a claim is subjective, unquantified, or lacks a specific timeframe, you MUST downgrade the score. 
-    3. EXACT DISCRETE SCORES: You must only select the exact integer scores provided in the rubric (e.g., for Background, you must choose 3, 6, or 10. Do not invent a score like 8 or 9).
-
-    INSTRUCTIONS:
-    Cross-reference the debate. Rule on each category. Output strictly matching this JSON schema:
-    {{
-      "assessments": [
-        {{
-          "category": "String (e.g., '1. Background')",
-          "max_score": "Integer (e.g., 10)",
-          "ai_score": "Integer (Must be an exact discrete score from the rubric)",
-          "ai_justification": "String (Explain why you rejected the higher score, or why the evidence was so flawless it forced you to award it)",
-          "extracted_quote": "String (Exact quote from the PDF/JSON supporting the score)"
-        }}
-      ]
-    }}"""
-
-    debate_context = f"""
-    --- EXTRACTED JSON ---
-    {json_text}
-
-    --- POSITIVE ADVOCATE ARGUMENT ---
-    {pos_arg}
-
-    --- STRICT SKEPTIC ARGUMENT ---
-    {neg_arg}
-    """
+    prompt = build_judge_prompt(project_json, pos_arg, neg_arg)
+    final_assessment = json.loads(call_gemini_agent(client, prompt, pdf_file, require_json=True, model=model))
+    assessments, problems = validate_assessments(_assessment_items(final_assessment))
+    quotes = document.quote_index(project_json) if document is not None else None
+    problems.update(check_quotes(assessments, quotes))
+
+    # Only the categories that failed validation or quoted text that is not in the submission
+    # are re-asked, in a small follow-up call.
+    repaired: List[str] = []
+    for _ in range(JUDGE_REPAIR_ATTEMPTS):
+        if not problems:
+            break
+        print("-> Re-asking the judge about: " + "; ".join(f"{label} ({reason})" for label, reason in problems.items()))
+        categories = [category for category in RUBRIC if category.label in problems]
+        evidence, chart_pages = chart_evidence(document, categories, pdf_file)
+        repair_prompt = build_judge_repair_prompt(categories, problems, pos_arg, neg_arg, chart_pages=chart_pages)
+        response = json.loads(call_gemini_agent(client, repair_prompt, evidence, require_json=True, model=model))
+        fixed, problems = validate_assessments(_assessment_items(response), expected=categories)
+        problems.update(check_quotes(fixed, quotes))
+        assessments = merge_assessments(assessments, fixed)
+        repaired.extend(item["category"] for item in fixed)
+
+    # A quote that still cannot be found is kept and flagged in the report; only missing or
+    # invalid scores fail the project.
+    scored = {item["category"] for item in assessments}
+    invalid = {label: reason for label, reason in problems.items() if label not in scored}
+    if invalid:
+        details = "; ".join(f"{label}: {reason}" for label, reason in invalid.items())
+        raise ValueError(f"Judge output failed rubric validation: {details}")
+    flagged = [item["category"] for item in assessments if is_flagged(item, "extracted_quote")]
+    if flagged:
+        print(f"-> Quotes flagged for review: {', '.join(flagged)}")
+
+    if not isinstance(final_assessment, dict):
+        final_assessment = {}
+    final_assessment["assessments"] = assessments
+    final_assessment["repaired_categories"] = repaired
+    return final_assessment
+
+
+def check_quotes(assessments: List[dict], quotes: Optional[QuoteIndex]) -> Dict[str, str]:
+    """Annotates each item's extracted_quote with its page match; returns a problem for each unverifiable one."""
+    annotate_quotes(assessments, quotes, "extracted_quote")
+    problems = {}
+    for item in assessments:
+        if not is_unverified(item, "extracted_quote"):
+            continue
+        figures = item["extracted_quote_check"].get("missing_figures")
+        found = f"gives {', '.join(figures)}, which the page does not" if figures else "could not be found in the submission"
+        problems[item["category"]] = f"its extracted_quote {found}; quote it word for word with its page"
+    return problems
 
-    raw_json = call_gemini_agent(client, system_prompt, pdf_file, debate_context, require_json=True)
-    return json.loads(raw_json)
 
+def chart_evidence(document: Optional["SubmissionDocument"], categories, pdf_file):
+    """
+    Evidence for a check that only concerns chart-based categories (Benefits / Results): the
+    rendered chart pages when they are available, otherwise the whole document.
+    Returns (evidence, chart page numbers or None).
+    """
+    if document is None or not categories or any(c.label not in CHART_EVIDENCE_CATEGORIES for c in categories):
+        return pdf_file, None
+    charts = document.chart_parts()
+    if not charts:
+        return pdf_file, None
+    pages = [page for page, _ in charts]
+    print(f"-> Sending chart pages {pages} instead of the whole PDF")
+    return [part for _, part in charts], pages
+
+
+def _assessment_items(response):
+    return response.get("assessments") if isinstance(response, dict) else response
+
+
+def grade_project(
+    client: genai.Client,
+    pdf_filepath: str,
+    json_filepath: str,
+    routing: Optional[RoutingPolicy] = None,
+    document: Optional["SubmissionDocument"] = None,
+    checkpoint: Optional[ProjectCheckpoint] = None,
+    mode: str = "full",
+) -> dict:
+    """
+    mode "full" runs the debate, the judge and any escalation. "judge_only" asks the judge alone,
+    and "lite" does so on the lite tier; both are used to stay within a run budget.
+    """
+    routing = routing or RoutingPolicy()
+    checkpoint = checkpoint or ProjectCheckpoint()
+    grading_tier = "lite" if mode == "lite" else routing.tier_for("grading")
+    grading_model = MODEL_TIERS.get(grading_tier, grading_tier)
 
-def grade_project(client: genai.Client, pdf_filepath: str, json_filepath: str) -> dict:
     with open(json_filepath, "r") as f:
         project_json = json.load(f)
-        json_text = json.dumps(project_json, indent=2)
 
     print(f"Starting Multi-Agent Grading for: {project_json.get('project_title', 'Unknown')}")
 
-    pdf_file = upload_pdf_to_gemini(client, pdf_filepath)
+    owns_document = document is None
+    document = document or SubmissionDocument(client, pdf_filepath)
+    pdf_file = checkpoint.attach_upload(document)
 
     try:
-        pos_arg = positive_assessor(client, pdf_file, json_text)
-        neg_arg = negative_assessor(client, pdf_file, json_text)
-        final_assessment = independent_judge(client, pdf_file, json_text, pos_arg, neg_arg)
+        if mode == "full":
+            pos_arg = checkpoint.run(
+                "positive", grading_model, lambda: positive_assessor(client, pdf_file, project_json, model=grading_model)
+            )
+            neg_arg = checkpoint.run(
+                "negative", grading_model, lambda: negative_assessor(client, pdf_file, project_json, model=grading_model)
+            )
+        else:
+            print(f"-> Grading without the debate: {MODE_LABELS[mode]}")
+            pos_arg = neg_arg = NO_DEBATE_ARGUMENT
+        final_assessment = dict(
+            checkpoint.run(
+                "judge",
+                grading_model,
+                lambda: independent_judge(
+                    client, pdf_file, project_json, pos_arg, neg_arg, model=grading_model, document=document
+                ),
+            )
+        )
 
         total_score = sum(int(item["ai_score"]) for item in final_assessment["assessments"])
+        first_pass_score = total_score
 
-        if total_score >= 85:
-            label = "Outstanding"
-        elif total_score >= 70:
-            label = "Merit"
-        elif total_score >= 50:
-            label = "Recognition"
-        else:
-            label = "Below Recognition"
+        escalation_reason = "" if mode != "full" else routing.escalation_reason(
+            total_score, parse_proposed_total(pos_arg), parse_proposed_total(neg_arg)
+        )
+        if escalation_reason:
+            # Only the judge is re-run; the debate arguments are reused as-is.
+            print(f"-> Escalating to {routing.tier_for('escalation')} tier: {escalation_reason}")
+            escalation_model = routing.model_for("escalation")
+            final_assessment = dict(
+                checkpoint.run(
+                    "escalation",
+                    escalation_model,
+                    lambda: independent_judge(
+                        client, pdf_file, project_json, pos_arg, neg_arg, model=escalation_model, document=document
+                    ),
+                )
+            )
+            total_score = sum(int(item["ai_score"]) for item in final_assessment["assessments"])
+            grading_tier = routing.tier_for("escalation")
+
+        label = score_to_label(total_score)
 
         final_assessment["total_score"] = total_score
         final_assessment["label"] = label
+        final_assessment["grading_tier"] = grading_tier
+        final_assessment["grading_model"] = MODEL_TIERS.get(grading_tier, grading_tier)
+        final_assessment["first_pass_score"] = first_pass_score
+        final_assessment["escalation_reason"] = escalation_reason
+        final_assessment["grading_mode"] = mode
+        final_assessment["debate_arguments"] = [
+            {"role": "positive", "model": grading_model, "argument": pos_arg, "proposed_total": parse_proposed_total(pos_arg)},
+            {"role": "negative", "model": grading_model, "argument": neg_arg, "proposed_total": parse_proposed_total(neg_arg)},
+        ] if mode == "full" else []
 
         print(f"\n✅ Assessment Complete! Final Score: {total_score}/100 ({label})")
         return final_assessment
     finally:
-        print("Cleaning up PDF from Gemini servers...")
-        client.files.delete(name=pdf_file.name)
-        print("Cleanup successful.")
+        if owns_document:
+            document.cleanup()
 
 
 # -----------------------------
@@ -405,31 +998,62 @@ def write_excel(
     prescreen_detail_rows: List[List],
     grading_detail_rows: List[List],
     summary_entries: List[dict],
-) -> None:
-    wb = Workbook()
-
-    # Summary Sheet
-    ws_summary = wb.active
-    ws_summary.title = "Summary"
-    summary_headers = [
-        "Project ID",
-        "PDF File",
-        "Project Title",
-        "Status",
-        "Eligibility",
-        "Level 4 Reason",
-        "AI Total Score",
-        "AI Label",
-        "Final Total Score",
-        "Final Label",
-        "Error",
-    ]
-    ws_summary.append(summary_headers)
-
-    for entry in summary_entries:
-        ws_summary.append(
+    duplicate_rows: Optional[List[List]] = None,
+    run_id: Optional[int] = None,
+    cached_blocks: Optional[Dict[str, tuple]] = None,
+) -> Dict[str, tuple]:
+    """
+    Writes the report. Each project's rows on the per-project sheets are rendered as one block,
+    reusing any block in cached_blocks whose shard digest still matches; Summary and Duplicates are
+    rendered on every export. Returns the (digest, block) of every project for the caller to cache.
+    """
+    from qix_ingest import RUN_ID_PREFIX
+
+    shards = shard_rows(summary_entries, extraction_rows, prescreen_summary_rows, prescreen_detail_rows, grading_detail_rows)
+    blocks, rendered = blocks_for(shards, cached_blocks)
+
+    sheets = {"Summary": SheetRows(SUMMARY_HEADERS)}
+    sheets.update((sheet, SheetRows(headers)) for sheet, headers in BLOCK_SHEETS)
+    for _, block in blocks.values():
+        for sheet, _ in BLOCK_SHEETS:
+            sheets[sheet].extend(block["sheets"][sheet]["rows"], block["sheets"][sheet]["widths"])
+
+    # Grading_Details keeps each project's categories in one contiguous block, so Summary can use a
+    # direct SUM over that block instead of a whole-column SUMIF. Formulas are written with their
+    # results so the workbook opens already computed.
+    grading_blocks: Dict[str, tuple] = {}
+    next_row = 2
+    for project_id, (_, block) in blocks.items():
+        count = len(block["final_scores"])
+        if count:
+            grading_blocks[project_id] = (next_row, next_row + count - 1, sum(block["final_scores"]))
+        next_row += count
+
+    summary_rows: List[List] = []
+    finals: Dict[str, tuple] = {}
+    for row_idx, entry in enumerate(summary_entries, start=2):
+        project_id = entry.get("project_id")
+        final_total = final_label = None
+        if entry.get("status") == "graded" and project_id in grading_blocks:
+            start, end, total = grading_blocks[project_id]
+            final_total = Formula(f"SUM(Grading_Details!G{start}:G{end})", total)
+            final_label = Formula(
+                f'IF(I{row_idx}>=85,"Outstanding",'
+                f'IF(I{row_idx}>=70,"Merit",'
+                f'IF(I{row_idx}>=50,"Recognition","Below Recognition")))',
+                score_to_label(total),
+            )
+            finals[project_id] = (row_idx, total)
+        elif entry.get("eligibility") == "Ineligible":
+            final_label = "LEVEL 4"
+        if entry.get("status") == "duplicate" and entry.get("duplicate_of") in finals:
+            # Duplicates follow the canonical project's final score, including human overrides.
+            canonical_row, total = finals[entry.get("duplicate_of")]
+            final_total = Formula(f"I{canonical_row}", total)
+            final_label = Formula(f"J{canonical_row}", score_to_label(total))
+        summary_rows.append(
             [
-                entry.get("project_id"),
+                project_id,
                 entry.get("pdf_file"),
                 entry.get("project_title"),
                 entry.get("status"),
@@ -437,137 +1061,547 @@ def write_excel(
                 entry.get("level4_reason"),
                 entry.get("ai_total_score"),
                 entry.get("ai_label"),
-                None,
-                None,
+                final_total,
+                final_label,
                 entry.get("error"),
+                entry.get("grading_tier"),
+                entry.get("escalation_reason"),
+                entry.get("duplicate_of"),
+                entry.get("input_tokens"),
+                entry.get("output_tokens"),
+                entry.get("flagged_quotes") or None,
+                MODE_LABELS.get(entry.get("grading_mode"), entry.get("grading_mode")) or None,
             ]
         )
+    sheets["Summary"].add(summary_rows)
 
-    for row_idx in range(2, ws_summary.max_row + 1):
-        status = ws_summary.cell(row=row_idx, column=4).value
-        eligibility = ws_summary.cell(row=row_idx, column=5).value
-
-        if status == "graded":
-            ws_summary.cell(
-                row=row_idx, column=9
-            ).value = f"=SUMIF(Grading_Details!A:A,A{row_idx},Grading_Details!G:G)"
-            ws_summary.cell(
-                row=row_idx, column=10
-            ).value = (
-                f'=IF(I{row_idx}>=85,"Outstanding",'
-                f'IF(I{row_idx}>=70,"Merit",'
-                f'IF(I{row_idx}>=50,"Recognition","Below Recognition")))'
-            )
-        elif eligibility == "Ineligible":
-            ws_summary.cell(row=row_idx, column=10).value = "LEVEL 4"
-
-    apply_table_formatting(ws_summary)
-
-    # Extraction Sheet
-    ws_extract = wb.create_sheet("Extraction")
-    extract_headers = [
-        "Project ID",
-        "PDF File",
-        "Project Title",
-        "Department",
-        "Category",
-        "Problem Statement",
-        "SMART Goals",
-        "Methodology",
-        "Key Results",
-        "Follow Up Plan",
-        "Error",
-    ]
-    ws_extract.append(extract_headers)
-    for row in extraction_rows:
-        ws_extract.append(row)
-    apply_table_formatting(ws_extract)
-
-    # Pre-Screening Summary Sheet
-    ws_screen = wb.create_sheet("PreScreening")
-    prescreen_headers = [
-        "Project ID",
-        "PDF File",
-        "Eligible",
-        "Primary Violation",
-        "Violation Evidence",
-        "Error",
-    ]
-    ws_screen.append(prescreen_headers)
-    for row in prescreen_summary_rows:
-        ws_screen.append(row)
-    apply_table_formatting(ws_screen)
-
-    # Pre-Screening Details Sheet
-    ws_screen_detail = wb.create_sheet("PreScreening_Details")
-    prescreen_detail_headers = [
-        "Project ID",
-        "Criterion",
-        "Violation Found",
-        "Evidence",
-    ]
-    ws_screen_detail.append(prescreen_detail_headers)
-    for row in prescreen_detail_rows:
-        ws_screen_detail.append(row)
-    apply_table_formatting(ws_screen_detail)
-
-    # Grading Details Sheet
-    ws_grade_detail = wb.create_sheet("Grading_Details")
-    grading_headers = [
-        "Project ID",
-        "PDF File",
-        "Category",
-        "Max Score",
-        "AI Score",
-        "Human Score",
-        "Final Score",
-        "AI Justification",
-        "Extracted Quote",
-    ]
-    ws_grade_detail.append(grading_headers)
-
-    for row in grading_detail_rows:
-        ws_grade_detail.append(row)
-
-    for row_idx in range(2, ws_grade_detail.max_row + 1):
-        ws_grade_detail.cell(
-            row=row_idx, column=7
-        ).value = f"=IF(F{row_idx}=\"\",E{row_idx},F{row_idx})"
-
-    apply_table_formatting(ws_grade_detail)
-
-    wb.save(output_path)
-    print(f"Excel report saved to: {output_path}")
+    sheets["Duplicates"] = SheetRows(DUPLICATE_HEADERS)
+    sheets["Duplicates"].add(duplicate_rows or [])
+
+    # Lets `qix ingest` match a judge-edited copy back to its run.
+    write_workbook(output_path, sheets, identifier=f"{RUN_ID_PREFIX}{run_id}" if run_id is not None else "")
+    reused = len(blocks) - rendered
+    print(f"Excel report saved to: {output_path}" + (f" ({reused} of {len(blocks)} project blocks reused)" if reused else ""))
+    return blocks
+
+
+def export_excel(store: ResultsStore, run_id: int, output_path: str, incremental: bool = True) -> None:
+    """
+    Exports a run's report from the store. With incremental, only projects whose rows changed since
+    the last export are rendered again; the rest come from the store's cached sheet blocks.
+    """
+    rows = store.export_report_rows(run_id)
+    cached = store.load_report_blocks(run_id) if incremental else {}
+    blocks = write_excel(
+        output_path,
+        rows["extraction_rows"],
+        rows["prescreen_summary_rows"],
+        rows["prescreen_detail_rows"],
+        rows["grading_detail_rows"],
+        rows["summary_entries"],
+        rows["duplicate_rows"],
+        run_id=run_id,
+        cached_blocks=cached,
+    )
+    changed = {project_id: block for project_id, block in blocks.items() if cached.get(project_id, ("",))[0] != block[0]}
+    store.save_report_blocks(run_id, changed, keep=set(blocks))
 
 
 # -----------------------------
 # Main Pipeline
 # -----------------------------
-def main() -> None:
+def verify_screening_evidence(screening: dict, quotes: Optional[QuoteIndex]) -> bool:
+    """
+    Checks the quoted text in each audit check's evidence_found against the submission. Returns
+    True for an ineligible result whose every violation cites only quotes that cannot be found.
+    """
+    checks = screening.get("detailed_audit") or []
+    annotate_quotes(checks, quotes, "evidence_found", quoted_spans_only=True)
+    violations = [check for check in checks if check.get("violation_found")]
+    return (
+        not screening.get("is_eligible")
+        and bool(violations)
+        and all(is_unverified(check, "evidence_found") for check in violations)
+    )
+
+
+def process_project(
+    client: genai.Client,
+    store: ResultsStore,
+    run_id: int,
+    position: int,
+    pdf_path: str,
+    extract_dir: str,
+    routing: RoutingPolicy,
+    project_hash: str = "",
+    duplicate_of: str = "",
+    reuse_previous: bool = False,
+    budget: Optional[MemoryBudget] = None,
+    inline_threshold_bytes: int = DEFAULT_INLINE_THRESHOLD_MB * MB,
+    retries: int = 1,
+    resume: bool = True,
+    parallel_screening: bool = False,
+    prior_calls: Optional[List[dict]] = None,
+    run_budget: Optional[RunBudget] = None,
+) -> dict:
+    """
+    Runs extraction, pre-screening and grading for one submission, recording every stage in the
+    store. prior_calls are the project's share of calls made for it elsewhere, e.g. packed extraction.
+    With a run_budget, every call is charged to it and grading steps down as it runs out.
+    """
+    pdf_file = os.path.basename(pdf_path)
+    project_id = sanitize_filename(os.path.splitext(pdf_file)[0])
+    entry = {"pdf_file": pdf_file, "project_title": project_id, "project_hash": project_hash}
+
+    def finish(**updates) -> dict:
+        entry.update(updates)
+        store.save_project(run_id, project_id, position, entry)
+        return entry
+
+    if duplicate_of:
+        canonical = store.get_project(run_id, duplicate_of) or {}
+        print(f"Skipping {pdf_file}: duplicate of {duplicate_of}")
+        return finish(
+            status="duplicate",
+            duplicate_of=duplicate_of,
+            **{
+                field: canonical.get(field)
+                for field in ("project_title", "department", "category", "eligibility", "level4_reason",
+                              "ai_total_score", "ai_label", "grading_tier", "grading_mode")
+                if canonical.get(field)
+            },
+        )
+
+    previous = store.find_by_hash(project_hash) if reuse_previous and project_hash else None
+    if previous and previous["run_id"] != run_id:
+        print(f"Reusing result for {pdf_file} from run {previous['run_id']} ({previous['project_id']})")
+        store.copy_project_results(previous["run_id"], previous["project_id"], run_id, project_id)
+        return finish(
+            duplicate_of=f"run {previous['run_id']}: {previous['project_id']}",
+            **{
+                field: previous.get(field)
+                for field in ("project_title", "department", "category", "status", "eligibility",
+                              "level4_reason", "ai_total_score", "ai_label", "grading_tier", "escalation_reason",
+                              "grading_mode")
+            },
+        )
+
+    budget = budget or MemoryBudget()
+    ledger = TokenLedger(project_id, run_budget)
+    ledger.calls.extend(prior_calls or [])
+    checkpoint = ProjectCheckpoint(store, project_hash, resume=resume)
+    if checkpoint.steps:
+        print(f"Resuming {pdf_file} after checkpointed steps: {', '.join(sorted(checkpoint.steps))}")
+    document = SubmissionDocument(client, pdf_path, inline_threshold_bytes=inline_threshold_bytes)
+    try:
+        with track_tokens(ledger):
+            json_path = os.path.join(extract_dir, f"{project_id}.json")
+            extraction_model = routing.model_for("extraction")
+
+            def extract() -> dict:
+                with budget.reserve("extraction", project_id, document.request_bytes()):
+                    extraction = extract_clinical_project(client, pdf_path, model=extraction_model, document=document)
+                return extraction.model_dump()
+
+            try:
+                extraction_data = checkpoint.run("extraction", extraction_model, extract)
+                with open(json_path, "w", encoding="utf-8") as json_file:
+                    json.dump(extraction_data, json_file, indent=2, ensure_ascii=False)
+            except Exception as exc:
+                store.save_extraction(run_id, project_id, extraction_model, None, str(exc))
+                return finish(status="extraction_failed", error=str(exc))
+
+            store.save_extraction(run_id, project_id, extraction_model, extraction_data)
+            entry.update(
+                project_title=extraction_data.get("project_title") or project_id,
+                department=extraction_data.get("department"),
+                category=extraction_data.get("category"),
+            )
+
+            screening_model = routing.model_for("screening")
+
+            # Parallel screening has up to SCREENING_PARALLEL_CALLS requests in flight, each holding the PDF.
+            screener = run_parallel_pre_screening if parallel_screening else run_pre_screening
+            screening_calls = SCREENING_PARALLEL_CALLS if parallel_screening else 1
+
+            def screen(model: str):
+                def call() -> dict:
+                    with budget.reserve("screening", project_id, document.request_bytes() * screening_calls):
+                        result = screener(client, json_path, pdf_path, model=model, document=document)
+                    return result.model_dump()
+
+                return call
+
+            try:
+                screening = checkpoint.run("screening", screening_model, screen(screening_model))
+                if verify_screening_evidence(screening, document.quote_index(extraction_data)):
+                    # Every violation rests on quotes that are not in the submission: screen once
+                    # more with the escalation model before ruling the project out.
+                    screening_model = routing.model_for("escalation")
+                    print(f"-> Re-screening {pdf_file}: the violation evidence could not be found in the submission")
+                    screening = checkpoint.run("screening_recheck", screening_model, screen(screening_model))
+                    verify_screening_evidence(screening, document.quote_index(extraction_data))
+            except Exception as exc:
+                store.save_screening(run_id, project_id, screening_model, None, "", [], str(exc))
+                return finish(status="screening_failed", error=str(exc))
+
+            store.save_screening(
+                run_id,
+                project_id,
+                screening_model,
+                screening["is_eligible"],
+                screening["primary_violation"],
+                screening["detailed_audit"],
+            )
+            entry["eligibility"] = "Eligible" if screening["is_eligible"] else "Ineligible"
+            if not screening["is_eligible"]:
+                checkpoint.clear()
+                return finish(status="level4_ineligible", level4_reason=screening["primary_violation"])
+
+            # Each attempt resumes from the first step without a checkpoint, so a failed judge
+            # call is retried on its own without repeating the upload or the debate.
+            mode = run_budget.mode(project_id) if run_budget is not None else "full"
+            for attempt in range(retries + 1):
+                try:
+                    with budget.reserve("grading", project_id, document.upload_bytes()):
+                        checkpoint.attach_upload(document)
+                    grading = grade_project(
+                        client, pdf_path, json_path, routing=routing, document=document, checkpoint=checkpoint, mode=mode
+                    )
+                    break
+                except Exception as exc:
+                    if attempt == retries or isinstance(exc, BudgetExhausted):
+                        return finish(status="grading_failed", error=str(exc))
+                    print(f"Grading failed for {pdf_file} ({exc}); retrying from the last completed step...")
+
+            for argument in grading.get("debate_arguments", []):
+                store.save_debate_argument(
+                    run_id, project_id, argument["role"], argument["model"], argument["argument"], argument["proposed_total"]
+                )
+            store.save_category_scores(run_id, project_id, grading.get("assessments", []))
+            checkpoint.clear()
+            return finish(
+                status="graded",
+                ai_total_score=grading.get("total_score", ""),
+                ai_label=grading.get("label", ""),
+                grading_tier=grading.get("grading_tier", ""),
+                escalation_reason=grading.get("escalation_reason", ""),
+                grading_mode=grading.get("grading_mode", ""),
+            )
+    finally:
+        if checkpoint.persistent and entry.get("status", "").endswith("_failed") and document.uploaded is not None:
+            # Left in place for the retry; the Files API deletes it on its own after 48 hours.
+            print(f"Keeping upload {document.uploaded.name} for a later retry of {pdf_file}")
+        else:
+            document.cleanup()
+        if ledger.calls:
+            store.save_token_usage(run_id, project_id, ledger.calls)
+            print(f"Tokens for {project_id}: {ledger.summary()}")
+        if run_budget is not None:
+            run_budget.record_project(*calls_cost(ledger.calls), mode=entry.get("grading_mode") or "")
+
+
+# -----------------------------
+# Dead-Letter Queue
+# -----------------------------
+def failed_stage(status: str) -> str:
+    """The stage a project has to be retried from, or '' if it needs no retry."""
+    if status == BUDGET_STOPPED:
+        return "not started"
+    return status[: -len("_failed")] if status.endswith("_failed") else ""
+
+
+def stop_for_budget(
+    store: ResultsStore, run_id: int, position: int, pdf_path: str, project_hash: str, run_budget: RunBudget
+) -> dict:
+    """Records a project that was not started because the run budget could not cover it."""
+    pdf_file = os.path.basename(pdf_path)
+    project_id = sanitize_filename(os.path.splitext(pdf_file)[0])
+    entry = {
+        "pdf_file": pdf_file,
+        "project_title": project_id,
+        "project_hash": project_hash,
+        "status": BUDGET_STOPPED,
+        "error": f"Not started: the run budget could not cover another project ({run_budget.describe_spend()})",
+    }
+    store.save_project(run_id, project_id, position, entry)
+    return entry
+
+
+def update_dead_letters(
+    store: ResultsStore, run_id: int, position: int, pdf_path: str, project_hash: str, entry: dict
+) -> None:
+    """
+    Queues a project that ended in a *_failed status, or was stopped by the run budget, with the
+    stage to retry from; resolves it once it succeeds.
+    """
+    pdf_file = os.path.basename(pdf_path)
+    project_id = sanitize_filename(os.path.splitext(pdf_file)[0])
+    stage = failed_stage(entry.get("status", ""))
+    if stage:
+        store.save_dead_letter(
+            run_id, project_id, position, os.path.abspath(pdf_path), project_hash, stage, entry.get("error", "")
+        )
+        print(f"Queued {pdf_file} for retry: {stage}" + ("" if stage == "not started" else " failed"))
+    elif store.resolve_dead_letter(run_id, project_id):
+        print(f"Recovered {pdf_file} from the dead-letter queue")
+
+
+def retry_dead_letters(store: ResultsStore, run_id: int, run_one, workers: int = 1, passes: int = 1) -> List[str]:
+    """Re-runs each project still queued for run_id, up to passes times; returns the recovered project ids."""
+    recovered: List[str] = []
+    for attempt in range(passes):
+        pending = store.get_dead_letters(run_id)
+        if not pending:
+            break
+        stages: Dict[str, int] = {}
+        for letter in pending:
+            stages[letter["stage"]] = stages.get(letter["stage"], 0) + 1
+        print(
+            f"Retry pass {attempt + 1}: {len(pending)} failed projects "
+            f"({', '.join(f'{count} at {stage}' for stage, count in stages.items())})"
+        )
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            entries = list(executor.map(run_one, pending))
+        recovered.extend(
+            letter["project_id"]
+            for letter, entry in zip(pending, entries)
+            if not failed_stage(entry.get("status", ""))
+        )
+    return recovered
+
+
+def retry_failed(
+    store: ResultsStore,
+    run_id: int,
+    output_excel: str,
+    passes: int = 1,
+    workers: Optional[int] = None,
+    max_cost: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+) -> int:
+    """
+    Drains a finished run's dead-letter queue with the options the run was started with, then
+    rewrites its report. The run's budget, or a larger one given here, counts what the run has
+    already spent. Returns the number of projects still failing.
+    """
+    pending = store.get_dead_letters(run_id)
+    if not pending:
+        print(f"No failed projects queued for run {run_id}")
+        return 0
+    if not GEMINI_API_KEY and not GEMINI_API_KEYS:
+        raise ValueError("GEMINI_API_KEY is not set. Please set it in your environment or .env file.")
+
+    row = store.connection().execute("SELECT config_json FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    options = json.loads(row["config_json"] or "{}") if row else {}
+    routing = routing_from_options(options)
+    extract_dir = options.get("extract_dir", "./extracted_results")
+    ensure_dir(extract_dir)
+    pool = create_client_pool()
+    budget = MemoryBudget(options.get("memory_budget_mb", DEFAULT_MEMORY_BUDGET_MB) * MB)
+    run_budget = RunBudget(
+        max_cost if max_cost is not None else options.get("max_cost"),
+        max_tokens if max_tokens is not None else options.get("max_tokens"),
+        *run_spend(store, run_id),
+    )
+
+    def run_one(letter: dict) -> dict:
+        project_hash = letter["project_hash"] or ""
+        if not run_budget.admit(letter["project_id"]):
+            entry = stop_for_budget(store, run_id, letter["position"], letter["pdf_path"], project_hash, run_budget)
+            update_dead_letters(store, run_id, letter["position"], letter["pdf_path"], project_hash, entry)
+            return entry
+        try:
+            with pool.lease(prefer=ProjectCheckpoint(store, project_hash).upload_key) as client:
+                entry = process_project(
+                    client,
+                    store,
+                    run_id,
+                    letter["position"],
+                    letter["pdf_path"],
+                    extract_dir,
+                    routing,
+                    project_hash=project_hash,
+                    budget=budget,
+                    inline_threshold_bytes=int(options.get("inline_threshold_mb", DEFAULT_INLINE_THRESHOLD_MB) * MB),
+                    retries=options.get("retries", 1),
+                    parallel_screening=options.get("parallel_screening", False),
+                    run_budget=run_budget,
+                )
+        finally:
+            run_budget.release(letter["project_id"])
+        update_dead_letters(store, run_id, letter["position"], letter["pdf_path"], project_hash, entry)
+        return entry
+
+    recovered = retry_dead_letters(store, run_id, run_one, workers or options.get("workers", 1), passes)
+    # Duplicates copied an empty result from their failed canonical project; copy the new one.
+    for project in store.find_projects(run_id=run_id):
+        if project["status"] == "duplicate" and project["duplicate_of"] in recovered:
+            process_project(
+                None,
+                store,
+                run_id,
+                project["position"],
+                project["pdf_file"],
+                extract_dir,
+                routing,
+                project_hash=project["project_hash"] or "",
+                duplicate_of=project["duplicate_of"],
+            )
+
+    still_failing = len(store.get_dead_letters(run_id))
+    print(f"Recovered {len(recovered)} of {len(pending)} failed projects; {still_failing} still queued")
+    if run_budget.limited:
+        print(f"Run budget: {run_budget.describe_spend()}")
+    if options.get("shard"):
+        print("This is a shard's store; re-run `qix.py merge` to include the recovered projects.")
+    else:
+        export_excel(store, run_id, output_excel)
+    return still_failing
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="NUH-QIX end-to-end assessment pipeline.")
     parser.add_argument("--pptx_dir", default="./project_pptx", help="Folder containing .pptx files")
     parser.add_argument("--pdf_dir", default="./project", help="Folder to store converted PDFs")
     parser.add_argument("--extract_dir", default="./extracted_results", help="Folder to store extracted JSON files")
     parser.add_argument("--output_excel", default="./assessment_results.xlsx", help="Excel report output path")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite results store shared across runs")
     parser.add_argument("--skip_pptx", action="store_true", help="Skip PPTX to PDF conversion")
     parser.add_argument("--force_convert", action="store_true", help="Force reconversion of PPTX files")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--native_pptx",
+        action="store_true",
+        help="Read .pptx files directly (slide text, tables and chart data) instead of converting them to PDF",
+    )
+    parser.add_argument("--extraction_tier", help="Model tier or name for extraction (default: lite)")
+    parser.add_argument("--screening_tier", help="Model tier or name for pre-screening (default: lite)")
+    parser.add_argument("--grading_tier", help="Model tier or name for the debate and first-pass judge (default: flash)")
+    parser.add_argument("--escalation_tier", help="Model tier or name for re-judging borderline projects (default: pro)")
+    parser.add_argument(
+        "--escalation_margin",
+        type=int,
+        default=DEFAULT_ESCALATION_MARGIN,
+        help="Escalate when the first-pass total is within this many points of 85, 70 or 50",
+    )
+    parser.add_argument(
+        "--disagreement_gap",
+        type=int,
+        default=DEFAULT_DISAGREEMENT_GAP,
+        help="Escalate when the defense and prosecution proposed totals differ by at least this much",
+    )
+    parser.add_argument("--skip_dedup", action="store_true", help="Grade every file even if it duplicates another")
+    parser.add_argument(
+        "--near_duplicate_threshold",
+        type=float,
+        default=DEFAULT_NEAR_DUPLICATE_THRESHOLD,
+        help="Estimated text similarity (0-1) at which two submissions count as the same project",
+    )
+    parser.add_argument(
+        "--reuse_previous",
+        action="store_true",
+        help="Reuse results from earlier runs in the store for byte-identical resubmissions",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Number of projects processed concurrently")
+    parser.add_argument(
+        "--memory_budget_mb",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help="Maximum estimated memory held by in-flight requests across all workers",
+    )
+    parser.add_argument(
+        "--inline_threshold_mb",
+        type=float,
+        default=DEFAULT_INLINE_THRESHOLD_MB,
+        help="Files larger than this are streamed from disk via the Files API instead of inlined",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=1,
+        help="Immediate retries of failed grading; steps that already succeeded are not repeated",
+    )
+    parser.add_argument(
+        "--parallel_screening",
+        action="store_true",
+        help="Screen the Level-4 rules in small concurrent calls and stop at the first confident violation",
+    )
+    parser.add_argument(
+        "--max_cost",
+        type=float,
+        help="Run budget in USD, charged from reported token usage; grading steps down as it runs out",
+    )
+    parser.add_argument(
+        "--max_tokens",
+        type=int,
+        help="Run budget in input plus output tokens; grading steps down as it runs out",
+    )
+    parser.add_argument(
+        "--pack_extraction",
+        action="store_true",
+        help="Extract several short submissions per request; any that fail validation are extracted on their own",
+    )
+    parser.add_argument(
+        "--retry_passes",
+        type=int,
+        default=1,
+        help="Passes over the dead-letter queue of failed projects once every other project has finished",
+    )
+    parser.add_argument(
+        "--ignore_checkpoints",
+        action="store_true",
+        help="Start every project from scratch instead of resuming steps left by an interrupted run",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=SCHEDULE_POLICIES,
+        default="sjf",
+        help="Project order: shortest expected job first (default) or file name order",
+    )
+    parser.add_argument(
+        "--priority",
+        action="append",
+        metavar="GLOB[=N]",
+        help="Run matching files first, e.g. --priority '*appeal*'; higher N runs earlier (repeatable)",
+    )
+    parser.add_argument(
+        "--shard",
+        help="Process only shard i of N (e.g. 1/4) of the round; combine the shard stores with `qix.py merge`",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Sample CPU hot spots and time every stage; writes an HTML waterfall and a Chrome trace next to the Excel",
+    )
+    args = parser.parse_args(argv)
+    shard = parse_shard(args.shard) if args.shard else None
+    if shard:
+        # Each node writes its own store (results.db -> results.shard1of4.db), even on a shared drive.
+        args.db = shard_db_path(args.db, *shard)
 
-    if not GEMINI_API_KEY:
+    routing = routing_from_options(vars(args))
+    print("Model routing: " + ", ".join(f"{stage}={routing.model_for(stage)}" for stage in DEFAULT_STAGE_TIERS))
+
+    if not GEMINI_API_KEY and not GEMINI_API_KEYS:
         print("Error: GEMINI_API_KEY is not set. Please set it in your environment or .env file.")
         return
 
     ensure_dir(args.extract_dir)
+    if args.profile:
+        start_profiling()
 
-    if not args.skip_pptx:
-        convert_pptx_folder_to_pdf(args.pptx_dir, args.pdf_dir, force=args.force_convert)
+    if not args.skip_pptx and not args.native_pptx:
+        with span("pptx_conversion"):
+            convert_pptx_folder_to_pdf(args.pptx_dir, args.pdf_dir, force=args.force_convert)
 
     # Build list of PDFs to process based on PPTX names
     pptx_files = [f for f in os.listdir(args.pptx_dir) if f.lower().endswith(".pptx")] if os.path.exists(args.pptx_dir) else []
     pptx_bases = {os.path.splitext(f)[0] for f in pptx_files}
 
     pdf_files: List[str] = []
-    if pptx_bases:
+    if args.native_pptx and pptx_files:
+        pdf_files = [os.path.join(args.pptx_dir, f) for f in pptx_files]
+    elif pptx_bases:
         for base in sorted(pptx_bases):
             pdf_path = os.path.join(args.pdf_dir, f"{base}.pdf")
             if os.path.exists(pdf_path):
@@ -579,192 +1613,269 @@ def main() -> None:
         if os.path.exists(args.pdf_dir):
             pdf_files = [
                 os.path.join(args.pdf_dir, f)
-                for f in os.listdir(args.pdf_dir)
+                for f in sorted(os.listdir(args.pdf_dir))
                 if f.lower().endswith(".pdf")
             ]
 
+    # Every node must see the same order, so positions in a merged report match a single-node run.
+    pdf_files.sort(key=os.path.basename)
+    project_ids = {path: sanitize_filename(os.path.splitext(os.path.basename(path))[0]) for path in pdf_files}
+
     if not pdf_files:
-        print("No PDFs found to process. Ensure PPTX conversion succeeded or place PDFs in the pdf directory.")
+        print("No PDFs found to process. Ensure PPTX conversion succeeded, place PDFs in the pdf directory, "
+              "or pass --native_pptx.")
         return
 
-    client = genai.Client(api_key=GEMINI_API_KEY)
-
-    extraction_rows: List[List] = []
-    prescreen_summary_rows: List[List] = []
-    prescreen_detail_rows: List[List] = []
-    grading_detail_rows: List[List] = []
-    summary_entries: List[dict] = []
-
-    for pdf_path in pdf_files:
-        pdf_file = os.path.basename(pdf_path)
-        project_id = sanitize_filename(os.path.splitext(pdf_file)[0])
-        project_title = project_id
-
-        status = ""
-        eligibility = ""
-        level4_reason = ""
-        ai_total_score = ""
-        ai_label = ""
-        error = ""
-
-        extraction_data: Optional[ProjectExtraction] = None
-        json_path = os.path.join(args.extract_dir, f"{project_id}.json")
-
-        try:
-            extraction_data = extract_clinical_project(client, pdf_path)
-            project_title = extraction_data.project_title or project_title
-            with open(json_path, "w", encoding="utf-8") as json_file:
-                json_file.write(extraction_data.model_dump_json(indent=2))
-        except Exception as exc:
-            status = "extraction_failed"
-            error = str(exc)
-
-        extraction_rows.append(
-            [
-                project_id,
-                pdf_file,
-                getattr(extraction_data, "project_title", ""),
-                getattr(extraction_data, "department", ""),
-                getattr(extraction_data, "category", ""),
-                getattr(extraction_data, "problem_statement", ""),
-                getattr(extraction_data, "smart_goals", ""),
-                "; ".join(getattr(extraction_data, "methodology", []) or []),
-                getattr(extraction_data, "key_results", ""),
-                getattr(extraction_data, "follow_up_plan", ""),
-                error if status == "extraction_failed" else "",
-            ]
-        )
-
-        if not extraction_data:
-            summary_entries.append(
-                {
-                    "project_id": project_id,
-                    "pdf_file": pdf_file,
-                    "project_title": project_title,
-                    "status": status,
-                    "eligibility": eligibility,
-                    "level4_reason": level4_reason,
-                    "ai_total_score": ai_total_score,
-                    "ai_label": ai_label,
-                    "error": error,
-                }
-            )
-            continue
-
-        try:
-            screening = run_pre_screening(client, json_path, pdf_path)
-            eligibility = "Eligible" if screening.is_eligible else "Ineligible"
-            level4_reason = screening.primary_violation if not screening.is_eligible else ""
-
-            violations = [
-                f"{check.criterion}: {check.evidence_found}"
-                for check in screening.detailed_audit
-                if check.violation_found
-            ]
-            prescreen_summary_rows.append(
-                [
-                    project_id,
-                    pdf_file,
-                    eligibility,
-                    screening.primary_violation,
-                    " | ".join(violations),
-                    "",
-                ]
+    store = ResultsStore(args.db)
+    run_id = store.start_run(vars(args))
+    print(f"Recording results as run {run_id} in {args.db}")
+
+    # Fingerprint every submission locally so duplicates never reach the API.
+    fingerprints: Dict[str, Fingerprint] = {}
+    duplicate_of: Dict[str, str] = {}
+    if not args.skip_dedup:
+        print(f"Fingerprinting {len(pdf_files)} submissions for duplicates...")
+        with span("fingerprinting"):
+            clusters = find_duplicate_clusters(
+                pdf_files, threshold=args.near_duplicate_threshold, fingerprints=fingerprints
             )
-
-            for check in screening.detailed_audit:
-                prescreen_detail_rows.append(
+        duplicate_rows: List[List] = []
+        for cluster_id, cluster in enumerate(clusters, start=1):
+            canonical_id = sanitize_filename(os.path.splitext(os.path.basename(cluster[0].path))[0])
+            for match in cluster:
+                pdf_file = os.path.basename(match.path)
+                duplicate_rows.append(
                     [
-                        project_id,
-                        check.criterion,
-                        check.violation_found,
-                        check.evidence_found,
+                        cluster_id,
+                        sanitize_filename(os.path.splitext(pdf_file)[0]),
+                        pdf_file,
+                        match.match_type,
+                        round(match.similarity, 2),
+                        canonical_id,
                     ]
                 )
-        except Exception as exc:
-            status = "screening_failed"
-            error = str(exc)
-            prescreen_summary_rows.append([project_id, pdf_file, "", "", "", error])
-            summary_entries.append(
-                {
-                    "project_id": project_id,
-                    "pdf_file": pdf_file,
-                    "project_title": project_title,
-                    "status": status,
-                    "eligibility": eligibility,
-                    "level4_reason": level4_reason,
-                    "ai_total_score": ai_total_score,
-                    "ai_label": ai_label,
-                    "error": error,
-                }
-            )
-            continue
+                if match.match_type != "canonical":
+                    duplicate_of[match.path] = canonical_id
+        print(f"Found {len(clusters)} duplicate clusters; {len(duplicate_of)} submissions will reuse an existing result.")
+
+    # Fingerprinting covers the whole round on every node so clusters match a single-node run; each
+    # node then keeps only its own shard, and a duplicate always lands on its canonical project's node.
+    assigned = set(assign_shard(project_ids, duplicate_of, *shard)) if shard else set(pdf_files)
+    if shard:
+        print(f"Shard {shard[0]}/{shard[1]}: {len(assigned)} of {len(pdf_files)} submissions; results go to {args.db}")
+    if not args.skip_dedup:
+        assigned_ids = {project_ids[path] for path in assigned}
+        store.save_duplicate_rows(run_id, [row for row in duplicate_rows if row[1] in assigned_ids])
+
+    pool = create_client_pool()
+    if len(pool) > 1:
+        print(f"Spreading projects across {len(pool)} API keys")
+    budget = MemoryBudget(args.memory_budget_mb * MB)
+    run_budget = RunBudget(args.max_cost, args.max_tokens)
+    if run_budget.limited:
+        print(f"Run budget: {run_budget.describe_spend()}")
+
+    run_started = time.perf_counter()
+    durations: Dict[str, float] = {}
+
+    def run(position: int, pdf_path: str) -> dict:
+        started = time.perf_counter()
+        try:
+            return run_project(position, pdf_path)
+        finally:
+            durations[pdf_path] = time.perf_counter() - started
 
-        if eligibility == "Ineligible":
-            status = "level4_ineligible"
-            summary_entries.append(
-                {
-                    "project_id": project_id,
-                    "pdf_file": pdf_file,
-                    "project_title": project_title,
-                    "status": status,
-                    "eligibility": eligibility,
-                    "level4_reason": level4_reason,
-                    "ai_total_score": ai_total_score,
-                    "ai_label": ai_label,
-                    "error": "",
-                }
-            )
-            continue
+    hashes: Dict[str, str] = {}
+    packed_usage: Dict[str, List[dict]] = {}
 
+    def hash_of(pdf_path: str) -> str:
+        if pdf_path not in hashes:
+            hashes[pdf_path] = (
+                fingerprints[pdf_path].content_hash if pdf_path in fingerprints else file_sha256(pdf_path)
+            )
+        return hashes[pdf_path]
+
+    def run_project(position: int, pdf_path: str) -> dict:
+        project_hash = hash_of(pdf_path)
+        project_id = project_ids[pdf_path]
+        if pdf_path not in duplicate_of and not run_budget.admit(project_id):
+            entry = stop_for_budget(store, run_id, position, pdf_path, project_hash, run_budget)
+            update_dead_letters(store, run_id, position, pdf_path, project_hash, entry)
+            return entry
+        # A resumed project goes back to the key that holds its checkpointed upload, if it is available.
+        prefer = "" if args.ignore_checkpoints else ProjectCheckpoint(store, project_hash).upload_key
         try:
-            grading = grade_project(client, pdf_path, json_path)
-            ai_total_score = grading.get("total_score", "")
-            ai_label = grading.get("label", "")
-
-            for item in grading.get("assessments", []):
-                grading_detail_rows.append(
-                    [
-                        project_id,
-                        pdf_file,
-                        item.get("category"),
-                        item.get("max_score"),
-                        item.get("ai_score"),
-                        "",
-                        "",
-                        item.get("ai_justification"),
-                        item.get("extracted_quote"),
-                    ]
+            with profiled_project(project_id), pool.lease(prefer=prefer) as client:
+                entry = process_project(
+                    client,
+                    store,
+                    run_id,
+                    position,
+                    pdf_path,
+                    args.extract_dir,
+                    routing,
+                    project_hash=project_hash,
+                    duplicate_of=duplicate_of.get(pdf_path, ""),
+                    reuse_previous=args.reuse_previous,
+                    budget=budget,
+                    inline_threshold_bytes=int(args.inline_threshold_mb * MB),
+                    retries=args.retries,
+                    resume=not args.ignore_checkpoints or pdf_path in packed_usage,
+                    parallel_screening=args.parallel_screening,
+                    prior_calls=packed_usage.get(pdf_path),
+                    run_budget=run_budget,
                 )
+        finally:
+            run_budget.release(project_id)
+        update_dead_letters(store, run_id, position, pdf_path, project_hash, entry)
+        return entry
+
+    # Duplicates copy their canonical project's result, so they run after everything else has finished.
+    originals = [(i, path) for i, path in enumerate(pdf_files) if path in assigned and path not in duplicate_of]
+    duplicates = [(i, path) for i, path in enumerate(pdf_files) if path in assigned and path in duplicate_of]
+
+    # Small submissions go first so one huge deck does not hold up everything queued behind it.
+    # Positions are unchanged, so the report keeps file name order.
+    priorities = parse_priorities(args.priority)
+    with span("cost_estimation"):
+        jobs = [estimate_job(path, priority_for(path, priorities)) for _, path in originals]
+    scheduled = order_jobs(jobs, args.schedule)
+    ordered = [job.path for job in scheduled]
+    positions = {path: i for i, path in originals}
+    if ordered:
+        print(f"Scheduling {len(ordered)} projects by {args.schedule}; first: {os.path.basename(ordered[0])}")
+
+    workers = max(1, args.workers)
+    packing = {}
+    if args.pack_extraction:
+        # Only projects that still need an extraction are packed; the rest resume or reuse a result.
+        extraction_model = routing.model_for("extraction")
+        pending = []
+        for job in scheduled:
+            checkpoint = ProjectCheckpoint(store, hash_of(job.path), resume=not args.ignore_checkpoints)
+            reusable = args.reuse_previous and store.find_by_hash(hash_of(job.path))
+            if checkpoint.get("extraction", extraction_model) is None and not reusable:
+                pending.append(job)
+        packed_usage, packing = run_packed_extraction(
+            pool, store, pending, hashes, extraction_model, budget, workers, run_budget
+        )
 
-            status = "graded"
-        except Exception as exc:
-            status = "grading_failed"
-            error = str(exc)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda path: run(positions[path], path), ordered))
+    for position, pdf_path in duplicates:
+        run(position, pdf_path)
+
+    # Projects that failed, e.g. while the API was down, get a final pass once everything else is done;
+    # their completed steps are replayed from checkpoints, and finished projects are not touched.
+    # A run stopped by its budget skips that pass; its queue is drained later with retry-failed.
+    paths_by_id = {project_id: path for path, project_id in project_ids.items()}
+    recovered = retry_dead_letters(
+        store,
+        run_id,
+        lambda letter: run(letter["position"], paths_by_id[letter["project_id"]]),
+        workers,
+        0 if run_budget.stopped else args.retry_passes,
+    )
+    for position, pdf_path in duplicates:
+        if duplicate_of[pdf_path] in recovered:
+            run(position, pdf_path)
+    dead_letters = store.get_dead_letters(run_id, pending_only=False)
+    pending = [letter for letter in dead_letters if letter["resolved_at"] is None]
+    if pending:
+        print(
+            f"{len(pending)} projects still failing: "
+            + ", ".join(f"{letter['project_id']} ({letter['stage']})" for letter in pending)
+        )
+        print(f"  Retry them later with: python qix.py retry-failed --db {args.db} --run_id {run_id}")
+    if run_budget.limited:
+        modes = run_budget.stats()["grading_modes"]
+        print(
+            f"Run budget: {run_budget.describe_spend()}; graded "
+            + (", ".join(f"{count} {mode.replace('_', ' ')}" for mode, count in modes.items()) or "nothing")
+            + ("; stopped before every project was started" if run_budget.stopped else "")
+        )
 
-        summary_entries.append(
-            {
-                "project_id": project_id,
-                "pdf_file": pdf_file,
-                "project_title": project_title,
-                "status": status,
-                "eligibility": eligibility,
-                "level4_reason": level4_reason,
-                "ai_total_score": ai_total_score,
-                "ai_label": ai_label,
-                "error": error,
-            }
+    schedule = compare_with_fifo(ordered, [path for _, path in originals], durations, workers)
+    schedule.update(policy=args.schedule, wall_clock_s=time.perf_counter() - run_started)
+    print(
+        f"Completion times ({args.schedule}, {workers} workers): mean {schedule['scheduled']['mean_s']:.1f}s, "
+        f"max {schedule['scheduled']['max_s']:.1f}s; file-order FIFO on the same project times: "
+        f"mean {schedule['fifo']['mean_s']:.1f}s, max {schedule['fifo']['max_s']:.1f}s"
+    )
+
+    memory = budget.stats()
+    memory["process_peak_rss_bytes"] = process_peak_rss_bytes()
+    print(
+        f"Memory: peak in flight {format_mb(memory['peak_in_flight_bytes'])} of {format_mb(budget.budget_bytes)} budget, "
+        f"{memory['admission_waits']} admission waits, process peak RSS {format_mb(memory['process_peak_rss_bytes'])}"
+    )
+    for stage, figures in memory["stages"].items():
+        print(
+            f"  {stage}: largest request {format_mb(figures['peak_request_bytes'])}, "
+            f"peak in flight {format_mb(figures['peak_in_flight_bytes'])}"
         )
 
-    write_excel(
-        args.output_excel,
-        extraction_rows,
-        prescreen_summary_rows,
-        prescreen_detail_rows,
-        grading_detail_rows,
-        summary_entries,
+    token_totals = store.token_totals(run_id).values()
+    tokens = {
+        key: sum(totals[key] or 0 for totals in token_totals)
+        for key in ("calls", "estimated_tokens", "prompt_tokens", "output_tokens", "latency_ms")
+    }
+    print(
+        f"Tokens: {tokens['prompt_tokens']} input / {tokens['output_tokens']} output over {tokens['calls']} calls "
+        f"(~{tokens['estimated_tokens']} text tokens estimated before sending)"
     )
 
+    api_keys = pool.stats()
+    if len(api_keys) > 1:
+        for key, figures in api_keys.items():
+            print(
+                f"  key {key}: {figures['projects']} projects, {figures['calls']} calls, "
+                f"{figures['throttles']} throttles, {figures['errors']} errors"
+            )
+
+    http = transport_stats()
+    print(
+        f"HTTP: {http['requests']} requests over {http['connections_opened']} connections "
+        f"({http['tls_handshakes']} TLS handshakes, {http['reuse_rate']:.0%} of requests reused a connection"
+        f"{', HTTP/2' if http['http2'] else ''})"
+    )
+
+    metrics = {
+        "projects": len(assigned),
+        "memory": memory,
+        "tokens": tokens,
+        "api_keys": api_keys,
+        "http": http,
+        "circuit_breaker": pool.breaker.stats(),
+        "run_budget": run_budget.stats(),
+        "dead_letters": {"queued": len(dead_letters), "recovered": len(recovered), "pending": len(pending)},
+        "schedule": schedule,
+        "packed_extraction": packing,
+        "project_seconds": {project_ids[path]: round(seconds, 3) for path, seconds in durations.items()},
+    }
+    if shard:
+        metrics["shard"] = {
+            "index": shard[0],
+            "count": shard[1],
+            "round": round_digest(list(project_ids.values())),
+            "round_size": len(pdf_files),
+            "projects": sorted(project_ids[path] for path in assigned),
+        }
+    store.finish_run(run_id, metrics)
+    if shard:
+        print(f"Shard {shard[0]}/{shard[1]} finished. Once every shard is done, combine them with:")
+        print(f"  python qix.py merge <all {shard[1]} shard stores> --output_excel {args.output_excel}")
+    else:
+        with span("write_excel"):
+            export_excel(store, run_id, args.output_excel)
+
+    profiler = stop_profiling()
+    if profiler is not None:
+        for path in write_profile(profiler, args.output_excel):
+            print(f"Profile written to {path}")
+        for row in profiler.hot_spots(limit=5)[0]["rows"]:
+            print(f"  {row['percent']:5.1f}%  {row['function']} ({row['location']})")
+
 
 if __name__ == "__main__":
     main()
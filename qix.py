@@ -0,0 +1,341 @@
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+# Only argparse is imported up front; each subcommand imports the pipeline modules,
+# google-genai, pydantic or openpyxl itself, so --help and report-only commands start quickly.
+
+
+def _collect_pdfs(paths: List[str]) -> List[str]:
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdfs.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.lower().endswith((".pdf", ".pptx")))
+        else:
+            pdfs.append(path)
+    return pdfs
+
+
+def cmd_extract(args: argparse.Namespace) -> int:
+    import json
+
+    import nuh_qix_pipeline as pipeline
+
+    routing = pipeline.RoutingPolicy(stage_tiers={"extraction": args.tier})
+    model = routing.model_for("extraction")
+    client = pipeline.create_client()
+    pipeline.ensure_dir(args.extract_dir)
+
+    def save(pdf_path: str, data: dict) -> None:
+        project_id = pipeline.sanitize_filename(os.path.splitext(os.path.basename(pdf_path))[0])
+        output_path = os.path.join(args.extract_dir, f"{project_id}.json")
+        with open(output_path, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, indent=2, ensure_ascii=False)
+        print(f"Successfully saved data from {os.path.basename(pdf_path)} -> {output_path}")
+
+    pdf_paths = _collect_pdfs(args.paths)
+    if args.pack:
+        from qix_packing import plan_packs
+
+        packs, _ = plan_packs([pipeline.estimate_job(path) for path in pdf_paths])
+        extracted = set()
+        for pack in packs:
+            try:
+                accepted, problems = pipeline.extract_packed_projects(client, [job.path for job in pack], model=model)
+            except Exception as exc:
+                accepted, problems = {}, {job.path: f"packed call failed: {exc}" for job in pack}
+            for pdf_path, data in accepted.items():
+                save(pdf_path, data)
+                extracted.add(pdf_path)
+            for pdf_path, problem in problems.items():
+                print(f"Extracting {os.path.basename(pdf_path)} on its own: {problem}")
+        pdf_paths = [path for path in pdf_paths if path not in extracted]
+
+    failures = 0
+    for pdf_path in pdf_paths:
+        try:
+            extraction = pipeline.extract_clinical_project(client, pdf_path, model=model)
+            save(pdf_path, extraction.model_dump())
+        except Exception as exc:
+            failures += 1
+            print(f"Error processing {os.path.basename(pdf_path)}: {exc}")
+    return 1 if failures else 0
+
+
+def cmd_screen(args: argparse.Namespace) -> int:
+    import nuh_qix_pipeline as pipeline
+
+    routing = pipeline.RoutingPolicy(stage_tiers={"screening": args.tier})
+    print("Starting Pre-Screening Audit...")
+    screener = pipeline.run_parallel_pre_screening if args.parallel else pipeline.run_pre_screening
+    audit_report = screener(
+        pipeline.create_client(), args.json, args.pdf, model=routing.model_for("screening")
+    )
+
+    if audit_report.is_eligible:
+        print("✅ ELIGIBLE: Project meets baseline requirements for judging.")
+    else:
+        print(f"❌ INELIGIBLE: Level-4 Violation Detected: {audit_report.primary_violation}")
+        print("\nAudit Details:")
+        for check in audit_report.detailed_audit:
+            status = "🚩 VIOLATION" if check.violation_found else "✅ OK"
+            print(f"- {check.criterion}: {status}")
+            print(f"  Evidence: {check.evidence_found}")
+    return 0
+
+
+def cmd_grade(args: argparse.Namespace) -> int:
+    import json
+
+    import nuh_qix_pipeline as pipeline
+
+    routing = pipeline.RoutingPolicy(stage_tiers={"grading": args.grading_tier, "escalation": args.escalation_tier})
+    result = pipeline.grade_project(pipeline.create_client(), args.pdf, args.json, routing=routing)
+    with open(args.output, "w") as out:
+        json.dump(result, out, indent=4)
+    print(f"Graded result saved to: {args.output}")
+    return 0
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    from nuh_qix_pipeline import export_excel
+    from qix_store import ResultsStore
+
+    if not os.path.exists(args.db):
+        print(f"Error: results store not found: {args.db}")
+        return 1
+
+    store = ResultsStore(args.db)
+    run_id = args.run_id if args.run_id is not None else store.latest_run_id()
+    if run_id is None:
+        print(f"Error: no runs recorded in {args.db}")
+        return 1
+
+    export_excel(store, run_id, args.output_excel, incremental=not args.rebuild)
+    return 0
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    from qix_ingest import ingest_workbook
+    from qix_store import ResultsStore
+
+    if not os.path.exists(args.db):
+        print(f"Error: results store not found: {args.db}")
+        return 1
+
+    store = ResultsStore(args.db)
+    failures = 0
+    for path in args.workbooks:
+        try:
+            ingest_workbook(store, path, run_id=args.run_id)
+        except Exception as exc:
+            failures += 1
+            print(f"Error ingesting {path}: {exc}")
+    return 1 if failures else 0
+
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    from nuh_qix_pipeline import export_excel
+    from qix_shard import merge_shards
+    from qix_store import ResultsStore
+
+    store = ResultsStore(args.db)
+    try:
+        run_id = merge_shards(store, args.shards)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return 1
+    print(f"Recorded merged results as run {run_id} in {args.db}")
+    export_excel(store, run_id, args.output_excel)
+    return 0
+
+
+def cmd_eval(args: argparse.Namespace) -> int:
+    from qix_eval import evaluate_configurations, parse_configuration, parse_existing_run
+
+    try:
+        configurations = [parse_configuration(value) for value in args.config or []]
+        existing_runs = [parse_existing_run(value) for value in args.run or []]
+        if not configurations and not existing_runs:
+            raise ValueError("give at least one --config or --run")
+        evaluate_configurations(
+            args.gold, args.pdf_dir, args.out_dir, configurations, existing_runs=existing_runs, rerun=args.rerun
+        )
+    except (ValueError, RuntimeError) as exc:
+        print(f"Error: {exc}")
+        return 1
+    return 0
+
+
+def cmd_retry_failed(args: argparse.Namespace) -> int:
+    from nuh_qix_pipeline import retry_failed
+    from qix_store import ResultsStore
+
+    if not os.path.exists(args.db):
+        print(f"Error: results store not found: {args.db}")
+        return 1
+
+    store = ResultsStore(args.db)
+    run_id = args.run_id if args.run_id is not None else store.latest_run_id()
+    if run_id is None:
+        print(f"Error: no runs recorded in {args.db}")
+        return 1
+    try:
+        still_failing = retry_failed(
+            store,
+            run_id,
+            args.output_excel,
+            passes=args.passes,
+            workers=args.workers,
+            max_cost=args.max_cost,
+            max_tokens=args.max_tokens,
+        )
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return 1
+    return 1 if still_failing else 0
+
+
+def cmd_convert(args: argparse.Namespace) -> int:
+    from nuh_qix_pipeline import convert_pptx_folder_to_pdf
+
+    convert_pptx_folder_to_pdf(args.pptx_dir, args.pdf_dir, force=args.force)
+    return 0
+
+
+def cmd_duplicates(args: argparse.Namespace) -> int:
+    from qix_dedup import find_duplicate_clusters
+
+    files = [
+        os.path.join(folder, name)
+        for folder in args.folders
+        if os.path.isdir(folder)
+        for name in sorted(os.listdir(folder))
+        if name.lower().endswith((".pdf", ".pptx"))
+    ]
+    print(f"Fingerprinting {len(files)} files...")
+    for cluster_id, cluster in enumerate(find_duplicate_clusters(files, threshold=args.threshold), start=1):
+        print(f"\nCluster {cluster_id}:")
+        for match in cluster:
+            print(f"  [{match.match_type} {match.similarity:.2f}] {match.path}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="qix", description="NUH-QIX assessment pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser(
+        "run",
+        help="Run the full pipeline (all nuh_qix_pipeline.py options are accepted)",
+        add_help=False,
+    )
+
+    extract = subparsers.add_parser("extract", help="Extract structured JSON from PDF submissions")
+    extract.add_argument("paths", nargs="+", help="PDF or PPTX files, or folders of them (decks are read natively)")
+    extract.add_argument("--extract_dir", default="./extracted_results", help="Folder to store extracted JSON files")
+    extract.add_argument("--tier", help="Model tier or name (default: lite)")
+    extract.add_argument(
+        "--pack", action="store_true", help="Extract several short submissions per request, as in `run --pack_extraction`"
+    )
+    extract.set_defaults(func=cmd_extract)
+
+    screen = subparsers.add_parser("screen", help="Run the Level-4 pre-screening audit on one project")
+    screen.add_argument("pdf", help="Submission PDF, or a PPTX to read natively")
+    screen.add_argument("json", help="Extracted JSON for the submission")
+    screen.add_argument("--tier", help="Model tier or name (default: lite)")
+    screen.add_argument(
+        "--parallel", action="store_true", help="Screen the rules in concurrent calls, stopping at a confident violation"
+    )
+    screen.set_defaults(func=cmd_screen)
+
+    grade = subparsers.add_parser("grade", help="Run the multi-agent debate and judge on one project")
+    grade.add_argument("pdf", help="Submission PDF, or a PPTX to read natively")
+    grade.add_argument("json", help="Extracted JSON for the submission")
+    grade.add_argument("--output", default="graded_result.json", help="Where to write the graded JSON")
+    grade.add_argument("--grading_tier", help="Model tier or name for the debate and judge (default: flash)")
+    grade.add_argument("--escalation_tier", help="Model tier or name for borderline re-judging (default: pro)")
+    grade.set_defaults(func=cmd_grade)
+
+    report = subparsers.add_parser("report", help="Export the Excel report for a run from the results store")
+    report.add_argument("--db", default="./qix_results.db", help="SQLite results store")
+    report.add_argument("--run_id", type=int, help="Run to export (default: latest)")
+    report.add_argument("--output_excel", default="./assessment_results.xlsx", help="Excel report output path")
+    report.add_argument(
+        "--rebuild", action="store_true", help="Render every project again instead of reusing unchanged cached blocks"
+    )
+    report.set_defaults(func=cmd_report)
+
+    ingest = subparsers.add_parser("ingest", help="Merge judges' Human Score overrides back into the store")
+    ingest.add_argument("workbooks", nargs="+", help="Edited assessment_results.xlsx files")
+    ingest.add_argument("--db", default="./qix_results.db", help="SQLite results store")
+    ingest.add_argument("--run_id", type=int, help="Run the workbook belongs to (default: read from the workbook)")
+    ingest.set_defaults(func=cmd_ingest)
+
+    merge = subparsers.add_parser("merge", help="Combine the stores of a sharded run into one report")
+    merge.add_argument("shards", nargs="+", help="Every shard's results store (e.g. qix_results.shard1of4.db)")
+    merge.add_argument("--db", default="./qix_results.db", help="SQLite results store to merge into")
+    merge.add_argument("--output_excel", default="./assessment_results.xlsx", help="Excel report output path")
+    merge.set_defaults(func=cmd_merge)
+
+    retry = subparsers.add_parser("retry-failed", help="Re-run a run's failed projects from the dead-letter queue")
+    retry.add_argument("--db", default="./qix_results.db", help="SQLite results store")
+    retry.add_argument("--run_id", type=int, help="Run whose failed projects to retry (default: latest)")
+    retry.add_argument("--output_excel", default="./assessment_results.xlsx", help="Excel report output path")
+    retry.add_argument("--passes", type=int, default=1, help="Retry passes over projects that fail again")
+    retry.add_argument("--workers", type=int, help="Projects retried concurrently (default: the run's --workers)")
+    retry.add_argument("--max_cost", type=float, help="Raise the run's budget in USD, counting what it already spent")
+    retry.add_argument("--max_tokens", type=int, help="Raise the run's token budget, counting what it already used")
+    retry.set_defaults(func=cmd_retry_failed)
+
+    evaluate = subparsers.add_parser(
+        "eval", help="Compare pipeline configurations against human final scores (accuracy vs cost)"
+    )
+    evaluate.add_argument("gold", help="Gold set: a finalised assessment_results.xlsx or a JSON file of human scores")
+    evaluate.add_argument("--pdf_dir", default="./gold_set", help="Folder with the gold set's PDF submissions")
+    evaluate.add_argument("--out_dir", default="./eval_results", help="Where each configuration's store and report go")
+    evaluate.add_argument(
+        "--config",
+        action="append",
+        metavar="NAME=ARGS",
+        help="A configuration to run, e.g. cheap='--grading_tier lite --escalation_tier flash' (repeatable)",
+    )
+    evaluate.add_argument(
+        "--run",
+        action="append",
+        metavar="NAME=DB[:RUN_ID]",
+        help="Score an existing run instead of running the pipeline, e.g. last_round=qix_results.db:4 (repeatable)",
+    )
+    evaluate.add_argument("--rerun", action="store_true", help="Run configurations again even if they finished before")
+    evaluate.set_defaults(func=cmd_eval)
+
+    convert = subparsers.add_parser("convert", help="Convert PPTX decks to PDF (Windows + PowerPoint)")
+    convert.add_argument("--pptx_dir", default="./project_pptx", help="Folder containing .pptx files")
+    convert.add_argument("--pdf_dir", default="./project", help="Folder to store converted PDFs")
+    convert.add_argument("--force", action="store_true", help="Reconvert even if the PDF exists")
+    convert.set_defaults(func=cmd_convert)
+
+    duplicates = subparsers.add_parser("duplicates", help="List duplicate submission clusters without grading")
+    duplicates.add_argument("folders", nargs="+", help="Folders of PDF/PPTX submissions")
+    duplicates.add_argument("--threshold", type=float, default=0.5, help="Near-duplicate similarity cut-off (0-1)")
+    duplicates.set_defaults(func=cmd_duplicates)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["run"]:
+        # Hand every option, including --help, straight to the pipeline's own parser.
+        import nuh_qix_pipeline
+
+        nuh_qix_pipeline.main(argv[1:])
+        return 0
+
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
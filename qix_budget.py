@@ -0,0 +1,199 @@
+import sys
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+
+# -----------------------------
+# Model Prices
+# -----------------------------
+# USD per million input / output tokens (Gemini API paid tier, prompts up to 200k tokens).
+# Models not listed here are costed at zero and reported as unpriced.
+MODEL_PRICES_PER_MILLION = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+def call_cost(model: str, prompt_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES_PER_MILLION.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def calls_cost(calls) -> Tuple[float, int]:
+    """Cost and tokens of a ledger's calls."""
+    cost = sum(call_cost(call["model"], call["prompt_tokens"], call["output_tokens"]) for call in calls)
+    return cost, sum(call["prompt_tokens"] + call["output_tokens"] for call in calls)
+
+
+def run_spend(store, run_id: int) -> Tuple[float, int]:
+    """Cost and tokens already reported for a run in the results store."""
+    rows = store.connection().execute(
+        "SELECT model, SUM(prompt_tokens) AS prompt_tokens, SUM(output_tokens) AS output_tokens "
+        "FROM token_usage WHERE run_id = ? GROUP BY model",
+        (run_id,),
+    ).fetchall()
+    return calls_cost(
+        [{"model": row["model"], "prompt_tokens": row["prompt_tokens"] or 0, "output_tokens": row["output_tokens"] or 0}
+         for row in rows]
+    )
+
+
+# -----------------------------
+# Run Budget (--max_cost / --max_tokens)
+# -----------------------------
+# Spending is charged from each response's usage_metadata as it arrives. Grading steps down as the
+# budget is used: the full debate, then the judge alone, then the judge alone on the lite model.
+# New projects are only started while the expected cost of one more project still fits, and no call
+# is sent once the budget is spent, so a run stops with its checkpoints intact instead of overrunning.
+GRADING_MODES = ("full", "judge_only", "lite")
+JUDGE_ONLY_AT = 0.6  # share of the budget spent or reserved by projects in flight
+LITE_AT = 0.8
+MODE_LABELS = {"full": "", "judge_only": "judge only (budget)", "lite": "judge only, lite model (budget)"}
+RECENT_PROJECTS = 5  # finished projects averaged for the expected cost of the next one
+
+BUDGET_STOPPED = "budget_stopped"
+
+
+class BudgetExhausted(RuntimeError):
+    pass
+
+
+class RunBudget:
+    def __init__(
+        self,
+        max_cost: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        spent_cost: float = 0.0,
+        spent_tokens: int = 0,
+    ) -> None:
+        self.max_cost = max_cost
+        self.max_tokens = max_tokens
+        self.spent_cost = spent_cost
+        self.spent_tokens = spent_tokens
+        self.stopped = False
+        self.modes: Dict[str, int] = {}
+        self._reserved: Dict[str, Tuple[float, int]] = {}
+        self._recent: deque = deque(maxlen=RECENT_PROJECTS)
+        self._lock = threading.Lock()
+
+    @property
+    def limited(self) -> bool:
+        return self.max_cost is not None or self.max_tokens is not None
+
+    def _share(self, cost: float, tokens: int) -> float:
+        shares = []
+        if self.max_cost is not None:
+            shares.append(cost / self.max_cost if self.max_cost > 0 else float("inf"))
+        if self.max_tokens is not None:
+            shares.append(tokens / self.max_tokens if self.max_tokens > 0 else float("inf"))
+        return max(shares, default=0.0)
+
+    def _committed(self, exclude: str = "") -> Tuple[float, int]:
+        reserved = [amount for project_id, amount in self._reserved.items() if project_id != exclude]
+        return (
+            self.spent_cost + sum(cost for cost, _ in reserved),
+            self.spent_tokens + sum(tokens for _, tokens in reserved),
+        )
+
+    def _expected(self) -> Tuple[float, int]:
+        if not self._recent:
+            return 0.0, 0
+        return (
+            sum(cost for cost, _ in self._recent) / len(self._recent),
+            sum(tokens for _, tokens in self._recent) // len(self._recent),
+        )
+
+    def used(self) -> float:
+        with self._lock:
+            return self._share(self.spent_cost, self.spent_tokens)
+
+    def charge(self, model: str, prompt_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self.spent_cost += call_cost(model, prompt_tokens, output_tokens)
+            self.spent_tokens += prompt_tokens + output_tokens
+
+    def check(self) -> None:
+        """Raises BudgetExhausted once nothing is left; called before every model call."""
+        if not self.limited:
+            return
+        with self._lock:
+            if self._share(self.spent_cost, self.spent_tokens) >= 1.0:
+                self.stopped = True
+                raise BudgetExhausted(
+                    f"Run budget exhausted: {self.describe_spend()}; resume with `qix.py retry-failed` "
+                    "and a larger --max_cost / --max_tokens"
+                )
+
+    def admit(self, project_id: str) -> bool:
+        """Reserves the expected cost of one more project, or stops admitting projects for the rest of the run."""
+        if not self.limited:
+            return True
+        with self._lock:
+            if self.stopped:
+                return False
+            cost, tokens = self._committed()
+            expected_cost, expected_tokens = self._expected()
+            if self._share(cost + expected_cost, tokens + expected_tokens) > 1.0:
+                self.stopped = True
+                return False
+            self._reserved[project_id] = (expected_cost, expected_tokens)
+            return True
+
+    def release(self, project_id: str) -> None:
+        """Drops a finished project's reservation; what it spent has already been charged."""
+        with self._lock:
+            self._reserved.pop(project_id, None)
+
+    def record_project(self, cost: float, tokens: int, mode: str = "") -> None:
+        """Adds a finished project's spending to the average that new projects reserve; mode if it was graded."""
+        with self._lock:
+            if tokens:
+                self._recent.append((cost, tokens))
+            if mode:
+                self.modes[mode] = self.modes.get(mode, 0) + 1
+
+    def mode(self, project_id: str = "") -> str:
+        """Grading mode for a project about to be graded; its own reservation is already partly spent."""
+        if not self.limited:
+            return "full"
+        with self._lock:
+            share = self._share(*self._committed(exclude=project_id))
+        return "full" if share < JUDGE_ONLY_AT else "judge_only" if share < LITE_AT else "lite"
+
+    def describe_spend(self) -> str:
+        parts = []
+        if self.max_cost is not None:
+            parts.append(f"${self.spent_cost:.2f} of ${self.max_cost:.2f}")
+        if self.max_tokens is not None:
+            parts.append(f"{self.spent_tokens} of {self.max_tokens} tokens")
+        return ", ".join(parts) or f"${self.spent_cost:.2f}, {self.spent_tokens} tokens (no limit)"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_cost": self.max_cost,
+                "max_tokens": self.max_tokens,
+                "spent_cost": round(self.spent_cost, 4),
+                "spent_tokens": self.spent_tokens,
+                "stopped": self.stopped,
+                "grading_modes": dict(self.modes),
+            }
+
+
+if __name__ == "__main__":
+    # Example: python qix_budget.py 5.00   (replays typical project costs against a $5 budget)
+    limit = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    costs = {"full": (0.35, 160_000), "judge_only": (0.18, 80_000), "lite": (0.03, 70_000)}
+    budget = RunBudget(max_cost=limit)
+    graded = 0
+    while budget.admit(f"project-{graded}"):
+        mode = budget.mode(f"project-{graded}")
+        cost, tokens = costs[mode]
+        budget.spent_cost += cost
+        budget.spent_tokens += tokens
+        budget.record_project(cost, tokens, mode)
+        budget.release(f"project-{graded}")
+        graded += 1
+    print(f"{graded} projects graded ({budget.stats()['grading_modes']}); spent {budget.describe_spend()}")
@@ -0,0 +1,513 @@
+import hashlib
+import importlib.util
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# -----------------------------
+# Multi-Credential Client Pool
+# -----------------------------
+# A key that returns 429 / RESOURCE_EXHAUSTED takes no new projects for this long,
+# doubling on each consecutive throttle up to MAX_COOLDOWN_FACTOR times.
+DEFAULT_KEY_COOLDOWN_S = 30.0
+MAX_COOLDOWN_FACTOR = 16
+# Consecutive non-throttle errors after which a key is treated as unhealthy for one cooldown.
+UNHEALTHY_AFTER_ERRORS = 3
+# Throttled calls are retried on the same key (its uploads live there) after the cooldown.
+MAX_THROTTLE_RETRIES = 3
+# A call slot is stamped before the request leaves, so the server sees it slightly later; slots are
+# held this share of the window longer so the local window never frees one before the server's does.
+RATE_WINDOW_MARGIN = 0.05
+
+
+def key_id(api_key: str) -> str:
+    """Short stable identifier for a key, safe to print and to store in checkpoints."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+
+def parse_api_keys(value: str) -> List[Tuple[str, int]]:
+    """
+    Parses "key1:60,key2:15,key3" into (key, requests per minute) pairs.
+    A key without a quota gets 0, meaning it is not rate limited locally.
+    """
+    keys = []
+    for item in value.replace("\n", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, _, rpm = item.partition(":")
+        keys.append((key.strip(), int(rpm) if rpm.strip() else 0))
+    return keys
+
+
+def is_throttle_error(exc: Exception) -> bool:
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code == 429 or "RESOURCE_EXHAUSTED" in str(exc) or "429" in str(exc)[:40]
+
+
+def is_outage_error(exc: Exception) -> bool:
+    """Server errors and transport failures (timeouts, dropped connections); not 4xx caused by the request."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(code, int):
+        return code >= 500
+    return not is_throttle_error(exc)
+
+
+# -----------------------------
+# Circuit Breaker
+# -----------------------------
+# When the API as a whole degrades, every key fails together. Once at least BREAKER_MIN_CALLS calls
+# in the last BREAKER_WINDOW_S seconds have a BREAKER_ERROR_RATE share of outage errors, outbound
+# calls pause for a cooldown (doubling while the API stays down); then one probe call decides
+# whether traffic resumes. Local work in other threads carries on meanwhile.
+BREAKER_WINDOW_S = 60.0
+BREAKER_MIN_CALLS = 6
+BREAKER_ERROR_RATE = 0.5
+BREAKER_COOLDOWN_S = 30.0
+BREAKER_MAX_COOLDOWN_S = 480.0
+# A call paused for longer than this fails instead, so its project goes to the dead-letter queue.
+BREAKER_MAX_WAIT_S = 900.0
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window_s: float = BREAKER_WINDOW_S,
+        min_calls: int = BREAKER_MIN_CALLS,
+        error_rate: float = BREAKER_ERROR_RATE,
+        cooldown_s: float = BREAKER_COOLDOWN_S,
+        max_cooldown_s: float = BREAKER_MAX_COOLDOWN_S,
+        max_wait_s: float = BREAKER_MAX_WAIT_S,
+    ) -> None:
+        self.window_s = window_s
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.max_wait_s = max_wait_s
+        self._condition = threading.Condition()
+        self.outcomes: deque = deque()  # (time, failed)
+        self.state = "closed"  # closed, open or half_open (one probe call in flight)
+        self.open_until = 0.0
+        self.current_cooldown_s = cooldown_s
+        self.trips = 0
+        self.paused_calls = 0
+        self.paused_s = 0.0
+
+    def before_call(self) -> None:
+        """Waits while the circuit is open; raises CircuitOpenError after max_wait_s."""
+        with self._condition:
+            if self.state == "closed":
+                return
+            started = time.monotonic()
+            self.paused_calls += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self.state == "closed":
+                        return
+                    if self.state == "open" and now >= self.open_until:
+                        self.state = "half_open"
+                        print("Circuit breaker: sending one probe call")
+                        return
+                    if now - started >= self.max_wait_s:
+                        raise CircuitOpenError(
+                            f"API circuit breaker open; call abandoned after waiting {now - started:.0f}s"
+                        )
+                    wait = self.open_until - now if self.state == "open" else self.cooldown_s
+                    self._condition.wait(timeout=max(min(wait, self.max_wait_s - (now - started)), 0.01))
+            finally:
+                self.paused_s += time.monotonic() - started
+
+    def record(self, exc: Optional[Exception] = None) -> None:
+        failed = exc is not None and is_outage_error(exc)
+        with self._condition:
+            now = time.monotonic()
+            if self.state == "half_open":
+                if failed:
+                    self.current_cooldown_s = min(self.current_cooldown_s * 2, self.max_cooldown_s)
+                    self._open(now, "probe call failed")
+                else:
+                    self.state = "closed"
+                    self.current_cooldown_s = self.cooldown_s
+                    self.outcomes.clear()
+                    print("Circuit breaker: API recovered; resuming calls")
+                self._condition.notify_all()
+                return
+            if exc is not None and not failed:
+                return
+            self.outcomes.append((now, failed))
+            while self.outcomes and now - self.outcomes[0][0] > self.window_s:
+                self.outcomes.popleft()
+            failures = sum(1 for _, outcome in self.outcomes if outcome)
+            if (
+                self.state == "closed"
+                and len(self.outcomes) >= self.min_calls
+                and failures / len(self.outcomes) >= self.error_rate
+            ):
+                self._open(now, f"{failures} of the last {len(self.outcomes)} calls failed")
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = "open"
+        self.open_until = now + self.current_cooldown_s
+        self.trips += 1
+        self.outcomes.clear()
+        print(f"Circuit breaker open ({reason}); pausing API calls for {self.current_cooldown_s:.0f}s")
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "paused_calls": self.paused_calls,
+                "paused_s": round(self.paused_s, 1),
+            }
+
+
+class KeyState:
+    def __init__(self, index: int, key_id: str, client, rpm: int, weight: int, window_s: float = 60.0) -> None:
+        self.index = index
+        self.key_id = key_id
+        self.client = client
+        self.rpm = rpm
+        self.weight = weight
+        self.window_s = window_s
+        self.active_projects = 0
+        self.recent_calls: deque = deque()
+        self.throttled_until = 0.0
+        self.strikes = 0
+        self.consecutive_errors = 0
+        self.projects = 0
+        self.calls = 0
+        self.throttles = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        return now >= self.throttled_until
+
+    def stats(self) -> dict:
+        return {
+            "rpm": self.rpm,
+            "projects": self.projects,
+            "calls": self.calls,
+            "throttles": self.throttles,
+            "errors": self.errors,
+        }
+
+
+class ClientPool:
+    """
+    Spreads projects over several API keys. Each project leases one key for its whole life, so
+    its Files API upload stays with the key that created it. New projects go to the available key
+    with the fewest active projects per unit of quota; throttled or failing keys are drained (no
+    new projects) until their cooldown passes. Calls on a key with a requests-per-minute quota
+    wait locally for a free slot instead of running into 429s.
+    """
+
+    def __init__(
+        self,
+        api_keys: List[Tuple[str, int]],
+        client_factory: Callable,
+        cooldown_s: float = DEFAULT_KEY_COOLDOWN_S,
+        window_s: float = 60.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        if not api_keys:
+            raise ValueError("ClientPool needs at least one API key")
+        self.cooldown_s = cooldown_s
+        self.breaker = breaker or CircuitBreaker()
+        self._condition = threading.Condition()
+        # Keys without a configured quota are weighted like the largest configured one.
+        default_weight = max((rpm for _, rpm in api_keys), default=0) or 1
+        self.keys = [
+            KeyState(i, key_id(key), client_factory(key), rpm, rpm or default_weight, window_s)
+            for i, (key, rpm) in enumerate(api_keys)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _pick(self, prefer: str) -> Optional[KeyState]:
+        now = time.monotonic()
+        candidates = [state for state in self.keys if state.available(now)]
+        for state in candidates:
+            if state.key_id == prefer:
+                return state
+        if not candidates:
+            return None
+        return min(candidates, key=lambda s: ((s.active_projects + 1) / s.weight, s.index))
+
+    @contextmanager
+    def lease(self, prefer: str = ""):
+        """Yields a client bound to one key for the duration of a project. prefer names a key_id to reuse."""
+        with self._condition:
+            state = self._pick(prefer)
+            while state is None:
+                wait = min(s.throttled_until for s in self.keys) - time.monotonic()
+                self._condition.wait(timeout=max(wait, 0.01))
+                state = self._pick(prefer)
+            state.active_projects += 1
+            state.projects += 1
+        try:
+            yield PooledClient(self, state)
+        finally:
+            with self._condition:
+                state.active_projects -= 1
+                self._condition.notify_all()
+
+    def acquire_call_slot(self, state: KeyState) -> None:
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                window = state.window_s * (1 + RATE_WINDOW_MARGIN)
+                while state.recent_calls and now - state.recent_calls[0] >= window:
+                    state.recent_calls.popleft()
+                if state.available(now) and (not state.rpm or len(state.recent_calls) < state.rpm):
+                    state.recent_calls.append(now)
+                    state.calls += 1
+                    return
+                waits = [state.throttled_until - now] if not state.available(now) else []
+                if state.rpm and len(state.recent_calls) >= state.rpm:
+                    waits.append(state.recent_calls[0] + window - now)
+                self._condition.wait(timeout=max(min(waits), 0.01))
+
+    def record_result(self, state: KeyState, exc: Optional[Exception] = None) -> None:
+        with self._condition:
+            now = time.monotonic()
+            if exc is None:
+                state.strikes = 0
+                state.consecutive_errors = 0
+            elif is_throttle_error(exc):
+                state.throttles += 1
+                state.strikes += 1
+                cooldown = self.cooldown_s * min(2 ** (state.strikes - 1), MAX_COOLDOWN_FACTOR)
+                state.throttled_until = max(state.throttled_until, now + cooldown)
+                print(f"API key {state.key_id} throttled; draining for {cooldown:.1f}s")
+            else:
+                state.errors += 1
+                state.consecutive_errors += 1
+                if state.consecutive_errors >= UNHEALTHY_AFTER_ERRORS:
+                    state.throttled_until = max(state.throttled_until, now + self.cooldown_s)
+                    state.consecutive_errors = 0
+                    print(f"API key {state.key_id} failing repeatedly; draining for {self.cooldown_s:.1f}s")
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, dict]:
+        with self._condition:
+            return {state.key_id: state.stats() for state in self.keys}
+
+
+class _TrackedService:
+    """Wraps client.models / client.files so every call is rate limited and reported to the pool."""
+
+    def __init__(self, pool: ClientPool, state: KeyState, service, rate_limited: bool) -> None:
+        self._pool = pool
+        self._state = state
+        self._service = service
+        self._rate_limited = rate_limited
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._service, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            for attempt in range(MAX_THROTTLE_RETRIES + 1):
+                self._pool.breaker.before_call()
+                if self._rate_limited:
+                    self._pool.acquire_call_slot(self._state)
+                try:
+                    result = attr(*args, **kwargs)
+                except Exception as exc:
+                    self._pool.breaker.record(exc)
+                    self._pool.record_result(self._state, exc)
+                    if not is_throttle_error(exc) or attempt == MAX_THROTTLE_RETRIES:
+                        raise
+                    if not self._rate_limited:
+                        # acquire_call_slot already waits out the cooldown for rate-limited calls.
+                        time.sleep(max(self._state.throttled_until - time.monotonic(), 0))
+                    continue
+                self._pool.breaker.record()
+                self._pool.record_result(self._state)
+                return result
+
+        return call
+
+
+class PooledClient:
+    def __init__(self, pool: ClientPool, state: KeyState) -> None:
+        self.key_id = state.key_id
+        self.models = _TrackedService(pool, state, state.client.models, rate_limited=True)
+        self.files = _TrackedService(pool, state, state.client.files, rate_limited=False)
+        self._client = state.client
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+# -----------------------------
+# Shared HTTP Transport
+# -----------------------------
+# Every Gemini client in the process sends through one httpx connection pool, so connections and
+# their TLS sessions are reused across keys, stages and worker threads instead of being opened per
+# client. The API key travels in each request's headers, so one pool serves every key.
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+HTTP_KEEPALIVE_EXPIRY_S = 120.0
+HTTP_CONNECT_TIMEOUT_S = 15.0
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install "httpx[http2]")."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class TransportStats:
+    """Counts requests, new connections and TLS handshakes through httpcore's trace extension."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self.http_versions: Dict[str, int] = {}
+
+    def on_request(self, request) -> None:
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self.trace
+
+    def on_response(self, response) -> None:
+        with self._lock:
+            self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+
+    def trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused_requests": reused,
+                "reuse_rate": round(reused / self.requests, 3) if self.requests else 0.0,
+                "http_versions": dict(self.http_versions),
+            }
+
+
+TRANSPORT_STATS = TransportStats()
+_transport_lock = threading.Lock()
+_http_client = None
+_genai_clients: Dict[str, object] = {}
+
+
+def shared_http_client():
+    """The process-wide httpx client: keep-alive, sized limits, and HTTP/2 when h2 is installed."""
+    global _http_client
+    with _transport_lock:
+        if _http_client is None:
+            import httpx
+
+            _http_client = httpx.Client(
+                http2=http2_available(),
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+                ),
+                timeout=httpx.Timeout(None, connect=HTTP_CONNECT_TIMEOUT_S),
+                event_hooks={"request": [TRANSPORT_STATS.on_request], "response": [TRANSPORT_STATS.on_response]},
+            )
+        return _http_client
+
+
+def create_genai_client(api_key: str):
+    """One google-genai client per key, all sending through the shared HTTP transport."""
+    with _transport_lock:
+        client = _genai_clients.get(api_key)
+    if client is None:
+        from google import genai
+        from google.genai import types
+
+        client = genai.Client(api_key=api_key, http_options=types.HttpOptions(httpx_client=shared_http_client()))
+        with _transport_lock:
+            client = _genai_clients.setdefault(api_key, client)
+    return client
+
+
+def transport_stats() -> dict:
+    return {"http2": http2_available(), **TRANSPORT_STATS.stats()}
+
+
+if __name__ == "__main__":
+    # Simulated award-season run: each fake key allows QUOTA calls per (shortened) one-second window
+    # and raises 429 beyond it. Throughput should scale roughly linearly with the number of keys.
+    from concurrent.futures import ThreadPoolExecutor
+
+    QUOTA, WINDOW_S, LATENCY_S = 40, 1.0, 0.02
+    PROJECTS, CALLS_PER_PROJECT, WORKERS = 60, 4, 16
+
+    class _Throttled(Exception):
+        code = 429
+
+    class _FakeModels:
+        def __init__(self) -> None:
+            self.lock = threading.Lock()
+            self.calls: deque = deque()
+
+        def generate_content(self, **kwargs):
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= WINDOW_S:
+                    self.calls.popleft()
+                if len(self.calls) >= QUOTA:
+                    raise _Throttled("429 RESOURCE_EXHAUSTED")
+                self.calls.append(now)
+            time.sleep(LATENCY_S)
+            return "ok"
+
+    class _FakeClient:
+        def __init__(self, api_key: str) -> None:
+            self.models = _FakeModels()
+            self.files = None
+
+    def run_project(pool: ClientPool) -> None:
+        with pool.lease() as client:
+            for _ in range(CALLS_PER_PROJECT):
+                client.models.generate_content(model="fake", contents=[])
+
+    # With quotas configured the pool paces calls itself; without them it learns from 429s and drains keys.
+    for configured in (True, False):
+        print("Quotas configured:" if configured else "Quotas unknown (throttle-driven draining):")
+        baseline = None
+        for key_count in (1, 2, 4):
+            rpm = QUOTA if configured else 0
+            pool = ClientPool(
+                [(f"key-{i}", rpm) for i in range(key_count)], _FakeClient, cooldown_s=WINDOW_S / 4, window_s=WINDOW_S
+            )
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+                list(executor.map(lambda _: run_project(pool), range(PROJECTS)))
+            elapsed = time.monotonic() - started
+            throughput = PROJECTS * CALLS_PER_PROJECT / elapsed
+            baseline = baseline or throughput
+            throttles = sum(s["throttles"] for s in pool.stats().values())
+            print(
+                f"  {key_count} key(s): {throughput:6.1f} calls/s ({throughput / baseline:.1f}x), "
+                f"{elapsed:.1f}s, {throttles} throttles, projects per key "
+                f"{[s['projects'] for s in pool.stats().values()]}"
+            )
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from qix_documents import extract_page_texts, file_sha256
+
+
+# -----------------------------
+# Fingerprinting & Duplicate Detection
+# -----------------------------
+# A deck and its PowerPoint-exported PDF typically score ~0.75 on 3-word shingles,
+# unrelated submissions stay below ~0.1.
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 64
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = 0.5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutation_params(count: int) -> List[Tuple[int, int]]:
+    # Derived from a fixed seed so signatures are comparable across runs and machines.
+    params = []
+    for i in range(count):
+        seed = hashlib.blake2b(f"qix-minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(seed[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(seed[8:], "big") % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMUTATIONS = _permutation_params(NUM_PERMUTATIONS)
+
+
+def normalize_text(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def shingle_hashes(words: List[str], size: int = SHINGLE_SIZE) -> set:
+    if len(words) < size:
+        return {_hash32(" ".join(words))} if words else set()
+    return {_hash32(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def _hash32(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=4).digest(), "big")
+
+
+def minhash_signature(shingles: set) -> List[int]:
+    if not shingles:
+        return []
+    return [
+        min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class Fingerprint:
+    def __init__(self, path: str, content_hash: str, signature: List[int]) -> None:
+        self.path = path
+        self.content_hash = content_hash
+        self.signature = signature
+
+
+def fingerprint_file(path: str, known: Optional[Dict[str, Fingerprint]] = None) -> Fingerprint:
+    """Hashes the file and computes its MinHash signature, reusing a known signature for identical bytes."""
+    content_hash = file_sha256(path)
+    for other in (known or {}).values():
+        if other.content_hash == content_hash:
+            return Fingerprint(path, content_hash, other.signature)
+
+    words = normalize_text(" ".join(extract_page_texts(path)))
+    return Fingerprint(path, content_hash, minhash_signature(shingle_hashes(words)))
+
+
+class DuplicateMatch:
+    def __init__(self, path: str, canonical_path: str, match_type: str, similarity: float) -> None:
+        self.path = path
+        self.canonical_path = canonical_path
+        self.match_type = match_type  # "canonical", "exact" or "near"
+        self.similarity = similarity
+
+
+def find_duplicate_clusters(
+    paths: List[str],
+    threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD,
+    fingerprints: Optional[Dict[str, Fingerprint]] = None,
+) -> List[List[DuplicateMatch]]:
+    """
+    Groups files that are exact (same bytes) or near (MinHash similarity >= threshold) duplicates.
+    The first path of each cluster, in the order given, is its canonical member.
+    Only clusters with two or more members are returned.
+    """
+    fingerprints = fingerprints if fingerprints is not None else {}
+    for path in paths:
+        if path not in fingerprints:
+            fingerprints[path] = fingerprint_file(path, fingerprints)
+
+    parent = {path: path for path in paths}
+    order = {path: i for i, path in enumerate(paths)}
+
+    def find(path: str) -> str:
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    def union(a: str, b: str) -> None:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            if order[root_b] < order[root_a]:
+                root_a, root_b = root_b, root_a
+            parent[root_b] = root_a
+
+    by_hash: Dict[str, str] = {}
+    for path in paths:
+        content_hash = fingerprints[path].content_hash
+        if content_hash in by_hash:
+            union(by_hash[content_hash], path)
+        else:
+            by_hash[content_hash] = path
+
+    # Locality-sensitive hashing: only files sharing a band bucket are compared.
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets: Dict[Tuple[int, tuple], List[str]] = {}
+    for path in paths:
+        signature = fingerprints[path].signature
+        if not signature:
+            continue
+        for band in range(LSH_BANDS):
+            key = (band, tuple(signature[band * rows:(band + 1) * rows]))
+            buckets.setdefault(key, []).append(path)
+
+    compared = set()
+    for members in buckets.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                if (a, b) in compared or find(a) == find(b):
+                    continue
+                compared.add((a, b))
+                if estimate_similarity(fingerprints[a].signature, fingerprints[b].signature) >= threshold:
+                    union(a, b)
+
+    groups: Dict[str, List[str]] = {}
+    for path in paths:
+        groups.setdefault(find(path), []).append(path)
+
+    clusters = []
+    for root, members in groups.items():
+        if len(members) < 2:
+            continue
+        cluster = [DuplicateMatch(root, root, "canonical", 1.0)]
+        for path in members:
+            if path == root:
+                continue
+            if fingerprints[path].content_hash == fingerprints[root].content_hash:
+                cluster.append(DuplicateMatch(path, root, "exact", 1.0))
+            else:
+                similarity = estimate_similarity(fingerprints[path].signature, fingerprints[root].signature)
+                cluster.append(DuplicateMatch(path, root, "near", similarity))
+        clusters.append(cluster)
+
+    clusters.sort(key=lambda cluster: order[cluster[0].path])
+    return clusters
+
+
+if __name__ == "__main__":
+    folders = sys.argv[1:] or ["./project", "./project_test", "./project_pptx", "./project_pptx_2"]
+    files = [
+        os.path.join(folder, name)
+        for folder in folders
+        if os.path.isdir(folder)
+        for name in sorted(os.listdir(folder))
+        if name.lower().endswith((".pdf", ".pptx"))
+    ]
+
+    print(f"Fingerprinting {len(files)} files...")
+    for cluster_id, cluster in enumerate(find_duplicate_clusters(files), start=1):
+        print(f"\nCluster {cluster_id}:")
+        for match in cluster:
+            print(f"  [{match.match_type} {match.similarity:.2f}] {match.path}")
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import List
+
+
+# -----------------------------
+# Local Document Reading
+# -----------------------------
+# Everything here runs offline so that fingerprinting and other local stages
+# never need an API call. PDF text needs the optional `pypdf` package.
+
+DRAWINGML_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _slide_number(name: str) -> int:
+    match = re.search(r"slide(\d+)\.xml$", name)
+    return int(match.group(1)) if match else 0
+
+
+def extract_pptx_page_texts(pptx_path: str) -> List[str]:
+    with zipfile.ZipFile(pptx_path) as package:
+        slide_names = sorted(
+            (n for n in package.namelist() if re.match(r"ppt/slides/slide\d+\.xml$", n)),
+            key=_slide_number,
+        )
+        pages = []
+        for name in slide_names:
+            root = ET.fromstring(package.read(name))
+            pages.append(" ".join(node.text for node in root.iter(f"{DRAWINGML_NS}t") if node.text))
+    return pages
+
+
+def extract_pdf_page_texts(pdf_path: str) -> List[str]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def extract_page_texts(path: str) -> List[str]:
+    """Returns the text of each page (PDF) or slide (PPTX), or [] if it cannot be read locally."""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == ".pptx":
+            return extract_pptx_page_texts(path)
+        if extension == ".pdf":
+            return extract_pdf_page_texts(path)
+    except ImportError:
+        print("pypdf is not installed; local PDF text extraction is unavailable.")
+    except Exception as exc:
+        print(f"Could not read text from {os.path.basename(path)}: {exc}")
+    return []
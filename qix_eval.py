@@ -0,0 +1,390 @@
+import csv
+import json
+import os
+import shlex
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from qix_budget import MODEL_PRICES_PER_MILLION
+from qix_rubric import RUBRIC, find_category
+from qix_store import ResultsStore
+
+
+# -----------------------------
+# Gold-Graded Set
+# -----------------------------
+LEVEL4_LABEL = "LEVEL 4"
+
+
+class GoldProject:
+    """The human final grading of one submission: a score per rubric category, or a Level 4 ruling."""
+
+    def __init__(self, project_id: str, scores: Dict[str, float], level4: bool = False) -> None:
+        self.project_id = project_id
+        self.scores = scores
+        self.level4 = level4
+
+    @property
+    def total(self) -> float:
+        return sum(self.scores.values())
+
+    @property
+    def label(self) -> str:
+        from nuh_qix_pipeline import score_to_label
+
+        return LEVEL4_LABEL if self.level4 else score_to_label(self.total)
+
+
+def _project_key(name: str) -> str:
+    from nuh_qix_pipeline import sanitize_filename
+
+    base, extension = os.path.splitext(str(name))
+    return sanitize_filename(base if extension.lower() in (".pdf", ".pptx") else str(name))
+
+
+def _category_label(name: str) -> str:
+    category = find_category(str(name))
+    return category.label if category is not None else str(name)
+
+
+def load_gold_json(path: str) -> Dict[str, GoldProject]:
+    """
+    {"<project id or file name>": {"level4": false, "scores": {"1. Header": 5, ...}}, ...}.
+    A Level 4 project needs no scores.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    gold = {}
+    for name, entry in data.items():
+        project_id = _project_key(name)
+        scores = {_category_label(category): float(score) for category, score in (entry.get("scores") or {}).items()}
+        gold[project_id] = GoldProject(project_id, scores, bool(entry.get("level4")))
+    return gold
+
+
+def load_gold_workbook(path: str) -> Dict[str, GoldProject]:
+    """
+    A finalised assessment_results.xlsx: each category's Final Score (the Human Score where the
+    judges gave one) and every project whose Final Label is LEVEL 4.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        def sheet_rows(name: str, required: Tuple[str, ...]):
+            rows = wb[name].iter_rows(values_only=True)
+            header = {str(value).strip(): i for i, value in enumerate(next(rows, None) or ()) if value is not None}
+            missing = [column for column in required if column not in header]
+            if missing:
+                raise ValueError(f"{name} is missing columns: {', '.join(missing)}")
+            return header, rows
+
+        gold: Dict[str, GoldProject] = {}
+        columns, rows = sheet_rows("Summary", ("Project ID", "Status", "Final Label"))
+        for row in rows:
+            project_id = row[columns["Project ID"]]
+            if project_id is None or row[columns["Status"]] == "duplicate":
+                continue
+            if row[columns["Final Label"]] == LEVEL4_LABEL:
+                gold[str(project_id)] = GoldProject(str(project_id), {}, level4=True)
+
+        columns, rows = sheet_rows("Grading_Details", ("Project ID", "Category", "AI Score", "Human Score"))
+        for row in rows:
+            project_id = row[columns["Project ID"]]
+            if project_id is None or str(project_id) in gold and gold[str(project_id)].level4:
+                continue
+            # Final Score is a formula; older workbooks without cached values fall back to Human, then AI Score.
+            score = row[columns["Final Score"]] if "Final Score" in columns else None
+            for fallback in ("Human Score", "AI Score"):
+                if score in (None, ""):
+                    score = row[columns[fallback]]
+            if score in (None, ""):
+                continue
+            project = gold.setdefault(str(project_id), GoldProject(str(project_id), {}))
+            project.scores[_category_label(row[columns["Category"]])] = float(score)
+        return gold
+    finally:
+        wb.close()
+
+
+def load_gold(path: str) -> Dict[str, GoldProject]:
+    if path.lower().endswith(".json"):
+        return load_gold_json(path)
+    return load_gold_workbook(path)
+
+
+# -----------------------------
+# Scoring a Run Against the Gold Set
+# -----------------------------
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def evaluate_run(store: ResultsStore, run_id: int, gold: Dict[str, GoldProject]) -> dict:
+    """Accuracy against the gold set and latency, tokens and cost per project for one run."""
+    from nuh_qix_pipeline import score_to_label
+
+    conn = store.connection()
+    projects = {
+        row["project_id"]: dict(row)
+        for row in conn.execute("SELECT * FROM projects WHERE run_id = ? AND status != 'duplicate'", (run_id,))
+    }
+    scores: Dict[str, Dict[str, float]] = {}
+    for (project_id, category), row in store.get_category_scores(run_id).items():
+        scores.setdefault(project_id, {})[category] = row["ai_score"]
+
+    evaluated = [project_id for project_id in gold if project_id in projects]
+    category_errors: Dict[str, List[float]] = {category.label: [] for category in RUBRIC}
+    total_errors: List[float] = []
+    agreements: List[bool] = []
+    true_positive = false_positive = false_negative = failed = 0
+    for project_id in evaluated:
+        expected, project = gold[project_id], projects[project_id]
+        predicted_level4 = project["status"] == "level4_ineligible"
+        if project["status"] not in ("graded", "level4_ineligible"):
+            failed += 1
+            continue
+        true_positive += predicted_level4 and expected.level4
+        false_positive += predicted_level4 and not expected.level4
+        false_negative += expected.level4 and not predicted_level4
+        predicted = scores.get(project_id, {})
+        agreements.append(
+            (LEVEL4_LABEL if predicted_level4 else score_to_label(sum(predicted.values()))) == expected.label
+        )
+        if expected.level4 or predicted_level4:
+            continue
+        for category, gold_score in expected.scores.items():
+            if category in predicted:
+                category_errors.setdefault(category, []).append(abs(predicted[category] - gold_score))
+        if set(expected.scores) <= set(predicted):
+            total_errors.append(abs(sum(predicted.values()) - expected.total))
+
+    usage = conn.execute(
+        "SELECT project_id, model, SUM(prompt_tokens) AS prompt_tokens, SUM(output_tokens) AS output_tokens, "
+        "SUM(latency_ms) AS latency_ms FROM token_usage WHERE run_id = ? GROUP BY project_id, model",
+        (run_id,),
+    ).fetchall()
+    cost = tokens = model_ms = 0.0
+    unpriced = set()
+    for row in usage:
+        if row["project_id"] not in evaluated:
+            continue
+        prompt_tokens, output_tokens = row["prompt_tokens"] or 0, row["output_tokens"] or 0
+        tokens += prompt_tokens + output_tokens
+        model_ms += row["latency_ms"] or 0
+        if row["model"] not in MODEL_PRICES_PER_MILLION:
+            unpriced.add(row["model"])
+            continue
+        input_price, output_price = MODEL_PRICES_PER_MILLION[row["model"]]
+        cost += (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    metrics_row = conn.execute("SELECT metrics_json FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    project_seconds = json.loads((metrics_row["metrics_json"] if metrics_row else None) or "{}").get(
+        "project_seconds", {}
+    )
+    seconds = [project_seconds[project_id] for project_id in evaluated if project_id in project_seconds]
+    count = len(evaluated) or 1
+    return {
+        "projects": len(evaluated),
+        "missing": sorted(set(gold) - set(projects)),
+        "failed": failed,
+        "category_mae": {category: _mean(errors) for category, errors in category_errors.items()},
+        "total_mae": _mean(total_errors),
+        "label_agreement": _mean([float(agreed) for agreed in agreements]),
+        "level4_precision": true_positive / (true_positive + false_positive) if true_positive + false_positive else None,
+        "level4_recall": true_positive / (true_positive + false_negative) if true_positive + false_negative else None,
+        # Wall time per project when the run recorded it, otherwise time spent in model calls.
+        "seconds_per_project": _mean(seconds) if seconds else model_ms / 1000 / count,
+        "tokens_per_project": tokens / count,
+        "cost_per_project": cost / count,
+        "unpriced_models": sorted(unpriced),
+    }
+
+
+def pareto_front(results: Dict[str, dict]) -> List[str]:
+    """Configurations that no other one beats on both cost and total-score error."""
+    scored = {name: result for name, result in results.items() if result["total_mae"] is not None}
+
+    def dominates(a: dict, b: dict) -> bool:
+        return (
+            a["cost_per_project"] <= b["cost_per_project"]
+            and a["total_mae"] <= b["total_mae"]
+            and (a["cost_per_project"] < b["cost_per_project"] or a["total_mae"] < b["total_mae"])
+        )
+
+    return [
+        name
+        for name, result in scored.items()
+        if not any(dominates(other, result) for other_name, other in scored.items() if other_name != name)
+    ]
+
+
+# -----------------------------
+# Running Configurations
+# -----------------------------
+def parse_configuration(value: str) -> Tuple[str, List[str]]:
+    """Parses 'NAME=--grading_tier lite --escalation_tier flash' into a name and pipeline arguments."""
+    name, _, arguments = value.partition("=")
+    if not name.strip():
+        raise ValueError(f"--config expects NAME=PIPELINE ARGS, got {value!r}")
+    return name.strip(), shlex.split(arguments)
+
+
+def parse_existing_run(value: str) -> Tuple[str, str, Optional[int]]:
+    """Parses 'NAME=path/to/store.db[:RUN_ID]'; without a run id the latest run is used."""
+    name, _, db_path = value.partition("=")
+    run_id = None
+    head, _, tail = db_path.rpartition(":")
+    if head and tail.isdigit():
+        db_path, run_id = head, int(tail)
+    if not name.strip() or not db_path:
+        raise ValueError(f"--run expects NAME=STORE.db[:RUN_ID], got {value!r}")
+    return name.strip(), db_path, run_id
+
+
+def _finished_run(store: ResultsStore) -> Optional[int]:
+    row = store.connection().execute(
+        "SELECT run_id FROM runs WHERE finished_at IS NOT NULL ORDER BY run_id DESC LIMIT 1"
+    ).fetchone()
+    return row["run_id"] if row else None
+
+
+def run_configuration(name: str, arguments: List[str], pdf_dir: str, out_dir: str, rerun: bool = False) -> Tuple[str, int]:
+    """
+    Runs the pipeline over the gold set with one configuration, in its own store, extraction folder
+    and report under out_dir. A configuration that already finished there is reused unless rerun.
+    """
+    import nuh_qix_pipeline
+
+    db_path = os.path.join(out_dir, f"{name}.db")
+    if not rerun and os.path.exists(db_path):
+        run_id = _finished_run(ResultsStore(db_path))
+        if run_id is not None:
+            print(f"[{name}] Reusing finished run {run_id} in {db_path}")
+            return db_path, run_id
+    print(f"[{name}] Running the pipeline with: {' '.join(arguments) or '(defaults)'}")
+    nuh_qix_pipeline.main(
+        ["--pdf_dir", pdf_dir, "--pptx_dir", pdf_dir, "--skip_pptx"]
+        + arguments
+        + [
+            "--db", db_path,
+            "--extract_dir", os.path.join(out_dir, f"{name}_extracted"),
+            "--output_excel", os.path.join(out_dir, f"{name}.xlsx"),
+        ]
+    )
+    run_id = _finished_run(ResultsStore(db_path))
+    if run_id is None:
+        raise RuntimeError(f"[{name}] The pipeline did not finish a run; see the output above")
+    return db_path, run_id
+
+
+# -----------------------------
+# Pareto Table
+# -----------------------------
+def _format(value, pattern: str) -> str:
+    return "-" if value is None else format(value, pattern)
+
+
+def pareto_rows(results: Dict[str, dict]) -> List[dict]:
+    """One row per configuration, cheapest first, with its accuracy, cost and Pareto membership."""
+    front = set(pareto_front(results))
+    rows = []
+    for name, result in sorted(results.items(), key=lambda item: item[1]["cost_per_project"]):
+        row = {
+            "configuration": name,
+            "pareto": name in front,
+            "projects": result["projects"],
+            "failed": result["failed"],
+            "total_mae": result["total_mae"],
+            "label_agreement": result["label_agreement"],
+            "level4_precision": result["level4_precision"],
+            "level4_recall": result["level4_recall"],
+            "seconds_per_project": result["seconds_per_project"],
+            "tokens_per_project": result["tokens_per_project"],
+            "cost_per_project": result["cost_per_project"],
+        }
+        row.update({f"mae {label}": result["category_mae"].get(label) for label in (c.label for c in RUBRIC)})
+        rows.append(row)
+    return rows
+
+
+def print_pareto_table(rows: List[dict]) -> None:
+    print(
+        f"{'':2}{'Configuration':24}{'Cost/proj':>11}{'Tokens/proj':>13}{'Secs/proj':>11}"
+        f"{'Total MAE':>11}{'Label agr.':>12}{'L4 prec.':>10}{'L4 recall':>11}{'Failed':>8}"
+    )
+    for row in rows:
+        print(
+            f"{'*' if row['pareto'] else ' ':2}{row['configuration'][:23]:24}"
+            f"{'$' + _format(row['cost_per_project'], '.4f'):>11}{_format(row['tokens_per_project'], ',.0f'):>13}"
+            f"{_format(row['seconds_per_project'], '.1f'):>11}{_format(row['total_mae'], '.2f'):>11}"
+            f"{_format(row['label_agreement'], '.0%'):>12}{_format(row['level4_precision'], '.0%'):>10}"
+            f"{_format(row['level4_recall'], '.0%'):>11}{row['failed']:>8}"
+        )
+    print("* on the Pareto front: no other configuration is both cheaper and closer to the human scores.")
+    labels = [c.label for c in RUBRIC]
+    print("\nMean absolute error per category:")
+    print(f"{'':2}{'Configuration':24}" + "".join(f"{label.split('.')[0] + '.':>7}" for label in labels))
+    for row in rows:
+        print(f"{'':2}{row['configuration'][:23]:24}" + "".join(f"{_format(row[f'mae {label}'], '.1f'):>7}" for label in labels))
+
+
+def write_pareto_csv(rows: List[dict], path: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def evaluate_configurations(
+    gold_path: str,
+    pdf_dir: str,
+    out_dir: str,
+    configurations: List[Tuple[str, List[str]]],
+    existing_runs: Optional[List[Tuple[str, str, Optional[int]]]] = None,
+    rerun: bool = False,
+) -> List[dict]:
+    """Runs or loads every configuration, scores it against the gold set and writes the Pareto table."""
+    gold = load_gold(gold_path)
+    print(f"Gold set: {len(gold)} projects ({sum(p.level4 for p in gold.values())} Level 4) from {gold_path}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    results: Dict[str, dict] = {}
+    for name, db_path, run_id in existing_runs or []:
+        store = ResultsStore(db_path)
+        results[name] = evaluate_run(store, run_id if run_id is not None else store.latest_run_id(), gold)
+    for name, arguments in configurations:
+        db_path, run_id = run_configuration(name, arguments, pdf_dir, out_dir, rerun=rerun)
+        results[name] = evaluate_run(ResultsStore(db_path), run_id, gold)
+
+    for name, result in results.items():
+        if result["missing"]:
+            print(f"[{name}] {len(result['missing'])} gold projects were not in the run: {', '.join(result['missing'][:5])}")
+        if result["unpriced_models"]:
+            print(f"[{name}] No price for {', '.join(result['unpriced_models'])}; their calls are costed at $0")
+
+    rows = pareto_rows(results)
+    if not rows:
+        print("No configurations to compare; pass --config or --run")
+        return rows
+    print()
+    print_pareto_table(rows)
+    csv_path = os.path.join(out_dir, "pareto.csv")
+    write_pareto_csv(rows, csv_path)
+    with open(os.path.join(out_dir, "pareto.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nPareto table saved to: {csv_path}")
+    return rows
+
+
+if __name__ == "__main__":
+    # Example: python qix_eval.py gold.xlsx baseline=qix_results.db cheap=cheap.db:3
+    gold_set = load_gold(sys.argv[1])
+    scored_runs = {}
+    for spec in sys.argv[2:]:
+        run_name, store_path, spec_run_id = parse_existing_run(spec)
+        run_store = ResultsStore(store_path)
+        scored_runs[run_name] = evaluate_run(
+            run_store, spec_run_id if spec_run_id is not None else run_store.latest_run_id(), gold_set
+        )
+    print_pareto_table(pareto_rows(scored_runs))
@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+from qix_documents import file_sha256
+from qix_rubric import find_category
+from qix_store import DEFAULT_DB_PATH, ResultsStore
+
+
+# -----------------------------
+# Judge Workbook Ingest
+# -----------------------------
+# write_excel stamps the run id into the workbook properties so edited copies can be matched back.
+RUN_ID_PREFIX = "qix-run:"
+GRADING_SHEET = "Grading_Details"
+
+
+def workbook_run_id(properties) -> Optional[int]:
+    match = re.fullmatch(rf"{re.escape(RUN_ID_PREFIX)}(\d+)", str(getattr(properties, "identifier", "") or ""))
+    return int(match.group(1)) if match else None
+
+
+def _category_key(label: str) -> str:
+    category = find_category(label)
+    return category.label if category is not None else str(label)
+
+
+def _as_number(value) -> Optional[float]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number
+
+
+def ingest_workbook(store: ResultsStore, path: str, run_id: Optional[int] = None) -> dict:
+    """
+    Streams the Grading_Details sheet of a judge-edited report in read-only mode, so memory stays
+    constant however large the workbook is, and merges every Human Score into the store.
+    Each override is checked against the stored AI score; conflicts are recorded and reported
+    rather than blocking the ingest. A workbook whose bytes were already ingested is skipped.
+    """
+    from openpyxl import load_workbook
+
+    workbook_hash = file_sha256(path)
+    previous = store.get_ingested_workbook(workbook_hash)
+    if previous:
+        print(
+            f"{os.path.basename(path)} was already ingested on {previous['ingested_at']} "
+            f"(run {previous['run_id']}); nothing to do."
+        )
+        return {"skipped": True, "overrides": 0, "conflicts": []}
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        run_id = run_id if run_id is not None else workbook_run_id(wb.properties)
+        run_id = run_id if run_id is not None else store.latest_run_id()
+        if run_id is None:
+            raise ValueError("Could not tell which run the workbook belongs to; pass --run_id")
+        if GRADING_SHEET not in wb.sheetnames:
+            raise ValueError(f"{path} has no {GRADING_SHEET} sheet")
+
+        stored_scores = {
+            (project_id, _category_key(category)): score
+            for (project_id, category), score in store.get_category_scores(run_id).items()
+        }
+        existing = {
+            (project_id, _category_key(category)): override
+            for (project_id, category), override in store.get_human_overrides(run_id).items()
+        }
+
+        rows = wb[GRADING_SHEET].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        columns: Dict[str, int] = {str(name).strip(): i for i, name in enumerate(header) if name is not None}
+        missing = [name for name in ("Project ID", "Category", "AI Score", "Human Score") if name not in columns]
+        if missing:
+            raise ValueError(f"{GRADING_SHEET} is missing columns: {', '.join(missing)}")
+
+        overrides: List[dict] = []
+        conflicts: List[str] = []
+        scanned = 0
+        for row in rows:
+            scanned += 1
+            human_score = _as_number(row[columns["Human Score"]])
+            if human_score is None:
+                continue
+            project_id = row[columns["Project ID"]]
+            category = _category_key(row[columns["Category"]])
+            stored = stored_scores.get((project_id, category))
+            if stored is None:
+                conflicts.append(f"{project_id} / {category}: not graded in run {run_id}; override skipped")
+                continue
+            if not 0 <= human_score <= (stored["max_score"] or 0):
+                conflicts.append(
+                    f"{project_id} / {category}: Human Score {human_score:g} is outside 0-{stored['max_score']}; "
+                    "override skipped"
+                )
+                continue
+
+            notes = []
+            sheet_ai_score = _as_number(row[columns["AI Score"]])
+            if sheet_ai_score is not None and sheet_ai_score != stored["ai_score"]:
+                notes.append(f"workbook AI score {sheet_ai_score:g} differs from stored {stored['ai_score']}")
+            earlier = existing.get((project_id, category))
+            if earlier and earlier["human_score"] != human_score:
+                notes.append(f"replaces earlier override {earlier['human_score']:g}")
+            elif earlier:
+                continue
+
+            conflict = "; ".join(notes)
+            if conflict:
+                conflicts.append(f"{project_id} / {category}: {conflict}")
+            overrides.append(
+                {
+                    "project_id": project_id,
+                    "category": stored["category"],
+                    "human_score": human_score,
+                    "ai_score": stored["ai_score"],
+                    "conflict": conflict,
+                }
+            )
+    finally:
+        wb.close()
+
+    store.save_human_overrides(run_id, workbook_hash, os.path.abspath(path), overrides, len(conflicts))
+    print(
+        f"Ingested {os.path.basename(path)} into run {run_id}: {scanned} rows scanned, "
+        f"{len(overrides)} new or changed overrides"
+    )
+    for conflict in conflicts:
+        print(f"  ⚠️ {conflict}")
+    return {"skipped": False, "run_id": run_id, "overrides": len(overrides), "conflicts": conflicts}
+
+
+if __name__ == "__main__":
+    # Example: python qix_ingest.py assessment_results.xlsx
+    ingest_store = ResultsStore(os.environ.get("QIX_DB", DEFAULT_DB_PATH))
+    for workbook_path in sys.argv[1:] or ["./assessment_results.xlsx"]:
+        ingest_workbook(ingest_store, workbook_path)
@@ -0,0 +1,138 @@
+import os
+import sys
+from typing import Dict, List, Tuple
+
+from qix_quotes import QuoteIndex
+from qix_scheduler import MB, JobEstimate, estimate_job
+
+
+# -----------------------------
+# Packed Extraction Planning
+# -----------------------------
+# Short FormSG printouts cost little more than the fixed extraction instruction and request overhead,
+# so several of them share one extraction call. A pack is bounded by the pages the model must read,
+# the tokens those pages cost, and the size of the inline request.
+PDF_PAGE_TOKENS = 258  # Gemini bills each PDF page as one 258-token image
+PACK_MAX_PROJECT_PAGES = 15
+PACK_MAX_PAGES = 40
+PACK_MAX_TOKENS = 12000
+PACK_MAX_PROJECTS = 4
+PACK_MAX_REQUEST_BYTES = 16 * MB  # inline requests are limited to 20 MB
+DOCUMENT_LABEL_TOKENS = 12
+
+
+def document_id(index: int) -> str:
+    return f"DOC-{index}"
+
+
+def job_tokens(job: JobEstimate) -> int:
+    return job.pages * PDF_PAGE_TOKENS + DOCUMENT_LABEL_TOKENS
+
+
+def packable(
+    job: JobEstimate, max_project_pages: int = PACK_MAX_PROJECT_PAGES, max_bytes: int = PACK_MAX_REQUEST_BYTES
+) -> bool:
+    # Decks read natively are sent as text on their own; only PDFs are packed.
+    return job.path.lower().endswith(".pdf") and job.pages <= max_project_pages and job.size_bytes <= max_bytes
+
+
+def plan_packs(
+    jobs: List[JobEstimate],
+    max_pages: int = PACK_MAX_PAGES,
+    max_tokens: int = PACK_MAX_TOKENS,
+    max_projects: int = PACK_MAX_PROJECTS,
+    max_bytes: int = PACK_MAX_REQUEST_BYTES,
+) -> Tuple[List[List[JobEstimate]], List[JobEstimate]]:
+    """
+    Groups small submissions, in the order given, into packs within every budget. Returns the
+    packs of two or more and the jobs left to extract on their own.
+    """
+    packs: List[List[JobEstimate]] = []
+    solo: List[JobEstimate] = []
+    current: List[JobEstimate] = []
+
+    def close() -> None:
+        if len(current) > 1:
+            packs.append(list(current))
+        else:
+            solo.extend(current)
+        current.clear()
+
+    for job in jobs:
+        if not packable(job, max_bytes=max_bytes):
+            solo.append(job)
+            continue
+        fits = (
+            len(current) < max_projects
+            and sum(j.pages for j in current) + job.pages <= max_pages
+            and sum(job_tokens(j) for j in current) + job_tokens(job) <= max_tokens
+            and sum(j.size_bytes for j in current) + job.size_bytes <= max_bytes
+        )
+        if not fits:
+            close()
+        current.append(job)
+    close()
+    return packs, solo
+
+
+# -----------------------------
+# Packed Result Validation
+# -----------------------------
+REQUIRED_FIELDS = ("project_title", "department", "category", "problem_statement", "key_results")
+
+
+def validate_packed(
+    items: List[dict], page_texts: Dict[str, List[str]]
+) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """
+    Splits a packed response into the extractions that can be trusted and a problem for every other
+    document ID of the pack (page_texts keys). An extraction is rejected when its ID is unknown or
+    repeated, a required field is empty, or its title is found in another document of the pack
+    but not in its own, which means the model mixed the documents up.
+    """
+    indexes = {doc_id: QuoteIndex(texts) for doc_id, texts in page_texts.items() if any(texts)}
+    accepted: Dict[str, dict] = {}
+    problems: Dict[str, str] = {}
+    seen = set()
+    for item in items:
+        doc_id = str(item.get("document_id", "")).strip()
+        if doc_id not in page_texts:
+            continue
+        if doc_id in seen:
+            problems[doc_id] = "returned more than once"
+            accepted.pop(doc_id, None)
+            continue
+        seen.add(doc_id)
+        empty = [field for field in REQUIRED_FIELDS if not str(item.get(field) or "").strip()]
+        if empty:
+            problems[doc_id] = f"empty {', '.join(empty)}"
+            continue
+        title = str(item["project_title"])
+        own = indexes.get(doc_id)
+        if own is not None and own.check(title).status == "unverified":
+            elsewhere = [
+                other for other, index in indexes.items()
+                if other != doc_id and index.check(title).status in ("verified", "paraphrased")
+            ]
+            if elsewhere:
+                problems[doc_id] = f"title belongs to {elsewhere[0]}"
+                continue
+        accepted[doc_id] = {key: value for key, value in item.items() if key != "document_id"}
+    for doc_id in page_texts:
+        if doc_id not in accepted and doc_id not in problems:
+            problems[doc_id] = "missing from the response"
+    return accepted, problems
+
+
+if __name__ == "__main__":
+    # Example: python qix_packing.py ./project
+    folder = sys.argv[1] if len(sys.argv) > 1 else "./project"
+    paths = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(".pdf"))
+    planned, alone = plan_packs([estimate_job(path) for path in paths])
+    for number, pack in enumerate(planned, start=1):
+        tokens = sum(job_tokens(job) for job in pack)
+        print(f"Pack {number}: {len(pack)} submissions, {sum(job.pages for job in pack)} pages, ~{tokens} tokens")
+        for job in pack:
+            print(f"  {os.path.basename(job.path)} ({job.pages} pages)")
+    print(f"{len(alone)} submissions extracted on their own; {len(paths)} submissions in "
+          f"{len(planned) + len(alone)} requests instead of {len(paths)}")
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import re
+import sys
+from typing import List, Optional
+
+
+# -----------------------------
+# Chart Page Detection
+# -----------------------------
+# Charts in converted decks are vector drawings with many numeric axis labels and time or
+# percentage terms, so they can be found from the page content stream alone, without rendering.
+MAX_CHART_PAGES = 4
+MIN_CHART_SCORE = 3.0
+MIN_AXIS_NUMBERS = 8
+MIN_PATH_OPERATORS = 300
+# Pages with more words than this are text slides or thumbnail collages, not charts.
+MAX_CHART_WORDS = 400
+
+_PATH_OPERATOR = re.compile(rb"\s(?:re|l|c|v|y)\s")
+_NUMBER = re.compile(r"\b\d+(?:[.,]\d+)?%?")
+_CHART_TERMS = re.compile(
+    r"\b(chart|graph|trend|baseline|run chart|p-chart|control chart|pareto|histogram|pre-?intervention|"
+    r"post-?intervention|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec|month|week|quarter|q[1-4])\b",
+    re.IGNORECASE,
+)
+_RESULTS_TERMS = re.compile(r"\b(results?|benefits?|outcomes?|sustain\w*|improve\w*|check)\b", re.IGNORECASE)
+
+
+class ChartPage:
+    def __init__(self, index: int, score: float, digest: str) -> None:
+        self.index = index  # 0-based page number
+        self.score = score
+        self.digest = digest
+
+
+def _hash_xobjects(digest, resources, seen: set) -> None:
+    """Adds the data of every XObject in resources, and of those nested in form XObjects, to digest."""
+    from pypdf.generic import StreamObject
+
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    if xobjects is None:
+        return
+    for name, ref in sorted(xobjects.get_object().items()):
+        xobject = ref.get_object()
+        if not isinstance(xobject, StreamObject):
+            raise ValueError(f"XObject {name} is not a stream; cannot hash it for the page cache")
+        digest.update(name.encode())
+        # get_data raises for data pypdf cannot read, so no image silently drops out of the key.
+        digest.update(xobject.get_data())
+        if xobject.get("/Subtype") == "/Form" and id(xobject) not in seen:
+            seen.add(id(xobject))
+            _hash_xobjects(digest, xobject.get("/Resources"), seen)
+
+
+def _page_digest(page, content: bytes) -> str:
+    """Hash of what the page draws: its content stream plus the data of every XObject it uses."""
+    digest = hashlib.sha256(content)
+    _hash_xobjects(digest, page.get("/Resources"), set())
+    return digest.hexdigest()
+
+
+def chart_score(text: str, path_operators: int, images: int) -> float:
+    """0 for pages that cannot be charts; otherwise higher for denser charts on results pages."""
+    numbers = len(_NUMBER.findall(text))
+    if len(text.split()) > MAX_CHART_WORDS:
+        return 0.0
+    if numbers < MIN_AXIS_NUMBERS or (path_operators < MIN_PATH_OPERATORS and not images):
+        return 0.0
+    return (
+        min(path_operators / 500, 3.0)
+        + min(numbers / 15, 3.0)
+        + min(len(_CHART_TERMS.findall(text)) / 5, 3.0)
+        + (1.0 if images else 0.0)
+        + (2.0 if _RESULTS_TERMS.search(text) else 0.0)
+    )
+
+
+def detect_chart_pages(pdf_path: str, limit: int = MAX_CHART_PAGES) -> List[ChartPage]:
+    """The most chart-heavy pages of a PDF, in page order, each with a digest for the render cache."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    scored = []
+    for index, page in enumerate(reader.pages):
+        contents = page.get_contents()
+        content = contents.get_data() if contents is not None else b""
+        resources = page.get("/Resources")
+        xobjects = resources.get_object().get("/XObject") if resources is not None else None
+        score = chart_score(
+            page.extract_text() or "",
+            len(_PATH_OPERATOR.findall(content)),
+            len(xobjects.get_object()) if xobjects is not None else 0,
+        )
+        if score >= MIN_CHART_SCORE:
+            scored.append(ChartPage(index, score, _page_digest(page, content)))
+    best = sorted(scored, key=lambda page: -page.score)[:limit]
+    return sorted(best, key=lambda page: page.index)
+
+
+# -----------------------------
+# Rendered Page Cache
+# -----------------------------
+# Gemini bills an image up to 768x768 px as a single 258-token tile, so pages are scaled to fit
+# one tile; slide text stays legible at that size. Rendering needs pymupdf (in requirements.txt).
+PAGE_CACHE_DIR = os.getenv("QIX_PAGE_CACHE_DIR", "./page_cache")
+RENDER_LONG_EDGE_PX = 768
+JPEG_QUALITY = 80
+_missing_renderer_noted = False
+
+
+def _import_pymupdf():
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf
+        except ImportError:
+            return None
+    return pymupdf
+
+
+def render_page(pdf_path: str, index: int, long_edge_px: int = RENDER_LONG_EDGE_PX) -> Optional[bytes]:
+    """JPEG of one page scaled so its longer edge is long_edge_px, or None without pymupdf."""
+    pymupdf = _import_pymupdf()
+    if pymupdf is None:
+        return None
+    with pymupdf.open(pdf_path) as doc:
+        page = doc[index]
+        zoom = long_edge_px / max(page.rect.width, page.rect.height)
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+        return pixmap.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+
+
+class PageCache:
+    """Rendered pages on disk, keyed by page digest and resolution, shared by every project and run."""
+
+    def __init__(self, cache_dir: str = PAGE_CACHE_DIR, long_edge_px: int = RENDER_LONG_EDGE_PX) -> None:
+        self.cache_dir = cache_dir
+        self.long_edge_px = long_edge_px
+        self.hits = 0
+        self.renders = 0
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest[:32]}_{self.long_edge_px}.jpg")
+
+    def get(self, pdf_path: str, page: ChartPage) -> Optional[bytes]:
+        cached = self.path_for(page.digest)
+        if os.path.exists(cached):
+            self.hits += 1
+            with open(cached, "rb") as f:
+                return f.read()
+        image = render_page(pdf_path, page.index, self.long_edge_px)
+        if image is None:
+            return None
+        self.renders += 1
+        os.makedirs(self.cache_dir, exist_ok=True)
+        partial = f"{cached}.{os.getpid()}.tmp"
+        with open(partial, "wb") as f:
+            f.write(image)
+        os.replace(partial, cached)
+        return image
+
+
+def _note_missing_renderer(pdf_path: str) -> None:
+    global _missing_renderer_noted
+    if not _missing_renderer_noted:
+        _missing_renderer_noted = True
+        print(
+            f"Chart pages found in {os.path.basename(pdf_path)} but pymupdf is not installed, so they cannot be "
+            "rendered; sending whole PDFs instead (pip install pymupdf). Shown once per run."
+        )
+
+
+def load_chart_images(pdf_path: str, cache: Optional[PageCache] = None) -> List[tuple]:
+    """
+    (page_number, jpeg_bytes) for the chart pages of a PDF, rendered once and then served from the
+    cache. Returns [] when no chart pages are found or the page cannot be rendered locally, in
+    which case callers keep sending the whole PDF.
+    """
+    cache = cache or PageCache()
+    try:
+        pages = detect_chart_pages(pdf_path)
+    except ImportError:
+        return []
+    except Exception as exc:
+        print(f"Could not look for chart pages in {os.path.basename(pdf_path)}: {exc}")
+        return []
+    images = []
+    for page in pages:
+        image = cache.get(pdf_path, page)
+        if image is None:
+            _note_missing_renderer(pdf_path)
+            return []
+        images.append((page.index + 1, image))
+    return images
+
+
+if __name__ == "__main__":
+    # Example: python qix_pages.py ./project/submission.pdf
+    page_cache = PageCache()
+    for path in sys.argv[1:]:
+        found = detect_chart_pages(path)
+        print(f"{os.path.basename(path)}: chart pages {[page.index + 1 for page in found]}")
+        for page in found:
+            image = page_cache.get(path, page)
+            size = f"{len(image) / 1024:.0f} KB" if image else "not rendered (pymupdf missing)"
+            print(f"  page {page.index + 1}: score {page.score:.1f}, {size}")
+    print(f"Rendered {page_cache.renders}, served {page_cache.hits} from {page_cache.cache_dir}")
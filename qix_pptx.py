@@ -0,0 +1,373 @@
+import posixpath
+import re
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+
+# -----------------------------
+# Native PPTX Reading
+# -----------------------------
+# A submission deck is read straight from its OOXML package, with no PowerPoint and no PDF:
+# slide text, tables, SmartArt text and the numbers cached behind every embedded chart.
+# Charts become small data tables, so the model reads exact values instead of a picture of a line.
+NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "c": "http://schemas.openxmlformats.org/drawingml/2006/chart",
+    "cx": "http://schemas.microsoft.com/office/drawing/2014/chartex",
+    "dgm": "http://schemas.openxmlformats.org/drawingml/2006/diagram",
+    "mc": "http://schemas.openxmlformats.org/markup-compatibility/2006",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+CHART_MAX_ROWS = 200  # rows kept per chart table; longer series keep their first and last rows
+TITLE_PLACEHOLDERS = ("title", "ctrTitle")
+# Header of the text that stands in for the PDF, so the PDF-oriented prompts still apply.
+DECK_HEADER = (
+    "Submission deck, read directly from its PowerPoint file in place of the PDF. Each slide is marked "
+    "'=== Slide N ==='; cite slides as pages. Charts are given as the data tables behind them, and "
+    "pictures are listed by their alt text only."
+)
+
+_QUOTED = re.compile(r'"[^"]*"|\[[^\]]*\]')
+
+
+def _tag(prefix: str, name: str) -> str:
+    return f"{{{NS[prefix]}}}{name}"
+
+
+def _relationships(package: zipfile.ZipFile, part: str) -> Dict[str, str]:
+    """Relationship ID -> target part name for one package part; {} if it has none."""
+    folder, name = posixpath.split(part)
+    rels_name = posixpath.join(folder, "_rels", f"{name}.rels")
+    if rels_name not in package.namelist():
+        return {}
+    root = ET.fromstring(package.read(rels_name))
+    return {
+        rel.get("Id"): posixpath.normpath(posixpath.join(folder, rel.get("Target", "")))
+        for rel in root.iter(_tag("rel", "Relationship"))
+        if rel.get("TargetMode") != "External"
+    }
+
+
+def _paragraph_text(paragraph) -> str:
+    return "".join(
+        "\n" if node.tag == _tag("a", "br") else node.text or ""
+        for node in paragraph.iter()
+        if node.tag in (_tag("a", "t"), _tag("a", "br"))
+    ).strip()
+
+
+def _text_body(element) -> List[str]:
+    return [text for text in (_paragraph_text(p) for p in element.iter(_tag("a", "p"))) if text]
+
+
+def _cell(text: str) -> str:
+    return " ".join(text.split()).replace("|", "/")
+
+
+def _markdown_table(rows: List[List[str]]) -> List[str]:
+    width = max(len(row) for row in rows)
+    lines = ["| " + " | ".join(_cell(value) for value in row + [""] * (width - len(row))) + " |" for row in rows]
+    lines.insert(1, "|" + " --- |" * width)
+    return lines
+
+
+# -----------------------------
+# Chart Data
+# -----------------------------
+def _number_format(code: str, date1904: bool = False):
+    """Formatter for a cached value under an Excel number format: percentages, dates or plain numbers."""
+    bare = _QUOTED.sub("", code or "")
+    if "%" in bare:
+        decimals = re.search(r"0\.(0+)%", bare)
+        places = len(decimals.group(1)) if decimals else 0
+        return lambda value: f"{value * 100:.{places}f}%"
+    if bare.lower() != "general" and re.search(r"[dmy]", bare, re.IGNORECASE):
+        pattern = "%Y-%m-%d" if re.search(r"d", bare, re.IGNORECASE) else "%b %Y"
+        epoch = datetime(1904, 1, 1) if date1904 else datetime(1899, 12, 30)
+        return lambda value: (epoch + timedelta(days=value)).strftime(pattern)
+    return lambda value: f"{value:.10g}"
+
+
+def _cached_points(element, date1904: bool = False) -> List[str]:
+    """Values cached in a c:cat / c:val / c:xVal / c:yVal element, one per point index."""
+    if element is None:
+        return []
+    multi = element.find(".//c:multiLvlStrCache", NS)
+    if multi is not None:
+        levels = [_cache_points(level) for level in multi.findall("c:lvl", NS)]
+        count = max(map(len, levels), default=0)
+        # The innermost level comes first; outer levels only label the first point of their group.
+        return [
+            " ".join(level[i] for level in reversed(levels) if i < len(level) and level[i])
+            for i in range(count)
+        ]
+    cache = element.find(".//c:numCache", NS)
+    if cache is not None:
+        fmt = _number_format(cache.findtext("c:formatCode", "General", NS), date1904)
+        return _cache_points(cache, lambda text: fmt(float(text)))
+    cache = element.find(".//c:strCache", NS)
+    if cache is None:
+        cache = element.find(".//c:strLit", NS)
+    if cache is None:
+        cache = element.find(".//c:numLit", NS)
+    return _cache_points(cache) if cache is not None else []
+
+
+def _cache_points(cache, convert=None) -> List[str]:
+    count_node = cache.find("c:ptCount", NS)
+    points = {}
+    for pt in cache.findall("c:pt", NS):
+        text = pt.findtext("c:v", "", NS)
+        try:
+            points[int(pt.get("idx", 0))] = convert(text) if convert else text
+        except ValueError:
+            points[int(pt.get("idx", 0))] = text
+    count = int(count_node.get("val", 0)) if count_node is not None else 0
+    count = max(count, max(points, default=-1) + 1)
+    return [points.get(i, "") for i in range(count)]
+
+
+def _rich_text(element) -> str:
+    if element is None:
+        return ""
+    cached = element.find(".//c:strCache", NS)
+    if cached is not None:
+        return " ".join(value for value in _cache_points(cached) if value)
+    text = " ".join(_text_body(element))
+    return text or element.findtext(".//c:v", "", NS)
+
+
+def _series_tables(series: List[Tuple[str, List[str], List[str]]], key: str) -> List[str]:
+    """One table per run of series sharing the same categories: a row per category, a column per series."""
+    lines: List[str] = []
+    groups: List[Tuple[List[str], List[Tuple[str, List[str]]]]] = []
+    for name, categories, values in series:
+        if groups and groups[-1][0] == categories:
+            groups[-1][1].append((name, values))
+        else:
+            groups.append((categories, [(name, values)]))
+    for categories, members in groups:
+        count = max([len(categories)] + [len(values) for _, values in members])
+        header = [key] + [name or f"Series {i}" for i, (name, _) in enumerate(members, start=1)]
+        rows = [
+            [categories[i] if i < len(categories) and categories[i] else str(i + 1)]
+            + [values[i] if i < len(values) else "" for _, values in members]
+            for i in range(count)
+        ]
+        if len(rows) > CHART_MAX_ROWS:
+            half = CHART_MAX_ROWS // 2
+            rows = rows[:half] + [[f"... {len(rows) - 2 * half} more rows"]] + rows[-half:]
+        lines.extend(_markdown_table([header] + rows))
+    return lines
+
+
+def read_chart(xml: bytes) -> List[str]:
+    """Compact text for one chart part: its type, title, axis titles and the data cached behind it."""
+    root = ET.fromstring(xml)
+    if root.tag == _tag("cx", "chartSpace"):
+        return _read_chartex(root)
+    chart = root.find("c:chart", NS)
+    if chart is None:
+        return []
+    date1904 = root.find("c:date1904[@val='1']", NS) is not None
+    plot_area = chart.find("c:plotArea", NS)
+    groups = [child for child in plot_area if child.tag.endswith("Chart")] if plot_area is not None else []
+    kinds = []
+    series = []
+    scatter = False
+    for group in groups:
+        kind = group.tag.split("}")[1][: -len("Chart")]
+        direction = group.find("c:barDir", NS)
+        if direction is not None and direction.get("val") == "bar":
+            kind = "horizontal bar"
+        kinds.append(kind)
+        scatter = scatter or kind in ("scatter", "bubble")
+        for ser in group.findall("c:ser", NS):
+            categories = ser.find("c:cat", NS)
+            values = ser.find("c:val", NS)
+            if categories is None:
+                categories = ser.find("c:xVal", NS)
+            if values is None:
+                values = ser.find("c:yVal", NS)
+            series.append(
+                (
+                    _rich_text(ser.find("c:tx", NS)),
+                    _cached_points(categories, date1904),
+                    _cached_points(values, date1904),
+                )
+            )
+
+    title = _rich_text(chart.find("c:title", NS))
+    if not title and len(series) == 1 and chart.find("c:autoTitleDeleted[@val='1']", NS) is None:
+        # PowerPoint titles a single-series chart with the series name unless the title was deleted.
+        title = series[0][0]
+    lines = [f"[Chart: {' + '.join(dict.fromkeys(kinds)) or 'unknown'}]" + (f" {title}" if title else "")]
+    for axis in plot_area if plot_area is not None else []:
+        if axis.tag.endswith("Ax") and axis.find("c:title", NS) is not None:
+            role = "x axis" if axis.tag in (_tag("c", "catAx"), _tag("c", "dateAx")) else "axis"
+            lines.append(f"{role}: {_rich_text(axis.find('c:title', NS))}")
+    if series:
+        lines.extend(_series_tables(series, "X" if scatter else "Category"))
+    return lines
+
+
+def _read_chartex(root) -> List[str]:
+    """Office 2016 charts (Pareto, histogram, waterfall, box plot): their data blocks by series."""
+    data = {}
+    for block in root.iter(_tag("cx", "data")):
+        dims = {}
+        for dim in block:
+            level = dim.find("cx:lvl", NS)
+            if level is None:
+                continue
+            points = {int(pt.get("idx", 0)): pt.text or "" for pt in level.findall("cx:pt", NS)}
+            count = int(level.get("ptCount", 0)) or max(points, default=-1) + 1
+            dims[dim.get("type", "")] = [points.get(i, "") for i in range(count)]
+        data[block.get("id")] = dims
+    kinds = []
+    series = []
+    for ser in root.iter(_tag("cx", "series")):
+        kinds.append(ser.get("layoutId", "chart"))
+        data_id = ser.find("cx:dataId", NS)
+        dims = data.get(data_id.get("val") if data_id is not None else None, {})
+        values = dims.get("val", dims.get("size", []))
+        if values:
+            name = ser.find("cx:tx", NS)
+            series.append((" ".join(name.itertext()).strip() if name is not None else "", dims.get("cat", []), values))
+    title_node = root.find(".//cx:title", NS)
+    title = " ".join(_text_body(title_node)) if title_node is not None else ""
+    lines = [f"[Chart: {' + '.join(dict.fromkeys(kinds)) or 'unknown'}]" + (f" {title}" if title else "")]
+    if series:
+        lines.extend(_series_tables(series, "Category"))
+    return lines
+
+
+# -----------------------------
+# Slides
+# -----------------------------
+class Slide:
+    def __init__(self, number: int, title: str, blocks: List[str]) -> None:
+        self.number = number  # position among the slides shown, as in the exported PDF
+        self.title = title
+        self.blocks = blocks
+        self.charts = sum(1 for block in blocks if block.startswith("[Chart"))
+
+    @property
+    def text(self) -> str:
+        heading = f"=== Slide {self.number}" + (f": {self.title}" if self.title else "") + " ==="
+        return "\n".join([heading] + self.blocks)
+
+
+def _offset(shape) -> Tuple[int, int]:
+    offset = shape.find(".//a:off", NS)
+    return (int(offset.get("y", 0)), int(offset.get("x", 0))) if offset is not None else (0, 0)
+
+
+def _shapes(tree) -> list:
+    """Shapes of a shape tree in reading order (top to bottom, then left to right), with mc:Choice unwrapped."""
+    shapes = []
+    for child in tree:
+        if child.tag == _tag("mc", "AlternateContent"):
+            choice = child.find("mc:Choice", NS)
+            shapes.extend(list(choice) if choice is not None else [])
+        elif child.tag in (_tag("p", "sp"), _tag("p", "graphicFrame"), _tag("p", "grpSp"), _tag("p", "pic"),
+                           _tag("p", "cxnSp")):
+            shapes.append(child)
+    return sorted(shapes, key=_offset)
+
+
+def _diagram_text(package: zipfile.ZipFile, part: str) -> List[str]:
+    """Text of a SmartArt diagram's data model nodes (not its connectors or presentation copies)."""
+    root = ET.fromstring(package.read(part))
+    lines = []
+    for point in root.iter(_tag("dgm", "pt")):
+        if point.get("type", "node") not in ("node", "asst"):
+            continue
+        body = point.find("dgm:t", NS)
+        if body is not None:
+            lines.extend(_text_body(body))
+    return lines
+
+
+def _shape_blocks(package: zipfile.ZipFile, shape, rels: Dict[str, str], title: List[str]) -> List[str]:
+    if shape.tag == _tag("p", "grpSp"):
+        return [block for child in _shapes(shape) for block in _shape_blocks(package, child, rels, title)]
+    if shape.tag == _tag("p", "pic"):
+        described = shape.find("p:nvPicPr/p:cNvPr", NS)
+        description = " ".join((described.get("descr") or "").split()) if described is not None else ""
+        return [f"[Picture: {description}]" if description else "[Picture]"]
+    if shape.tag == _tag("p", "graphicFrame"):
+        table = shape.find(".//a:tbl", NS)
+        if table is not None:
+            rows = [[" ".join(_text_body(cell)) for cell in row.findall("a:tc", NS)] for row in table.findall("a:tr", NS)]
+            return ["[Table]"] + _markdown_table(rows) if rows and any(any(row) for row in rows) else []
+        chart = shape.find(".//c:chart", NS)
+        if chart is None:
+            chart = shape.find(".//cx:chart", NS)
+        if chart is not None and rels.get(chart.get(_tag("r", "id"))) in package.namelist():
+            return read_chart(package.read(rels[chart.get(_tag("r", "id"))]))
+        diagram = shape.find(".//dgm:relIds", NS)
+        if diagram is not None and rels.get(diagram.get(_tag("r", "dm"))) in package.namelist():
+            lines = _diagram_text(package, rels[diagram.get(_tag("r", "dm"))])
+            return ["[Diagram]"] + lines if lines else []
+        return []
+    body = shape.find("p:txBody", NS)
+    if body is None:
+        return []
+    lines = _text_body(body)
+    placeholder = shape.find("p:nvSpPr/p:nvPr/p:ph", NS)
+    if lines and not title and placeholder is not None and placeholder.get("type") in TITLE_PLACEHOLDERS:
+        title.append(" ".join(" ".join(lines).split()))
+        return []
+    return lines
+
+
+def read_slides(pptx_path: str) -> List[Slide]:
+    """The slides shown in presentation order; hidden slides are left out, as in a PDF export."""
+    with zipfile.ZipFile(pptx_path) as package:
+        presentation = ET.fromstring(package.read("ppt/presentation.xml"))
+        rels = _relationships(package, "ppt/presentation.xml")
+        parts = [
+            rels.get(slide_id.get(_tag("r", "id")))
+            for slide_id in presentation.iter(_tag("p", "sldId"))
+        ]
+        slides = []
+        for part in parts:
+            if part not in package.namelist():
+                continue
+            root = ET.fromstring(package.read(part))
+            if root.get("show") in ("0", "false"):
+                continue
+            tree = root.find("p:cSld/p:spTree", NS)
+            slide_rels = _relationships(package, part)
+            title: List[str] = []
+            blocks = [
+                block for shape in (_shapes(tree) if tree is not None else [])
+                for block in _shape_blocks(package, shape, slide_rels, title)
+            ]
+            slides.append(Slide(len(slides) + 1, title[0] if title else "", blocks))
+    return slides
+
+
+def render_slides(slides: List[Slide]) -> str:
+    return "\n\n".join([DECK_HEADER] + [slide.text for slide in slides])
+
+
+if __name__ == "__main__":
+    # Example: python qix_pptx.py deck.pptx   (prints the text sent in place of the converted PDF)
+    from qix_prompts import estimate_tokens
+    from qix_packing import PDF_PAGE_TOKENS
+
+    for path in sys.argv[1:]:
+        deck = read_slides(path)
+        text = render_slides(deck)
+        print(text)
+        print(
+            f"\n{path}: {len(deck)} slides, {sum(slide.charts for slide in deck)} charts, "
+            f"~{estimate_tokens(text)} tokens as text vs ~{len(deck) * PDF_PAGE_TOKENS} as PDF pages"
+        )
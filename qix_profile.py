@@ -0,0 +1,313 @@
+import html
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+# -----------------------------
+# Run Profiling (--profile)
+# -----------------------------
+DEFAULT_SAMPLE_INTERVAL_S = 0.005
+HOT_SPOT_LIMIT = 25
+
+# Bar colours in the HTML waterfall, by span category.
+CATEGORY_COLOURS = {
+    "project": "#d9e2ec",
+    "model": "#4c78a8",
+    "upload": "#f58518",
+    "wait": "#bab0ac",
+    "local": "#54a24b",
+}
+
+
+class Span:
+    def __init__(self, name: str, category: str, project: str, thread: str, start: float, end: float, args: dict):
+        self.name = name
+        self.category = category
+        self.project = project
+        self.thread = thread
+        self.start = start
+        self.end = end
+        self.args = args
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Profiler:
+    """
+    Records a wall-clock span for every instrumented stage, tagged with the project being processed
+    on that thread, and samples every thread's Python stack in the background to find CPU hot spots.
+    On Linux a sample only counts when the thread's CPU time advanced since its previous sample, so
+    threads blocked on the network or a lock do not show up as hot; elsewhere every sample counts.
+    """
+
+    def __init__(self, sample_interval_s: float = DEFAULT_SAMPLE_INTERVAL_S) -> None:
+        self.sample_interval_s = sample_interval_s
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self.self_samples: Dict[Tuple[str, int, str], int] = {}
+        self.inclusive_samples: Dict[Tuple[str, int, str], int] = {}
+        self.total_samples = 0
+        self.cpu_filtered = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._cpu_ticks: Dict[int, int] = {}
+
+    # --- Timeline -------------------------------------------------------
+
+    def record(self, name: str, category: str, project: str, start: float, end: float, args: dict) -> None:
+        span = Span(name, category, project, threading.current_thread().name, start, end, args)
+        with self._lock:
+            self.spans.append(span)
+
+    # --- Sampling -------------------------------------------------------
+
+    def start(self) -> None:
+        self._sampler = threading.Thread(target=self._sample_loop, name="qix-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _thread_cpu_ticks(self, native_id: int) -> Optional[int]:
+        try:
+            with open(f"/proc/self/task/{native_id}/stat", "rb") as f:
+                fields = f.read().rsplit(b")", 1)[1].split()
+            return int(fields[11]) + int(fields[12])  # utime + stime
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def _on_cpu(self, thread: threading.Thread) -> bool:
+        native_id = getattr(thread, "native_id", None)
+        ticks = self._thread_cpu_ticks(native_id) if native_id is not None else None
+        if ticks is None:
+            return True
+        self.cpu_filtered = True
+        previous = self._cpu_ticks.get(native_id)
+        self._cpu_ticks[native_id] = ticks
+        return previous is not None and ticks > previous
+
+    def _sample_loop(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.sample_interval_s):
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or ident not in threads or not self._on_cpu(threads[ident]):
+                    continue
+                self.total_samples += 1
+                leaf = (frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+                self.self_samples[leaf] = self.self_samples.get(leaf, 0) + 1
+                seen = set()
+                while frame is not None:
+                    key = (frame.f_code.co_filename, frame.f_code.co_firstlineno, frame.f_code.co_name)
+                    if key not in seen:
+                        seen.add(key)
+                        self.inclusive_samples[key] = self.inclusive_samples.get(key, 0) + 1
+                    frame = frame.f_back
+
+    def hot_spots(self, limit: int = HOT_SPOT_LIMIT) -> List[dict]:
+        """Lines where sampled threads were executing, and the functions that spent the most time beneath them."""
+        def rows(samples):
+            ordered = sorted(samples.items(), key=lambda item: -item[1])[:limit]
+            return [
+                {
+                    "location": f"{_short_path(filename)}:{line}",
+                    "function": function,
+                    "samples": count,
+                    "percent": 100.0 * count / max(self.total_samples, 1),
+                }
+                for (filename, line, function), count in ordered
+            ]
+
+        return [
+            {"kind": "self", "rows": rows(self.self_samples)},
+            {"kind": "inclusive", "rows": rows(self.inclusive_samples)},
+        ]
+
+    # --- Output ---------------------------------------------------------
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Chrome trace-event JSON, viewable in chrome://tracing or ui.perfetto.dev."""
+        thread_ids: Dict[str, int] = {}
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start):
+            tid = thread_ids.setdefault(span.thread, len(thread_ids) + 1)
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round((span.start - self.origin) * 1e6),
+                    "dur": round(span.duration * 1e6),
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"project": span.project, **span.args},
+                }
+            )
+        for thread, tid in thread_ids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def write_html(self, path: str, title: str = "QIX run profile") -> None:
+        """Self-contained waterfall: one lane per project (plus run-level stages), stage totals and hot spots."""
+        spans = sorted(self.spans, key=lambda s: s.start)
+        if not spans:
+            end = 1.0
+        else:
+            end = max(span.end for span in spans) - self.origin
+        end = max(end, 1e-6)
+
+        lanes: Dict[str, List[Span]] = {}
+        for span in spans:
+            lanes.setdefault(span.project or "(run)", []).append(span)
+
+        def bar(span: Span) -> str:
+            left = 100.0 * (span.start - self.origin) / end
+            width = max(100.0 * span.duration / end, 0.15)
+            colour = CATEGORY_COLOURS.get(span.category, "#999")
+            tip = html.escape(f"{span.name} ({span.category}) {span.duration * 1000:.0f} ms, thread {span.thread}")
+            # The project span is drawn full height behind its stages, so idle gaps show as bare project colour.
+            height, top = (22, 0) if span.category == "project" else (14, 4)
+            return (
+                f'<div class="bar" title="{tip}" style="left:{left:.3f}%;width:{width:.3f}%;'
+                f'top:{top}px;height:{height}px;background:{colour}"></div>'
+            )
+
+        lane_rows = []
+        for project, project_spans in lanes.items():
+            bars = "".join(bar(span) for span in project_spans)
+            finished = max(span.end for span in project_spans) - self.origin
+            lane_rows.append(
+                f'<tr><td class="name" title="{html.escape(project)}">{html.escape(project[:60])}</td>'
+                f'<td class="end">{finished:.1f}s</td><td class="lane"><div class="track">{bars}</div></td></tr>'
+            )
+
+        totals: Dict[Tuple[str, str], List[float]] = {}
+        for span in spans:
+            if span.category != "project":
+                totals.setdefault((span.category, span.name), []).append(span.duration)
+        total_rows = "".join(
+            f"<tr><td>{html.escape(name)}</td><td>{html.escape(category)}</td><td>{len(durations)}</td>"
+            f"<td>{sum(durations):.2f}s</td><td>{max(durations) * 1000:.0f} ms</td></tr>"
+            for (category, name), durations in sorted(totals.items(), key=lambda item: -sum(item[1]))
+        )
+
+        headings = {"self": "Self time (executing line)", "inclusive": "Inclusive time (function and callees)"}
+        hot_tables = []
+        for table in self.hot_spots():
+            rows = "".join(
+                f"<tr><td>{html.escape(row['function'])}</td><td>{html.escape(row['location'])}</td>"
+                f"<td>{row['samples']}</td><td>{row['percent']:.1f}%</td></tr>"
+                for row in table["rows"]
+            )
+            hot_tables.append(
+                f"<h3>{headings[table['kind']]}</h3>"
+                f"<table><tr><th>Function</th><th>Location</th><th>Samples</th><th>Share</th></tr>{rows}</table>"
+            )
+        sample_note = (
+            "on-CPU samples only (threads waiting on I/O or locks are excluded)"
+            if self.cpu_filtered
+            else "wall-clock samples of every thread"
+        )
+        legend = "".join(
+            f'<span class="key" style="background:{colour}"></span>{category} '
+            for category, colour in CATEGORY_COLOURS.items()
+        )
+
+        document = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+body {{ font-family: system-ui, sans-serif; margin: 20px; color: #222; }}
+table {{ border-collapse: collapse; margin-bottom: 18px; }}
+td, th {{ border-bottom: 1px solid #eee; padding: 3px 8px; font-size: 12px; text-align: left; }}
+.waterfall {{ width: 100%; }}
+.name {{ width: 320px; white-space: nowrap; overflow: hidden; }}
+.end {{ width: 50px; color: #666; }}
+.track {{ position: relative; height: 22px; background: #fafafa; }}
+.bar {{ position: absolute; border-radius: 2px; opacity: 0.9; }}
+.key {{ display: inline-block; width: 12px; height: 12px; margin: 0 4px 0 12px; vertical-align: middle; }}
+</style></head><body>
+<h1>{html.escape(title)}</h1>
+<p>Wall clock {end:.1f}s across {len(lanes)} lanes. Hover a bar for details. {legend}</p>
+<table class="waterfall"><tr><th>Project</th><th>Done</th><th>Timeline (0 - {end:.1f}s)</th></tr>{''.join(lane_rows)}</table>
+<h2>Time by stage</h2>
+<table><tr><th>Stage</th><th>Category</th><th>Count</th><th>Total</th><th>Longest</th></tr>{total_rows}</table>
+<h2>CPU hot spots</h2>
+<p>{self.total_samples} samples every {self.sample_interval_s * 1000:.0f} ms, {sample_note}.</p>
+{''.join(hot_tables)}
+</body></html>
+"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(document)
+
+
+def _short_path(filename: str) -> str:
+    parts = filename.replace("\\", "/").split("/")
+    return "/".join(parts[-2:]) if len(parts) > 1 else filename
+
+
+# -----------------------------
+# Instrumentation Hooks
+# -----------------------------
+# Spans are no-ops unless a profiler is active, so instrumented code pays almost nothing by default.
+_active: Optional[Profiler] = None
+_context = threading.local()
+
+
+def start_profiling(sample_interval_s: float = DEFAULT_SAMPLE_INTERVAL_S) -> Profiler:
+    global _active
+    _active = Profiler(sample_interval_s)
+    _active.start()
+    return _active
+
+
+def stop_profiling() -> Optional[Profiler]:
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+@contextmanager
+def span(name: str, category: str = "local", **args):
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record(name, category, getattr(_context, "project", ""), started, time.perf_counter(), args)
+
+
+@contextmanager
+def profiled_project(project_id: str):
+    """Tags every span recorded on this thread with project_id and records the project's own span."""
+    previous = getattr(_context, "project", "")
+    _context.project = project_id
+    try:
+        with span(project_id, "project"):
+            yield
+    finally:
+        _context.project = previous
+
+
+def write_profile(profiler: Profiler, output_excel: str) -> List[str]:
+    """Writes the HTML waterfall and the Chrome trace next to the Excel report and returns their paths."""
+    base = os.path.splitext(output_excel)[0]
+    html_path, trace_path = f"{base}_profile.html", f"{base}_trace.json"
+    profiler.write_html(html_path, title=f"QIX run profile: {os.path.basename(output_excel)}")
+    profiler.write_chrome_trace(trace_path)
+    return [html_path, trace_path]
@@ -0,0 +1,479 @@
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from qix_rubric import FULL_RUBRIC, RubricCategory
+
+
+# -----------------------------
+# Prompt Templates
+# -----------------------------
+LEVEL_4_RULES = """
+Your sole responsibility is to be a strict auditor, flagging rule violations and missing criteria. You are looking only for reasons to classify the project as Level 4.
+Task: Analyze the provided project PDF and identify if it meets ANY of the following strict criteria for a Level 4 classification.
+Level 4 'Rejection' Criteria:
+- A solution is already decided (thus not able to apply improvement methodologies).
+- It is a simple just-do-it or straightforward project with solutions like video/print booklets, pamphlets, leaflets, sending reminders, or just reinforcing current processes.
+- It is an IT project (including Excel or programming) that does not involve any actual process change.
+- There is no measurement or documentation of standard work or results.
+- It is a trial or assessment without a concrete implementation.
+- It involves research, randomized control trials, or studies that have pre-empted an intervention.
+- It is just the fine-tuning of new services during a setting-up phase.
+- It's a service development plan like buying new equipment or starting a new service.
+- It's a Regular operation review or fine-tuning (e.g., PAR level, slot allocations, schedules).
+- It's an RCA (Root Cause Analysis) without meaningful supporting data or for a single incident.
+- It's an implementation of Evidence-based practice without measurement.
+""".strip()
+
+# One entry per rule, for screening the rules in separate calls.
+LEVEL_4_CRITERIA = [line[2:].strip() for line in LEVEL_4_RULES.splitlines() if line.startswith("- ")]
+
+# Appended to both debate prompts so contested projects can be detected without another call.
+PROPOSED_TOTAL_INSTRUCTION = "End your argument with a final line in the exact form: PROPOSED TOTAL: <integer>/100"
+
+EXTRACTION_PROMPT = """You are the Extraction Agent for a hospital's continuous improvement assessment pipeline.
+Analyze the provided project submission document. Your task is to extract the relevant information to populate the required schema. Pay close attention to both unstructured narrative text and visual elements like charts, graphs, and tables to capture the full scope of the methodologies and results."""
+
+PACKED_EXTRACTION_PROMPT = """You are the Extraction Agent for a hospital's continuous improvement assessment pipeline.
+You are given {count} separate project submission documents. Each document is preceded by a line with its ID: {document_ids}.
+Analyze each document on its own and return exactly one extraction per document, in the same order, with document_id set to that document's ID. Never combine information from different documents. Pay close attention to both unstructured narrative text and visual elements like charts, graphs, and tables to capture the full scope of the methodologies and results."""
+
+SCREENING_PROMPT = """You are the Pre-Screening Agent for a hospital's continuous improvement assessment pipeline.
+Evaluate the provided project (JSON data and full PDF) against the Level-4 Exclusionary Rules.
+
+RULES:
+{rules}
+
+EXTRACTED JSON SUMMARY:
+{project_json}
+
+INSTRUCTIONS:
+If you find any violations, you must state the criterion that was met and provide the specific evidence or quote from the document that proves it.
+Put any text you quote from the document in double quotes, word for word, followed by its page, e.g. "..." (p. 4)."""
+
+CRITERION_SCREENING_PROMPT = """You are the Pre-Screening Agent for a hospital's continuous improvement assessment pipeline.
+You are a strict auditor looking only for reasons to classify the project as Level 4.
+Evaluate the provided project (JSON data and full PDF) against ONLY these Level-4 exclusionary rules:
+{criteria}
+
+EXTRACTED JSON SUMMARY:
+{project_json}
+
+INSTRUCTIONS:
+Return exactly one check per rule above, in the same order, copying the rule text into criterion.
+If a rule is met, provide the specific evidence or quote from the document that proves it.
+Put any text you quote from the document in double quotes, word for word, followed by its page, e.g. "..." (p. 4).
+Set confidence from 0 to 1 to how certain the evidence makes your decision."""
+
+POSITIVE_SYSTEM = "Act as a strict but highly supportive positive advocate."
+POSITIVE_PROMPT = """EXTRACTED PROJECT JSON:
+{project_json}
+
+You are the Positive Advocate for this clinical project.
+Using BOTH the provided PDF document and the JSON summary, review the project against this rubric:
+{rubric}
+
+Your goal is to highlight all strengths. Find specific evidence, charts, or quotes in the PDF and JSON that justify 'Above Expectations' scores for every category. Formulate a strong defensive argument.
+{proposed_total}"""
+
+NEGATIVE_SYSTEM = "Act as a hostile, highly critical project auditor who penalizes missing data heavily."
+NEGATIVE_PROMPT = """EXTRACTED PROJECT JSON:
+{project_json}
+
+You are a ruthless, veteran clinical auditor known for extreme strictness.
+Using BOTH the provided PDF document and the JSON summary, review the project against this rubric:
+{rubric}
+
+Your goal is to aggressively drag the score down. You must actively search for technicalities, missing long-term data, or subjective claims.
+- If a criterion requires multiple elements (e.g., 'quantified benefits' AND 'intangible results'), and they only have one, aggressively attack the missing element.
+- If they claim 'sustained results', strictly verify if the charts in the PDF explicitly prove >= 3 months. If it's only 2.5 months, flag it as a failure.
+- Argue fiercely why this project DOES NOT deserve 'Above Expectations' and must be capped at 'Meet Expectations' or 'Below Expectations'.
+{proposed_total}"""
+
+JUDGE_OUTPUT_SCHEMA = (
+    '{"assessments":[{"category":"String (e.g., \'1. Background\')","max_score":"Integer (e.g., 10)",'
+    '"ai_score":"Integer (Must be an exact discrete score from the rubric)",'
+    '"ai_justification":"String (Explain why you rejected the higher score, or why the evidence was so flawless '
+    'it forced you to award it)","extracted_quote":"String (Exact, word-for-word quote from the PDF/JSON '
+    'supporting the score, followed by its page, e.g. (p. 4))"}]}'
+)
+
+JUDGE_SYSTEM = """You are the Lead Meta-Judge for the NUH QIX awards.
+You have the original PDF submission, the extracted JSON, a Positive Advocate's review, and a Strict Skeptic's review.
+
+RUBRIC & THRESHOLDS:
+{rubric}
+- Outstanding: >= 85 (HARD REQUIREMENT: Only the top 10% of elite projects achieve this. Evidence must be flawless.)
+- Merit: >= 70
+- Recognition: >= 50
+
+CRITICAL GRADING RULES:
+1. THE BURDEN OF PROOF: You MUST default to 'Meet Expectations' or lower. You are strictly forbidden from awarding 'Above Expectations' unless the Positive Advocate provides explicit, undeniable quotes/charts from the source documents that satisfy EVERY SINGLE requirement in that rubric tier.
+2. PENALIZE VAGUENESS: If the Skeptic successfully points out that a claim is subjective, unquantified, or lacks a specific timeframe, you MUST downgrade the score.
+3. EXACT DISCRETE SCORES: You must only select the exact integer scores provided in the rubric (e.g., for Background, you must choose 3, 6, or 10. Do not invent a score like 8 or 9).
+
+INSTRUCTIONS:
+Cross-reference the debate. Rule on each category. Output strictly matching this JSON schema:
+{schema}"""
+
+# Sent when only some categories of a judge response fail validation.
+JUDGE_REPAIR_SYSTEM = """You are the Lead Meta-Judge for the NUH QIX awards.
+Part of your previous ruling could not be accepted. Rule again on ONLY the categories listed, applying the same burden of proof: default to 'Meet Expectations' or lower unless the evidence satisfies every requirement of a higher tier.
+Each ai_score MUST be one of the scores listed for that category. Output strictly matching this JSON schema, with exactly one entry per listed category:
+{schema}"""
+
+JUDGE_REPAIR_PROMPT = """RUBRIC (listed categories only):
+{rubric}
+
+PROBLEMS WITH YOUR PREVIOUS RULING:
+{problems}
+
+--- POSITIVE ADVOCATE ARGUMENT ---
+{pos_arg}
+
+--- STRICT SKEPTIC ARGUMENT ---
+{neg_arg}"""
+
+# Stands in for both debate arguments when a project is graded by the judge alone.
+NO_DEBATE_ARGUMENT = "Not argued: this project is graded without the debate. Judge it from the submission and the extracted JSON alone."
+
+JUDGE_PROMPT = """--- EXTRACTED JSON ---
+{project_json}
+
+--- POSITIVE ADVOCATE ARGUMENT ---
+{pos_arg}
+
+--- STRICT SKEPTIC ARGUMENT ---
+{neg_arg}"""
+
+
+# -----------------------------
+# Token Estimation & Budgets
+# -----------------------------
+# Gemini averages roughly four characters per token on English prose and compact JSON.
+# The estimate only has to be good enough to enforce budgets; actual usage is taken from
+# each response's usage_metadata.
+CHARS_PER_TOKEN = 4
+
+# Text input budget per call, in estimated tokens. The attached PDF is not counted.
+STAGE_INPUT_BUDGETS = {
+    "extraction": 500,
+    "extraction_packed": 600,
+    "screening": 2500,
+    "screening_criterion": 2000,
+    "positive": 2500,
+    "negative": 2500,
+    "judge": 10000,
+    "judge_repair": 3000,
+}
+
+# Extraction fields with the highest number are trimmed first; priority 0 is never trimmed.
+EXTRACTION_FIELD_PRIORITY = {
+    "project_title": 0,
+    "department": 0,
+    "category": 0,
+    "smart_goals": 1,
+    "key_results": 1,
+    "problem_statement": 2,
+    "methodology": 2,
+    "follow_up_plan": 3,
+}
+MIN_FIELD_TOKENS = 40
+TRIM_MARKER = " [...]"
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def canonical_json(data) -> str:
+    """Compact JSON with sorted keys, so identical data always yields an identical payload."""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def shorten_text(text: str, max_tokens: int) -> str:
+    """Keeps the leading sentences that fit in max_tokens, cutting at a word if even the first does not."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(TRIM_MARKER))
+    head = text[:limit]
+    sentence_end = max(head.rfind(". "), head.rfind(".\n"))
+    if sentence_end > limit // 2:
+        head = head[:sentence_end + 1]
+    elif " " in head:
+        head = head[:head.rfind(" ")]
+    return head.rstrip() + TRIM_MARKER
+
+
+def shorten_value(value, max_tokens: int):
+    if isinstance(value, list):
+        kept = []
+        for item in value:
+            if estimate_tokens(canonical_json(kept + [item, f"+{len(value)} more"])) > max_tokens:
+                break
+            kept.append(item)
+        if len(kept) < len(value):
+            kept.append(f"+{len(value) - len(kept)} more")
+        return kept
+    if isinstance(value, str):
+        return shorten_text(value, max_tokens)
+    return value
+
+
+def shorten_argument(argument: str, max_tokens: int) -> str:
+    """Trims the middle of a debate argument, keeping its opening and the PROPOSED TOTAL line."""
+    if estimate_tokens(argument) <= max_tokens:
+        return argument
+    lines = argument.rstrip().splitlines()
+    closing = lines[-1] if lines and "PROPOSED TOTAL" in lines[-1].upper() else ""
+    body = "\n".join(lines[:-1]) if closing else argument
+    head = shorten_text(body, max(1, max_tokens - estimate_tokens(closing) - 1))
+    return f"{head}\n{closing}" if closing else head
+
+
+def compact_extraction(project_json: dict, max_tokens: Optional[int] = None) -> Tuple[str, List[str]]:
+    """Canonical JSON of the extraction, trimming lower-priority fields until it fits max_tokens."""
+    data = dict(project_json)
+    text = canonical_json(data)
+    trimmed = []
+    if max_tokens is None:
+        return text, trimmed
+
+    fields = sorted(
+        (field for field in data if EXTRACTION_FIELD_PRIORITY.get(field, 2) > 0),
+        key=lambda field: (-EXTRACTION_FIELD_PRIORITY.get(field, 2), field),
+    )
+    for field in fields:
+        over = estimate_tokens(text) - max_tokens
+        if over <= 0:
+            break
+        current = estimate_tokens(canonical_json(data[field]))
+        target = max(MIN_FIELD_TOKENS, current - over)
+        if target >= current:
+            continue
+        data[field] = shorten_value(data[field], target)
+        trimmed.append(field)
+        text = canonical_json(data)
+    return text, trimmed
+
+
+# -----------------------------
+# Prompt Builders
+# -----------------------------
+class Prompt:
+    def __init__(self, stage: str, text: str, system: str = "", trimmed: Optional[List[str]] = None) -> None:
+        self.stage = stage
+        self.text = text
+        self.system = system
+        self.trimmed = trimmed or []
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.system) + estimate_tokens(self.text)
+
+
+def _budget_for(stage: str, budget: Optional[int]) -> int:
+    return budget if budget is not None else STAGE_INPUT_BUDGETS[stage]
+
+
+def _fit_extraction(stage: str, template: str, system: str, project_json: dict, budget: Optional[int], **fields) -> Prompt:
+    fixed = estimate_tokens(system) + estimate_tokens(template.format(project_json="", **fields))
+    json_text, trimmed = compact_extraction(project_json, _budget_for(stage, budget) - fixed)
+    return Prompt(stage, template.format(project_json=json_text, **fields), system, trimmed)
+
+
+def build_extraction_prompt() -> Prompt:
+    return Prompt("extraction", EXTRACTION_PROMPT)
+
+
+def build_packed_extraction_prompt(document_ids: List[str]) -> Prompt:
+    """Extraction of several submissions in one call; each document part follows a line with its ID."""
+    return Prompt(
+        "extraction_packed",
+        PACKED_EXTRACTION_PROMPT.format(count=len(document_ids), document_ids=", ".join(document_ids)),
+    )
+
+
+def build_screening_prompt(project_json: dict, budget: Optional[int] = None) -> Prompt:
+    return _fit_extraction("screening", SCREENING_PROMPT, "", project_json, budget, rules=LEVEL_4_RULES)
+
+
+def build_criterion_screening_prompt(
+    project_json: dict, criteria: List[str], budget: Optional[int] = None
+) -> Prompt:
+    """Screening limited to a few Level-4 rules, for running groups of rules as concurrent calls."""
+    rules = "\n".join(f"- {criterion}" for criterion in criteria)
+    return _fit_extraction("screening_criterion", CRITERION_SCREENING_PROMPT, "", project_json, budget, criteria=rules)
+
+
+def build_positive_prompt(project_json: dict, budget: Optional[int] = None) -> Prompt:
+    return _fit_extraction(
+        "positive", POSITIVE_PROMPT, POSITIVE_SYSTEM, project_json, budget,
+        rubric=FULL_RUBRIC, proposed_total=PROPOSED_TOTAL_INSTRUCTION,
+    )
+
+
+def build_negative_prompt(project_json: dict, budget: Optional[int] = None) -> Prompt:
+    return _fit_extraction(
+        "negative", NEGATIVE_PROMPT, NEGATIVE_SYSTEM, project_json, budget,
+        rubric=FULL_RUBRIC, proposed_total=PROPOSED_TOTAL_INSTRUCTION,
+    )
+
+
+def build_judge_prompt(project_json: dict, pos_arg: str, neg_arg: str, budget: Optional[int] = None) -> Prompt:
+    """
+    The judge sees the PDF itself, so the extraction is trimmed before the debate arguments.
+    Arguments are only shortened, evenly, once the extraction is down to its minimum.
+    """
+    system = JUDGE_SYSTEM.format(rubric=FULL_RUBRIC, schema=JUDGE_OUTPUT_SCHEMA)
+    available = _budget_for("judge", budget) - estimate_tokens(system)
+    available -= estimate_tokens(JUDGE_PROMPT.format(project_json="", pos_arg="", neg_arg=""))
+
+    argument_tokens = estimate_tokens(pos_arg) + estimate_tokens(neg_arg)
+    json_text, trimmed = compact_extraction(project_json, max(available - argument_tokens, 0))
+
+    over = estimate_tokens(json_text) + argument_tokens - available
+    if over > 0:
+        share = max(MIN_FIELD_TOKENS, (available - estimate_tokens(json_text)) // 2)
+        if estimate_tokens(pos_arg) > share:
+            pos_arg = shorten_argument(pos_arg, share)
+            trimmed.append("positive_argument")
+        if estimate_tokens(neg_arg) > share:
+            neg_arg = shorten_argument(neg_arg, share)
+            trimmed.append("negative_argument")
+
+    text = JUDGE_PROMPT.format(project_json=json_text, pos_arg=pos_arg, neg_arg=neg_arg)
+    return Prompt("judge", text, system, trimmed)
+
+
+def build_judge_repair_prompt(
+    categories: List[RubricCategory],
+    problems: Dict[str, str],
+    pos_arg: str,
+    neg_arg: str,
+    budget: Optional[int] = None,
+    chart_pages: Optional[List[int]] = None,
+) -> Prompt:
+    """
+    A follow-up asking the judge to re-rule only the categories that failed validation.
+    chart_pages lists the page numbers when the evidence attached is rendered chart pages, not the PDF.
+    """
+    system = JUDGE_REPAIR_SYSTEM.format(schema=JUDGE_OUTPUT_SCHEMA)
+    if chart_pages:
+        pages = ", ".join(str(page) for page in chart_pages)
+        system += f"\nThe attached images are the submission's chart pages (pages {pages}), not the whole document."
+    rubric = "\n\n".join(
+        f"{category.text}\nAllowed ai_score values: {', '.join(str(score) for score in category.scores)}"
+        for category in categories
+    )
+    problem_lines = "\n".join(f"- {category.label}: {problems[category.label]}" for category in categories)
+    fixed = estimate_tokens(system) + estimate_tokens(
+        JUDGE_REPAIR_PROMPT.format(rubric=rubric, problems=problem_lines, pos_arg="", neg_arg="")
+    )
+    share = max(MIN_FIELD_TOKENS, (_budget_for("judge_repair", budget) - fixed) // 2)
+    trimmed = [
+        name
+        for name, argument in (("positive_argument", pos_arg), ("negative_argument", neg_arg))
+        if estimate_tokens(argument) > share
+    ]
+    text = JUDGE_REPAIR_PROMPT.format(
+        rubric=rubric,
+        problems=problem_lines,
+        pos_arg=shorten_argument(pos_arg, share),
+        neg_arg=shorten_argument(neg_arg, share),
+    )
+    return Prompt("judge_repair", text, system, trimmed)
+
+
+# -----------------------------
+# Token Accounting
+# -----------------------------
+def _usage_count(usage, name: str) -> int:
+    return int(getattr(usage, name, 0) or 0) if usage is not None else 0
+
+
+class TokenLedger:
+    """
+    Estimated and reported token usage, plus latency, for every model call made for one project.
+    Reported usage is also charged to run_budget (a qix_budget.RunBudget), if given.
+    """
+
+    def __init__(self, project_id: str = "", run_budget=None) -> None:
+        self.project_id = project_id
+        self.run_budget = run_budget
+        self.calls: List[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, model: str, prompt: Optional[Prompt], response, latency_s: float) -> dict:
+        usage = getattr(response, "usage_metadata", None)
+        call = {
+            "stage": stage,
+            "model": model,
+            "estimated_tokens": prompt.tokens if prompt else 0,
+            "prompt_tokens": _usage_count(usage, "prompt_token_count"),
+            "output_tokens": _usage_count(usage, "candidates_token_count") + _usage_count(usage, "thoughts_token_count"),
+            "latency_ms": int(latency_s * 1000),
+            "trimmed": ",".join(prompt.trimmed) if prompt else "",
+        }
+        with self._lock:
+            self.calls.append(call)
+        if self.run_budget is not None:
+            self.run_budget.charge(model, call["prompt_tokens"], call["output_tokens"])
+        return call
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": len(self.calls),
+                **{
+                    key: sum(call[key] for call in self.calls)
+                    for key in ("estimated_tokens", "prompt_tokens", "output_tokens", "latency_ms")
+                },
+            }
+
+    def summary(self) -> str:
+        totals = self.totals()
+        return (
+            f"{totals['calls']} calls, ~{totals['estimated_tokens']} text tokens estimated, "
+            f"{totals['prompt_tokens']} input / {totals['output_tokens']} output tokens reported, "
+            f"{totals['latency_ms'] / 1000:.1f}s in model calls"
+        )
+
+
+_active = threading.local()
+
+
+@contextmanager
+def track_tokens(ledger: TokenLedger):
+    """Routes every call recorded on this thread to ledger for the duration of the block."""
+    previous = getattr(_active, "ledger", None)
+    _active.ledger = ledger
+    try:
+        yield ledger
+    finally:
+        _active.ledger = previous
+
+
+def current_ledger() -> Optional[TokenLedger]:
+    """The ledger of this thread, for handing to worker threads that make calls for the same project."""
+    return getattr(_active, "ledger", None)
+
+
+def record_call(stage: str, model: str, prompt: Optional[Prompt], response, latency_s: float) -> None:
+    ledger = getattr(_active, "ledger", None)
+    if ledger is not None:
+        ledger.record(stage, model, prompt, response, latency_s)
+
+
+if __name__ == "__main__":
+    # Example: python qix_prompts.py extracted_results/project.json
+    import sys
+
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            project = json.load(f)
+        pretty = estimate_tokens(json.dumps(project, indent=2))
+        print(f"{path}: indent=2 JSON ~{pretty} tokens, canonical ~{estimate_tokens(canonical_json(project))} tokens")
+        for prompt in (build_screening_prompt(project), build_positive_prompt(project), build_negative_prompt(project)):
+            print(f"  {prompt.stage}: ~{prompt.tokens} tokens (trimmed: {', '.join(prompt.trimmed) or 'none'})")
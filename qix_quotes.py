@@ -0,0 +1,229 @@
+import re
+import sys
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+
+# -----------------------------
+# Quote Verification Index
+# -----------------------------
+# The judge's extracted_quote and the pre-screener's evidence_found are meant to be exact quotes.
+# Each submission's page text is indexed by word trigrams, so every quote is matched to its best
+# page locally in well under a millisecond, without asking the model again.
+NGRAM_SIZE = 3
+VERIFIED_COVERAGE = 0.8
+PARAPHRASED_COVERAGE = 0.5
+MIN_QUOTE_WORDS = 3
+EXTRACTION_PAGE = 0  # pseudo-page holding the extracted JSON, which the judge may also quote
+
+# Statuses that are flagged in the report; only "unverified" quotes are sent back to the judge.
+FLAGGED_STATUSES = ("unverified", "misattributed")
+
+# Only explicit citations count: "P1"-"P5" are triage acuity codes throughout these submissions.
+_CITED_PAGE = re.compile(r"\(?\b(?:(?:p|pp|pg)\.|pages?|slides?)\s*(\d+)\)?", re.IGNORECASE)
+_QUOTED_SPAN = re.compile(r"[\"“”]([^\"“”]{12,}?)[\"“”]")
+_ELLIPSIS = re.compile(r"\.\.\.|…|\[\.\.\.\]")
+_NO_QUOTE = re.compile(r"^\W*(n/?a|none|nil|not applicable|no (?:quote|evidence)\b.*)?\W*$", re.IGNORECASE)
+_PUNCTUATION = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"', "–": "-", "—": "-"})
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lower-cased words with punctuation, quote styles and line-break hyphenation smoothed out."""
+    text = unicodedata.normalize("NFKC", text or "").translate(_PUNCTUATION).lower()
+    text = re.sub(r"(\w)-\s*\n\s*(\w)", r"\1\2", text)
+    return re.findall(r"[a-z0-9]+(?:[.,][0-9]+)?%?", text)
+
+
+def _ngrams(words: List[str], size: int = NGRAM_SIZE) -> List[Tuple[str, ...]]:
+    return [tuple(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class QuoteCheck:
+    def __init__(
+        self,
+        status: str,
+        page: Optional[int] = None,
+        cited_page: Optional[int] = None,
+        coverage: float = 0.0,
+        missing_figures: Optional[List[str]] = None,
+    ) -> None:
+        self.status = status  # verified, paraphrased, misattributed, unverified, no quote or unchecked
+        self.page = page
+        self.cited_page = cited_page
+        self.coverage = coverage
+        self.missing_figures = missing_figures or []  # figures quoted that the matching page does not give
+
+    @property
+    def flagged(self) -> bool:
+        return self.status in FLAGGED_STATUSES
+
+    @property
+    def label(self) -> str:
+        where = "extracted JSON" if self.page == EXTRACTION_PAGE else f"p.{self.page}"
+        if self.status == "verified":
+            return f"verified {where}"
+        if self.status == "paraphrased":
+            return f"paraphrased {where} ({self.coverage:.0%} match)"
+        if self.status == "misattributed":
+            return f"misattributed: cited p.{self.cited_page}, found {where}"
+        if self.status == "unverified" and self.missing_figures:
+            return f"unverified: {', '.join(self.missing_figures)} not on {where}"
+        if self.status == "unverified":
+            return f"unverified ({self.coverage:.0%} match)"
+        return self.status
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "page": self.page,
+            "cited_page": self.cited_page,
+            "coverage": self.coverage,
+            "missing_figures": self.missing_figures,
+        }
+
+
+class QuoteIndex:
+    """Inverted word-trigram index over one submission's pages (1-based) plus its extracted JSON (page 0)."""
+
+    def __init__(self, page_texts: List[str], extraction_text: str = "") -> None:
+        self.postings: Dict[Tuple[str, ...], set] = {}
+        self.page_words: Dict[int, str] = {}
+        pages = [(EXTRACTION_PAGE, extraction_text)] + list(enumerate(page_texts, start=1))
+        for page, text in pages:
+            words = normalize_words(text)
+            self.page_words[page] = f" {' '.join(words)} "
+            for gram in _ngrams(words):
+                self.postings.setdefault(gram, set()).add(page)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_words) - 1
+
+    def missing_figures(self, words: List[str], pages: List[int]) -> List[str]:
+        """Numbers in the quote that none of the pages give, with or without a percent sign."""
+        missing = []
+        for word in words:
+            figure = word.rstrip("%")
+            if not any(ch.isdigit() for ch in figure) or word in missing:
+                continue
+            if not any(f" {figure} " in self.page_words[page] or f" {figure}% " in self.page_words[page] for page in pages):
+                missing.append(word)
+        return missing
+
+    def coverage_by_page(self, words: List[str]) -> Tuple[Dict[int, float], float]:
+        """Share of the fragment's trigrams found on each page, and on any page at all."""
+        if len(words) < NGRAM_SIZE:
+            phrase = f" {' '.join(words)} "
+            hits = {page: 1.0 for page, text in self.page_words.items() if phrase in text}
+            return hits, 1.0 if hits else 0.0
+        grams = _ngrams(words)
+        counts: Dict[int, int] = {}
+        anywhere = 0
+        for gram in grams:
+            pages = self.postings.get(gram)
+            if pages:
+                anywhere += 1
+                for page in pages:
+                    counts[page] = counts.get(page, 0) + 1
+        return {page: count / len(grams) for page, count in counts.items()}, anywhere / len(grams)
+
+    def check(self, quote: str, quoted_spans_only: bool = False) -> QuoteCheck:
+        """
+        Matches a quote to the page it most likely came from. A quote may cite its page ("(p. 4)",
+        "Slide 4") and join fragments with an ellipsis. With quoted_spans_only, free-text evidence is
+        only checked where it puts text in quotation marks.
+        """
+        quote = quote or ""
+        # The citation is the last one given, usually trailing the quote in parentheses.
+        cited = None
+        for cited in _CITED_PAGE.finditer(quote):
+            pass
+        cited_page = int(cited.group(1)) if cited else None
+        if quoted_spans_only:
+            spans = _QUOTED_SPAN.findall(quote)
+            if not spans:
+                return QuoteCheck("no quote", cited_page=cited_page)
+            text = " ... ".join(spans)
+        else:
+            text = f"{quote[:cited.start()]} {quote[cited.end():]}" if cited else quote
+        if _NO_QUOTE.match(text):
+            return QuoteCheck("no quote", cited_page=cited_page)
+
+        fragments = [normalize_words(part) for part in _ELLIPSIS.split(text)]
+        fragments = [words for words in fragments if words]
+        total_words = sum(len(words) for words in fragments)
+        if total_words < MIN_QUOTE_WORDS:
+            return QuoteCheck("no quote", cited_page=cited_page)
+
+        # Weight each fragment by its length; a page's score is the weighted share it contains.
+        page_scores: Dict[int, float] = {}
+        anywhere = 0.0
+        for words in fragments:
+            by_page, fragment_anywhere = self.coverage_by_page(words)
+            weight = len(words) / total_words
+            anywhere += fragment_anywhere * weight
+            for page, coverage in by_page.items():
+                page_scores[page] = page_scores.get(page, 0.0) + coverage * weight
+
+        if not page_scores:
+            return QuoteCheck("unverified", cited_page=cited_page, coverage=0.0)
+        # Prefer a real page over the extracted JSON when both contain the quote equally well.
+        best_page = max(page_scores, key=lambda page: (round(page_scores[page], 2), page != EXTRACTION_PAGE))
+        best = page_scores[best_page]
+        # A quote that runs across a page break is judged on all pages together.
+        coverage = max(best, anywhere)
+
+        if coverage < PARAPHRASED_COVERAGE:
+            return QuoteCheck("unverified", best_page, cited_page, coverage)
+        # Most of the wording matching does not make a changed figure true. A quote running across a
+        # page break may take its figures from any page it overlaps.
+        pages = [best_page] if best >= coverage else [page for page in page_scores if page != EXTRACTION_PAGE]
+        missing = self.missing_figures([word for words in fragments for word in words], pages)
+        if missing:
+            return QuoteCheck("unverified", best_page, cited_page, coverage, missing)
+        if (
+            cited_page is not None
+            and best_page != EXTRACTION_PAGE
+            and cited_page != best_page
+            and page_scores.get(cited_page, 0.0) < PARAPHRASED_COVERAGE
+        ):
+            return QuoteCheck("misattributed", best_page, cited_page, coverage)
+        status = "verified" if coverage >= VERIFIED_COVERAGE else "paraphrased"
+        return QuoteCheck(status, best_page, cited_page, coverage)
+
+
+def annotate_quotes(
+    items: List[dict], index: Optional[QuoteIndex], field: str, quoted_spans_only: bool = False
+) -> None:
+    """Stores the check of item[field] as item["<field>_check"] on each item; "unchecked" without an index."""
+    for item in items:
+        if index is None:
+            check = QuoteCheck("unchecked")
+        else:
+            check = index.check(str(item.get(field) or ""), quoted_spans_only=quoted_spans_only)
+        item[f"{field}_check"] = {**check.to_dict(), "label": check.label}
+
+
+def check_label(item: dict, field: str) -> str:
+    return (item.get(f"{field}_check") or {}).get("label", "")
+
+
+def is_flagged(item: dict, field: str) -> bool:
+    return (item.get(f"{field}_check") or {}).get("status") in FLAGGED_STATUSES
+
+
+def is_unverified(item: dict, field: str) -> bool:
+    return (item.get(f"{field}_check") or {}).get("status") == "unverified"
+
+
+if __name__ == "__main__":
+    # Example: python qix_quotes.py submission.pdf "Patient treatment time improved by 71% (p. 8)"
+    import time
+
+    from qix_documents import extract_page_texts
+
+    index = QuoteIndex(extract_page_texts(sys.argv[1]))
+    for quote in sys.argv[2:]:
+        started = time.perf_counter()
+        result = index.check(quote)
+        print(f"{result.label:45} {(time.perf_counter() - started) * 1000:.2f} ms  {quote}")
@@ -0,0 +1,314 @@
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+
+# -----------------------------
+# Report Shards & Sheet Blocks
+# -----------------------------
+# Each project's rows across the per-project sheets form its shard. A shard is rendered once into
+# a block of finished worksheet XML rows, cached in the results store under the shard's digest, so
+# re-exporting a round after one project is re-graded only renders that project's block. The
+# workbook itself is a small openpyxl skeleton (headers, styles, widths) with the blocks spliced in.
+SUMMARY_HEADERS = [
+    "Project ID",
+    "PDF File",
+    "Project Title",
+    "Status",
+    "Eligibility",
+    "Level 4 Reason",
+    "AI Total Score",
+    "AI Label",
+    "Final Total Score",
+    "Final Label",
+    "Error",
+    "Grading Tier",
+    "Escalation Reason",
+    "Duplicate Of",
+    "Input Tokens",
+    "Output Tokens",
+    "Flagged Quotes",
+    "Grading Mode",
+]
+# Sheets made of per-project blocks, in workbook order after Summary.
+BLOCK_SHEETS = [
+    (
+        "Extraction",
+        [
+            "Project ID",
+            "PDF File",
+            "Project Title",
+            "Department",
+            "Category",
+            "Problem Statement",
+            "SMART Goals",
+            "Methodology",
+            "Key Results",
+            "Follow Up Plan",
+            "Error",
+        ],
+    ),
+    ("PreScreening", ["Project ID", "PDF File", "Eligible", "Primary Violation", "Violation Evidence", "Error"]),
+    ("PreScreening_Details", ["Project ID", "Criterion", "Violation Found", "Evidence", "Evidence Check"]),
+    (
+        "Grading_Details",
+        [
+            "Project ID",
+            "PDF File",
+            "Category",
+            "Max Score",
+            "AI Score",
+            "Human Score",
+            "Final Score",
+            "AI Justification",
+            "Extracted Quote",
+            "Quote Check",
+        ],
+    ),
+]
+DUPLICATE_HEADERS = ["Cluster", "Project ID", "PDF File", "Match Type", "Similarity", "Canonical Project ID"]
+GRADING_SHEET = "Grading_Details"
+BLOCK_FORMAT = 1  # bump when block rendering changes, so cached blocks are rendered again
+MAX_COLUMN_WIDTH = 80
+
+# Cached rows carry placeholders for their row number and cell style, which are only known when the
+# workbook is assembled. Both are control characters that cannot occur in worksheet XML text.
+ROW = "\x01"
+STYLE = "\x02"
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class Formula:
+    """A formula cell written with its result, so the workbook opens already computed."""
+
+    def __init__(self, text: str, result) -> None:
+        self.text = text  # without the leading "="; may use ROW for the cell's own row
+        self.result = result
+
+
+def column_letter(index: int) -> str:
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _escape(text: str) -> str:
+    # xml.sax.saxutils.escape would import urllib and http.client at startup for three replacements.
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _text(value) -> str:
+    return _escape(_ILLEGAL_XML.sub("", str(value)))
+
+
+def _cell(column: str, value) -> str:
+    ref = f'r="{column}{ROW}" s="{STYLE}"'
+    if isinstance(value, Formula):
+        result = value.result
+        formula = f"<f>{_escape(value.text)}</f>"
+        if isinstance(result, str):
+            return f'<c {ref} t="str">{formula}<v>{_text(result)}</v></c>'
+        return f"<c {ref}>{formula}<v>{'' if result is None else result}</v></c>"
+    if isinstance(value, bool):
+        return f'<c {ref} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c {ref}><v>{value!r}</v></c>"
+    return f'<c {ref} t="inlineStr"><is><t xml:space="preserve">{_text(value)}</t></is></c>'
+
+
+def _width(value) -> int:
+    if isinstance(value, Formula):
+        return len(value.text.replace(ROW, "999")) + 1
+    return len(str(value))
+
+
+def render_rows(rows: List[List]) -> Tuple[List[str], List[int]]:
+    """Worksheet XML for each row, with ROW and STYLE placeholders, and the widest value of each column."""
+    templates = []
+    widths: List[int] = []
+    for row in rows:
+        cells = []
+        for index, value in enumerate(row, start=1):
+            if value is None or value == "":
+                continue
+            cells.append(_cell(column_letter(index), value))
+            if index > len(widths):
+                widths.extend([0] * (index - len(widths)))
+            widths[index - 1] = max(widths[index - 1], _width(value))
+        templates.append(f'<row r="{ROW}">{"".join(cells)}</row>')
+    return templates, widths
+
+
+def final_score(row: List) -> int:
+    """Final score of a Grading_Details row: the human score when one was entered, otherwise the AI score."""
+    return row[5] if row[5] not in ("", None) else (row[4] or 0)
+
+
+def shard_rows(
+    summary_entries: List[dict],
+    extraction_rows: List[List],
+    prescreen_summary_rows: List[List],
+    prescreen_detail_rows: List[List],
+    grading_detail_rows: List[List],
+) -> Dict[str, dict]:
+    """Splits a run's report rows into one shard per project, in Summary order; every row starts with its project ID."""
+    shards: Dict[str, dict] = {}
+
+    def shard(project_id: str) -> dict:
+        if project_id not in shards:
+            shards[project_id] = {"summary": None, **{sheet: [] for sheet, _ in BLOCK_SHEETS}}
+        return shards[project_id]
+
+    for entry in summary_entries:
+        shard(entry.get("project_id"))["summary"] = entry
+    sheet_rows = zip(
+        [sheet for sheet, _ in BLOCK_SHEETS],
+        [extraction_rows, prescreen_summary_rows, prescreen_detail_rows, grading_detail_rows],
+    )
+    for sheet, rows in sheet_rows:
+        for row in rows:
+            shard(row[0])[sheet].append(list(row))
+    return shards
+
+
+def shard_digest(shard: dict) -> str:
+    """Digest of the rows a shard's block is rendered from; Summary rows are rendered on every export."""
+    payload = json.dumps(
+        [BLOCK_FORMAT] + [shard[sheet] for sheet, _ in BLOCK_SHEETS], sort_keys=True, default=str, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_block(shard: dict) -> dict:
+    """A project's rows on every block sheet as worksheet XML, with column widths and Final Scores."""
+    block = {"sheets": {}, "final_scores": [final_score(row) for row in shard[GRADING_SHEET]]}
+    for sheet, _ in BLOCK_SHEETS:
+        rows = shard[sheet]
+        if sheet == GRADING_SHEET:
+            rows = [
+                row[:6] + [Formula(f'IF(F{ROW}="",E{ROW},F{ROW})', score)] + row[7:]
+                for row, score in zip(rows, block["final_scores"])
+            ]
+        templates, widths = render_rows(rows)
+        block["sheets"][sheet] = {"rows": templates, "widths": widths}
+    return block
+
+
+def blocks_for(shards: Dict[str, dict], cached: Optional[Dict[str, tuple]] = None) -> Tuple[Dict[str, tuple], int]:
+    """(digest, block) for every shard, reusing cached blocks whose digest still matches; and how many were rendered."""
+    blocks = {}
+    rendered = 0
+    for project_id, shard in shards.items():
+        digest = shard_digest(shard)
+        hit = (cached or {}).get(project_id)
+        if hit is not None and hit[0] == digest:
+            blocks[project_id] = hit
+        else:
+            blocks[project_id] = (digest, render_block(shard))
+            rendered += 1
+    return blocks, rendered
+
+
+# -----------------------------
+# Workbook Assembly
+# -----------------------------
+class SheetRows:
+    """Rows of one sheet as they are assembled: XML templates in order and the widest value per column."""
+
+    def __init__(self, headers: List[str]) -> None:
+        self.headers = headers
+        self.templates: List[str] = []
+        self.widths = [len(header) for header in headers]
+
+    def extend(self, templates: List[str], widths: List[int]) -> None:
+        self.templates.extend(templates)
+        if len(widths) > len(self.widths):
+            self.widths.extend([0] * (len(widths) - len(self.widths)))
+        for index, width in enumerate(widths):
+            self.widths[index] = max(self.widths[index], width)
+
+    def add(self, rows: List[List]) -> None:
+        self.extend(*render_rows(rows))
+
+    def xml(self, style: int) -> str:
+        rows = "".join(template.replace(ROW, str(row_idx)) for row_idx, template in enumerate(self.templates, start=2))
+        return rows.replace(STYLE, str(style))
+
+
+def write_workbook(path: str, sheets: Dict[str, SheetRows], identifier: str = "") -> None:
+    """
+    Writes the sheets, in order, as an .xlsx: openpyxl lays out the headers, styles, frozen header
+    row and column widths, and the data rows are spliced into each sheet's XML as they are. The file
+    is written next to path and moved into place, so a failed export leaves the old report intact.
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Font
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    wrap_style = 0
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        ws.append(rows.headers)
+        for cell in ws[1]:
+            cell.font = Font(bold=True)
+        ws.freeze_panes = "A2"
+        for index, width in enumerate(rows.widths, start=1):
+            ws.column_dimensions[column_letter(index)].width = min(width + 2, MAX_COLUMN_WIDTH)
+        if not wrap_style:
+            # Registers the data row style with the workbook; the probe row itself is not kept.
+            probe = ws.cell(row=2, column=1)
+            probe.alignment = Alignment(wrap_text=True, vertical="top")
+            wrap_style = probe.style_id
+            ws.delete_rows(2)
+    if identifier:
+        wb.properties.identifier = identifier
+    # Excel still recalculates dependents when a Human Score is edited; it just skips the full pass on open.
+    wb.calculation.fullCalcOnLoad = False
+    skeleton = io.BytesIO()
+    wb.save(skeleton)
+
+    sheet_rows = list(sheets.values())
+    temp_fd, temp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(path)))
+    os.close(temp_fd)
+    try:
+        with zipfile.ZipFile(skeleton) as source, zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as target:
+            for item in source.infolist():
+                data = source.read(item.filename)
+                match = re.fullmatch(r"xl/worksheets/sheet(\d+)\.xml", item.filename)
+                if match:
+                    rows = sheet_rows[int(match.group(1)) - 1]
+                    xml = data.decode("utf-8")
+                    last = f"{column_letter(max(len(rows.widths), 1))}{len(rows.templates) + 1}"
+                    xml = re.sub(r'<dimension ref="[^"]*"\s*/>', f'<dimension ref="A1:{last}"/>', xml, count=1)
+                    xml = xml.replace("</sheetData>", rows.xml(wrap_style) + "</sheetData>", 1)
+                    data = xml.encode("utf-8")
+                target.writestr(item, data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+if __name__ == "__main__":
+    # Example: python qix_report.py qix_results.db 12 report.xlsx   (times a cold and a cached export)
+    import time
+
+    from nuh_qix_pipeline import export_excel
+    from qix_store import ResultsStore
+
+    store = ResultsStore(sys.argv[1] if len(sys.argv) > 1 else "./qix_results.db")
+    run_id = int(sys.argv[2]) if len(sys.argv) > 2 else store.latest_run_id()
+    output = sys.argv[3] if len(sys.argv) > 3 else "report_benchmark.xlsx"
+    for incremental in (False, True):
+        started = time.perf_counter()
+        export_excel(store, run_id, output, incremental=incremental)
+        print(f"{'cached' if incremental else 'cold'} export: {time.perf_counter() - started:.2f}s")
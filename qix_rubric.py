@@ -0,0 +1,187 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# -----------------------------
+# Rubric
+# -----------------------------
+# Scores per level follow the Process Improvement assessment guideline in "QIX Evaluation Criteria.pdf".
+FULL_RUBRIC = """
+Assessment Score (Minimum): Outstanding-85; Merit-70; Recognition - 50
+
+1. Header (Max Score: 5)
+- Below Expectations (1): The Meet Expectations criteria are not satisfied.
+- Meet Expectations (3): Are appropriate team members, leader & sponsor identified to participate?
+- Above Expectations (5): Does the title clearly explain the goal of the project?
+
+2. Background (Max Score: 10)
+- Below Expectations (3): The Meet Expectations criteria are not satisfied.
+- Meet Expectations (6): Is the nature of the problem clearly explained? Is the problem worthwhile resolving? Is the scope clearly defined and manageable for the Improvement Sprints /project length?
+- Above Expectations (10): Is appropriate data collected and presented to quantify and understand the problem?
+
+3. Goal (Max Score: 5)
+- Below Expectations (1): The Meet Expectations criteria are not satisfied.
+- Meet Expectations (3): Is the goal SMART? (Specific, measurable, achievable, realistic & time based)
+- Above Expectations (5): Is the goal linked to NUH / department objectives and to the problem defined?
+
+4. Problem Analysis (Max Score: 20)
+- Below Expectations (6): The Meet Expectations criteria are not satisfied.
+- Meet Expectations (12): Are the appropriate lean / PDCA tools applied to analyze the problems? Does the analysis link back to the problem and goals?
+- Above Expectations (20): Are the root causes and main delays/bottlenecks of the problem well identified?
+
+5. Implementation Plan (Max Score: 20)
+- Below Expectations (6): The Meet Expectations criteria are not satisfied.
+- Meet Expectations (12): Do the solutions and implementation plan directly address the root causes of problems? Is the implementation plan clear and timely? Does it include specific what, who & when?
+- Above Expectations (20): For Improvement Sprints, was a rapid experiment carried out and were insights gained from it? Were some changes started immediately during the event or the next week?
+
+6. Benefits / Results (Max Score: 30)
+- Below Expectations (10): The Meet Expectations criteria are not satisfied.
+- Meet Expectations (20): Is there a clear significant improvement? Do the results match the goal? Are the benefits quantified? Are there intangible results? Are clear charts used to show results/improvement? Are dips explained?
+- Above Expectations (30): Are the results sustained over the time? (Ideally show results >= 3 months)
+
+7. Follow-up, Spread & Insights (Max Score: 10)
+- Below Expectations (3): The Meet Expectations criteria are not satisfied.
+- Meet Expectations (6): Has the team created a plan to overcome any outstanding or potential issues? Has the team created and/or implemented an effective plan to spread the project?
+- Above Expectations (10): Has reflection taken place and insights / lessons learned been identified?
+""".strip()
+
+_CATEGORY_LINE = re.compile(r"^(\d+)\.\s+(.+?)\s+\(Max Score:\s*(\d+)\)$")
+_LEVEL_LINE = re.compile(r"^-\s+(Below|Meet|Above) Expectations\s+\((\d+)\):")
+
+
+def _name_key(text: str) -> str:
+    return re.sub(r"[^a-z]", "", re.sub(r"^\s*\d+\s*[.)]?", "", text.lower()))
+
+
+class RubricCategory:
+    def __init__(self, number: int, name: str, max_score: int, text: str) -> None:
+        self.number = number
+        self.name = name
+        self.max_score = max_score
+        self.text = text
+        self.levels: Dict[str, int] = {}
+
+    @property
+    def label(self) -> str:
+        return f"{self.number}. {self.name}"
+
+    @property
+    def scores(self) -> List[int]:
+        return sorted(self.levels.values())
+
+
+def parse_rubric(text: str) -> List[RubricCategory]:
+    """Parses the rubric text into categories with their discrete level scores, checking it adds up to 100."""
+    categories: List[RubricCategory] = []
+    for line in text.splitlines():
+        line = line.strip()
+        category_match = _CATEGORY_LINE.match(line)
+        if category_match:
+            number, name, max_score = category_match.groups()
+            categories.append(RubricCategory(int(number), name, int(max_score), line))
+            continue
+        level_match = _LEVEL_LINE.match(line)
+        if level_match and categories:
+            categories[-1].levels[level_match.group(1)] = int(level_match.group(2))
+            categories[-1].text += "\n" + line
+
+    for category in categories:
+        if not category.levels or max(category.levels.values()) != category.max_score:
+            raise ValueError(
+                f"Rubric category '{category.label}' has levels {category.levels} for max {category.max_score}"
+            )
+    if sum(category.max_score for category in categories) != 100:
+        raise ValueError("Rubric category maximums do not add up to 100")
+    return categories
+
+
+RUBRIC = parse_rubric(FULL_RUBRIC)
+
+# Assessment Score (Minimum) from the rubric above.
+LABEL_THRESHOLDS = [(85, "Outstanding"), (70, "Merit"), (50, "Recognition")]
+
+
+def score_to_label(total_score: int) -> str:
+    for threshold, label in LABEL_THRESHOLDS:
+        if total_score >= threshold:
+            return label
+    return "Below Recognition"
+
+
+def find_category(label: str, rubric: List[RubricCategory] = RUBRIC) -> Optional[RubricCategory]:
+    """Matches a judge's category label by name ("Benefits/Results", "6. Benefits / Results"), then by number."""
+    key = _name_key(str(label))
+    if key:
+        for category in rubric:
+            category_key = _name_key(category.name)
+            if category_key.startswith(key) or key.startswith(category_key):
+                return category
+    number = re.match(r"^\s*(\d+)", str(label))
+    if number:
+        for category in rubric:
+            if category.number == int(number.group(1)):
+                return category
+    return None
+
+
+# Categories whose evidence lives in the submission's charts; their evidence checks can be sent
+# the rendered chart pages instead of the whole PDF.
+CHART_EVIDENCE_CATEGORIES = (find_category("Benefits / Results").label,)
+
+
+# -----------------------------
+# Judge Output Validation
+# -----------------------------
+def validate_assessments(
+    assessments, rubric: List[RubricCategory] = RUBRIC, expected: Optional[List[RubricCategory]] = None
+) -> Tuple[List[dict], Dict[str, str]]:
+    """
+    Checks a judge's assessments against the rubric. Returns the valid items, normalised to the
+    rubric's category label and max_score, and a problem description per offending category.
+    A category is offending if it is missing, repeated, or scored outside its discrete levels.
+    """
+    expected = expected if expected is not None else rubric
+    if not isinstance(assessments, list):
+        return [], {category.label: "no assessment was returned" for category in expected}
+
+    by_category: Dict[str, List[dict]] = {}
+    for item in assessments:
+        category = find_category(item.get("category", ""), rubric) if isinstance(item, dict) else None
+        if category is not None:
+            by_category.setdefault(category.label, []).append(item)
+
+    valid: List[dict] = []
+    problems: Dict[str, str] = {}
+    for category in expected:
+        items = by_category.get(category.label, [])
+        if not items:
+            problems[category.label] = "the category was missing"
+            continue
+        if len(items) > 1:
+            problems[category.label] = f"the category was scored {len(items)} times"
+            continue
+        item = dict(items[0])
+        try:
+            score = int(item.get("ai_score"))
+        except (TypeError, ValueError):
+            problems[category.label] = f"ai_score {item.get('ai_score')!r} is not an integer"
+            continue
+        if score not in category.scores:
+            allowed = ", ".join(str(s) for s in category.scores)
+            problems[category.label] = f"ai_score {score} is not one of the allowed scores ({allowed})"
+            continue
+        item.update(category=category.label, max_score=category.max_score, ai_score=score)
+        valid.append(item)
+    return valid, problems
+
+
+def merge_assessments(valid: List[dict], repaired: List[dict], rubric: List[RubricCategory] = RUBRIC) -> List[dict]:
+    """Combines two sets of validated items into rubric order, preferring the repaired ones."""
+    by_label = {item["category"]: item for item in valid}
+    by_label.update({item["category"]: item for item in repaired})
+    return [by_label[category.label] for category in rubric if category.label in by_label]
+
+
+if __name__ == "__main__":
+    for category in RUBRIC:
+        print(f"{category.label}: max {category.max_score}, allowed scores {category.scores}")
@@ -0,0 +1,256 @@
+import fnmatch
+import heapq
+import os
+import re
+import threading
+import zipfile
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from qix_profile import span
+
+
+# -----------------------------
+# Memory-Budgeted Admission
+# -----------------------------
+DEFAULT_MEMORY_BUDGET_MB = 512
+MB = 1024 * 1024
+
+
+def format_mb(nbytes: int) -> str:
+    return f"{nbytes / MB:.1f} MB"
+
+
+class MemoryBudget:
+    """
+    Admits API requests only while the estimated bytes held by in-flight requests fit the budget.
+    A request larger than the whole budget is still admitted once nothing else is in flight,
+    so an oversized submission slows the run down instead of deadlocking it.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_MEMORY_BUDGET_MB * MB) -> None:
+        self.budget_bytes = budget_bytes
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._by_project: Dict[str, int] = {}
+        self.peak_in_flight = 0
+        self.stage_peaks: Dict[str, int] = {}
+        self.stage_concurrent_peaks: Dict[str, int] = {}
+        self.waits = 0
+
+    @contextmanager
+    def reserve(self, stage: str, project_id: str, nbytes: int):
+        with self._condition:
+            if self._in_flight and self._in_flight + nbytes > self.budget_bytes:
+                self.waits += 1
+                with span("memory_wait", "wait", stage=stage):
+                    self._condition.wait_for(lambda: not self._in_flight or self._in_flight + nbytes <= self.budget_bytes)
+            self._in_flight += nbytes
+            self._by_project[project_id] = self._by_project.get(project_id, 0) + nbytes
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+            self.stage_peaks[stage] = max(self.stage_peaks.get(stage, 0), nbytes)
+            self.stage_concurrent_peaks[stage] = max(self.stage_concurrent_peaks.get(stage, 0), self._in_flight)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= nbytes
+                self._by_project[project_id] -= nbytes
+                if not self._by_project[project_id]:
+                    del self._by_project[project_id]
+                self._condition.notify_all()
+
+    def in_flight_by_project(self) -> Dict[str, int]:
+        with self._condition:
+            return dict(self._by_project)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "peak_in_flight_bytes": self.peak_in_flight,
+                "admission_waits": self.waits,
+                "stages": {
+                    stage: {
+                        "peak_request_bytes": self.stage_peaks[stage],
+                        "peak_in_flight_bytes": self.stage_concurrent_peaks[stage],
+                    }
+                    for stage in self.stage_peaks
+                },
+            }
+
+
+def process_peak_rss_bytes() -> int:
+    """Peak resident set size of this process, or 0 where the platform does not report it."""
+    try:
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return 0
+
+
+# -----------------------------
+# Size-Aware Project Ordering
+# -----------------------------
+# Rough seconds of API time per unit. Every project pays a fixed overhead for its calls, each page
+# is read by the model as an image, and embedded images add upload and decode time. Only the
+# relative order of the estimates matters for shortest-job-first.
+BASE_COST_S = 20.0
+PAGE_COST_S = 1.5
+MB_COST_S = 2.0
+IMAGE_MB_COST_S = 3.0
+SCHEDULE_POLICIES = ("sjf", "fifo")
+
+_RAW_PAGE = re.compile(rb"/Type\s*/Page(?!s)")
+_RAW_IMAGE = re.compile(rb"/Subtype\s*/Image")
+
+
+class JobEstimate:
+    def __init__(self, path: str, pages: int, size_bytes: int, image_bytes: int, priority: int = 0) -> None:
+        self.path = path
+        self.pages = pages
+        self.size_bytes = size_bytes
+        self.image_bytes = image_bytes
+        self.priority = priority
+
+    @property
+    def image_density(self) -> float:
+        return self.image_bytes / self.size_bytes if self.size_bytes else 0.0
+
+    @property
+    def cost(self) -> float:
+        """Expected processing time in seconds."""
+        return (
+            BASE_COST_S
+            + PAGE_COST_S * self.pages
+            + MB_COST_S * self.size_bytes / MB
+            + IMAGE_MB_COST_S * self.image_bytes / MB
+        )
+
+
+def _pdf_layout(path: str):
+    """Page count and bytes of embedded images, read with pypdf without decoding any image."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    seen = set()
+    image_bytes = 0
+    # Images can sit in a page's resources or inside form XObjects drawn on it.
+    pending = [page.get("/Resources") for page in reader.pages]
+    while pending:
+        resources = pending.pop()
+        xobjects = resources.get_object().get("/XObject") if resources is not None else None
+        if xobjects is None:
+            continue
+        for ref in xobjects.get_object().values():
+            key = getattr(ref, "idnum", id(ref))
+            if key in seen:
+                continue
+            seen.add(key)
+            xobject = ref.get_object()
+            if xobject.get("/Subtype") == "/Image":
+                # pypdf keeps the still-encoded stream, so this is its compressed size.
+                image_bytes += len(getattr(xobject, "_data", b"") or b"")
+            elif xobject.get("/Subtype") == "/Form":
+                pending.append(xobject.get("/Resources"))
+    return len(reader.pages), image_bytes
+
+
+def _pptx_layout(path: str):
+    """Slide count and bytes of the package that are sent; slide media is not read, so it does not count."""
+    with zipfile.ZipFile(path) as package:
+        infos = package.infolist()
+    slides = sum(1 for info in infos if re.match(r"ppt/slides/slide\d+\.xml$", info.filename))
+    media = sum(info.compress_size for info in infos if info.filename.startswith("ppt/media/"))
+    return max(slides, 1), os.path.getsize(path) - media
+
+
+def estimate_job(path: str, priority: int = 0) -> JobEstimate:
+    """Estimates a submission's cost from its page count, file size and image density, all read locally."""
+    if path.lower().endswith(".pptx"):
+        pages, size = _pptx_layout(path)
+        return JobEstimate(path, pages, size, 0, priority)
+    size = os.path.getsize(path)
+    try:
+        pages, image_bytes = _pdf_layout(path)
+    except Exception:
+        # Without pypdf (or for a damaged file) count page and image objects in the raw bytes, and
+        # assume images make up the same share of the file as they do of a typical scanned deck.
+        with open(path, "rb") as f:
+            data = f.read()
+        pages = max(len(_RAW_PAGE.findall(data)), 1)
+        image_bytes = size // 2 if _RAW_IMAGE.search(data) else 0
+    return JobEstimate(path, pages, size, image_bytes, priority)
+
+
+def parse_priorities(values: Optional[List[str]]) -> List[tuple]:
+    """Parses --priority values "GLOB" or "GLOB=N" into (glob, level) pairs; a bare glob gets level 1."""
+    rules = []
+    for value in values or []:
+        pattern, _, level = value.rpartition("=") if re.search(r"=-?\d+$", value) else (value, "", "1")
+        rules.append((pattern, int(level)))
+    return rules
+
+
+def priority_for(path: str, rules: List[tuple]) -> int:
+    name = os.path.basename(path)
+    return max((level for pattern, level in rules if fnmatch.fnmatch(name, pattern)), default=0)
+
+
+def order_jobs(jobs: List[JobEstimate], policy: str = "sjf") -> List[JobEstimate]:
+    """
+    Higher priorities always go first. Within a priority, "sjf" runs the shortest expected job
+    first, which minimises mean completion time; "fifo" keeps the given (file name) order.
+    """
+    if policy not in SCHEDULE_POLICIES:
+        raise ValueError(f"Unknown schedule policy {policy!r}; expected one of {SCHEDULE_POLICIES}")
+    positions = {id(job): i for i, job in enumerate(jobs)}
+    if policy == "fifo":
+        return sorted(jobs, key=lambda job: (-job.priority, positions[id(job)]))
+    return sorted(jobs, key=lambda job: (-job.priority, job.cost, positions[id(job)]))
+
+
+def simulate_completion(durations: List[float], workers: int) -> List[float]:
+    """Completion time of each job when run in the given order on `workers` parallel workers."""
+    free_at = [0.0] * max(1, workers)
+    completions = []
+    for duration in durations:
+        start = heapq.heappop(free_at)
+        heapq.heappush(free_at, start + duration)
+        completions.append(start + duration)
+    return completions
+
+
+def compare_with_fifo(ordered: List[str], fifo: List[str], durations: Dict[str, float], workers: int) -> dict:
+    """Mean and max completion times of the order used against FIFO order, replayed on the same job durations."""
+    def summary(order: List[str]) -> dict:
+        completions = simulate_completion([durations[path] for path in order if path in durations], workers)
+        if not completions:
+            return {"mean_s": 0.0, "max_s": 0.0}
+        return {"mean_s": sum(completions) / len(completions), "max_s": max(completions)}
+
+    return {"scheduled": summary(ordered), "fifo": summary(fifo)}
+
+
+if __name__ == "__main__":
+    # Example: python qix_scheduler.py ./project 4
+    import sys
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else "./project"
+    worker_count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    pdfs = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(".pdf"))
+    estimates = [estimate_job(path) for path in pdfs]
+    for job in order_jobs(estimates):
+        print(
+            f"{job.cost:6.1f}s  {job.pages:3d} pages  {format_mb(job.size_bytes):>9}  "
+            f"images {job.image_density:4.0%}  {os.path.basename(job.path)}"
+        )
+    expected = {job.path: job.cost for job in estimates}
+    result = compare_with_fifo([job.path for job in order_jobs(estimates)], pdfs, expected, worker_count)
+    print(
+        f"Expected on {worker_count} workers: SJF mean {result['scheduled']['mean_s']:.0f}s / max "
+        f"{result['scheduled']['max_s']:.0f}s, FIFO mean {result['fifo']['mean_s']:.0f}s / max {result['fifo']['max_s']:.0f}s"
+    )
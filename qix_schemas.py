@@ -0,0 +1,46 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+# -----------------------------
+# Structured Output Schemas
+# -----------------------------
+# Kept in their own module so that importing the pipeline does not load pydantic.
+class ProjectExtraction(BaseModel):
+    project_title: str = Field(description="The title of the quality improvement project.")
+    department: str = Field(description="The hospital department submitting the project.")
+    category: str = Field(description="The framework category: 6S, Process Excellence, or Service Experience.")
+    problem_statement: str = Field(description="The core problem or initial state being addressed.")
+    smart_goals: str = Field(description="Specific, measurable, achievable, realistic, and time-bound goals.")
+    methodology: List[str] = Field(description="List of Lean, Design Thinking, or PDCA tools applied.")
+    key_results: str = Field(description="Quantitative and qualitative benefits, financial savings, or sustained improvements extracted.")
+    follow_up_plan: str = Field(description="Plans to sustain the results or spread the implementation to other departments.")
+
+
+class PackedProjectExtraction(ProjectExtraction):
+    document_id: str = Field(description="The ID of the document this extraction comes from, e.g. DOC-1.")
+
+
+class PackedExtraction(BaseModel):
+    extractions: List[PackedProjectExtraction]
+
+
+class ScreeningCheck(BaseModel):
+    criterion: str = Field(description="The Level-4 exclusion rule being evaluated.")
+    violation_found: bool = Field(description="True if the project meets this exclusion criteria.")
+    evidence_found: str = Field(description="Specific evidence from the PDF or JSON justifying the decision.")
+
+
+class CriterionCheck(ScreeningCheck):
+    confidence: float = Field(description="Certainty of the decision given the evidence, from 0 to 1.")
+
+
+class CriterionScreening(BaseModel):
+    checks: List[CriterionCheck]
+
+
+class ScreeningResult(BaseModel):
+    is_eligible: bool = Field(description="Overall eligibility. True if NO violations are found.")
+    primary_violation: str = Field(description="The specific rule that failed, or 'None'.")
+    detailed_audit: List[ScreeningCheck]
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Tuple
+
+from qix_store import DEFAULT_DB_PATH, ResultsStore
+
+
+# -----------------------------
+# Sharded Runs (--shard i/N)
+# -----------------------------
+# A project's shard depends only on its file name, so every node agrees on the partition
+# whatever order its file system lists the folder in.
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parses "2/4" into (2, 4); shards are numbered from 1."""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", value or "")
+    if not match:
+        raise ValueError(f"--shard expects i/N, e.g. 1/4, got {value!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"--shard {value}: i must be between 1 and N")
+    return index, count
+
+
+def shard_of(key: str, count: int) -> int:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return int(digest[:16], 16) % count + 1
+
+
+def round_digest(project_ids: List[str]) -> str:
+    """Identifies the full set of submissions in a round, so shards of different rounds are never merged."""
+    return hashlib.sha256("\n".join(sorted(project_ids)).encode("utf-8")).hexdigest()[:16]
+
+
+def shard_db_path(db_path: str, index: int, count: int) -> str:
+    base, ext = os.path.splitext(db_path)
+    return f"{base}.shard{index}of{count}{ext or '.db'}"
+
+
+def assign_shard(project_ids: Dict[str, str], duplicate_of: Dict[str, str], index: int, count: int) -> List[str]:
+    """
+    Paths (keys of project_ids) that belong to shard index of count. A duplicate follows its
+    canonical project, so it can copy that result on the same node exactly as a single-node run does.
+    """
+    return [
+        path
+        for path, project_id in project_ids.items()
+        if shard_of(duplicate_of.get(path) or project_id, count) == index
+    ]
+
+
+# -----------------------------
+# Merging Shards
+# -----------------------------
+def _shard_run(store: ResultsStore, path: str) -> Tuple[int, dict]:
+    """The most recent sharded run in a shard's store, which must have finished."""
+    rows = store.connection().execute(
+        "SELECT run_id, finished_at, config_json, metrics_json FROM runs ORDER BY run_id DESC"
+    ).fetchall()
+    for row in rows:
+        if not json.loads(row["config_json"] or "{}").get("shard"):
+            continue
+        metrics = json.loads(row["metrics_json"] or "{}")
+        if row["finished_at"] is None or "shard" not in metrics:
+            raise ValueError(f"{path}: shard run {row['run_id']} never finished; rerun that shard first")
+        return row["run_id"], metrics
+    raise ValueError(f"{path} holds no sharded run")
+
+
+def merge_shards(store: ResultsStore, shard_paths: List[str]) -> int:
+    """
+    Copies the finished runs of every shard store into one new run of store and returns its id.
+    Refuses to merge unless the shards come from the same round, every shard 1..N is present
+    exactly once, and together they cover each project of the round exactly once.
+    """
+    shards = []
+    for path in shard_paths:
+        if not os.path.exists(path):
+            raise ValueError(f"Shard store not found: {path}")
+        shard_store = ResultsStore(path)
+        run_id, metrics = _shard_run(shard_store, path)
+        config = json.loads(
+            shard_store.connection().execute("SELECT config_json FROM runs WHERE run_id = ?", (run_id,)).fetchone()[0]
+            or "{}"
+        )
+        shards.append((path, run_id, metrics["shard"], metrics, config))
+
+    problems = []
+    counts = {info["count"] for _, _, info, _, _ in shards}
+    digests = {info["round"] for _, _, info, _, _ in shards}
+    if len(counts) > 1:
+        problems.append(f"shards disagree on N: {sorted(counts)}")
+    if len(digests) > 1:
+        problems.append("shards come from different rounds (their submission lists differ)")
+    count = max(counts)
+
+    by_index: Dict[int, List[str]] = {}
+    for path, _, info, _, _ in shards:
+        by_index.setdefault(info["index"], []).append(path)
+    for index, paths in sorted(by_index.items()):
+        if len(paths) > 1:
+            problems.append(f"shard {index}/{count} given more than once: {', '.join(paths)}")
+    missing = [str(index) for index in range(1, count + 1) if index not in by_index]
+    if missing:
+        problems.append(f"missing shard(s) {', '.join(missing)} of {count}")
+
+    expected = shards[0][2]["round_size"]
+    if not problems:
+        seen: Dict[str, str] = {}
+        for path, _, info, _, _ in shards:
+            for project_id in info["projects"]:
+                if project_id in seen:
+                    problems.append(f"{project_id} appears in both {seen[project_id]} and {path}")
+                seen[project_id] = path
+        if len(seen) != expected:
+            problems.append(f"shards cover {len(seen)} of the round's {expected} submissions")
+    if problems:
+        raise ValueError("Cannot merge shards: " + "; ".join(problems))
+
+    shards.sort(key=lambda shard: shard[2]["index"])
+    config = dict(shards[0][4], shard=None, db=store.db_path)
+    config["merged_from"] = [os.path.abspath(path) for path, _, _, _, _ in shards]
+    run_id = store.start_run(config)
+    for path, shard_run_id, info, _, _ in shards:
+        store.import_run(path, shard_run_id, run_id)
+        print(f"Merged shard {info['index']}/{count}: {len(info['projects'])} projects from {path}")
+
+    tokens = {
+        key: sum(metrics.get("tokens", {}).get(key, 0) or 0 for _, _, _, metrics, _ in shards)
+        for key in ("calls", "estimated_tokens", "prompt_tokens", "output_tokens", "latency_ms")
+    }
+    store.finish_run(
+        run_id,
+        {
+            "projects": expected,
+            "tokens": tokens,
+            # Shards cover disjoint projects, so their wall times combine into one map for qix_eval.
+            "project_seconds": {
+                project_id: seconds
+                for _, _, _, metrics, _ in shards
+                for project_id, seconds in (metrics.get("project_seconds") or {}).items()
+            },
+            "shards": {str(info["index"]): metrics for _, _, info, metrics, _ in shards},
+        },
+    )
+    return run_id
+
+
+if __name__ == "__main__":
+    # Example: python qix_shard.py results.shard1of2.db results.shard2of2.db
+    merged = ResultsStore(os.environ.get("QIX_DB", DEFAULT_DB_PATH))
+    print(f"Merged into run {merge_shards(merged, sys.argv[1:])}")
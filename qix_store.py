@@ -0,0 +1,806 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from qix_quotes import FLAGGED_STATUSES, check_label
+from qix_rubric import score_to_label
+
+
+# -----------------------------
+# Results Store (SQLite)
+# -----------------------------
+DEFAULT_DB_PATH = "./qix_results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    config_json TEXT,
+    metrics_json TEXT
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    project_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    project_hash TEXT,
+    pdf_file TEXT,
+    project_title TEXT,
+    department TEXT,
+    category TEXT,
+    status TEXT,
+    eligibility TEXT,
+    level4_reason TEXT,
+    ai_total_score INTEGER,
+    ai_label TEXT,
+    final_total_score INTEGER,
+    final_label TEXT,
+    grading_tier TEXT,
+    escalation_reason TEXT,
+    duplicate_of TEXT,
+    error TEXT,
+    grading_mode TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (run_id, project_id)
+);
+
+CREATE TABLE IF NOT EXISTS extractions (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    model TEXT,
+    data_json TEXT,
+    error TEXT,
+    PRIMARY KEY (run_id, project_id)
+);
+
+CREATE TABLE IF NOT EXISTS screenings (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    model TEXT,
+    is_eligible INTEGER,
+    primary_violation TEXT,
+    error TEXT,
+    PRIMARY KEY (run_id, project_id)
+);
+
+CREATE TABLE IF NOT EXISTS screening_checks (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    criterion TEXT,
+    violation_found INTEGER,
+    evidence_found TEXT,
+    evidence_check TEXT,
+    PRIMARY KEY (run_id, project_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS debate_arguments (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    model TEXT,
+    argument TEXT,
+    proposed_total INTEGER,
+    created_at TEXT,
+    PRIMARY KEY (run_id, project_id, role)
+);
+
+CREATE TABLE IF NOT EXISTS category_scores (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    category TEXT,
+    max_score INTEGER,
+    ai_score INTEGER,
+    ai_justification TEXT,
+    extracted_quote TEXT,
+    quote_check TEXT,
+    PRIMARY KEY (run_id, project_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS duplicate_matches (
+    run_id INTEGER NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    pdf_file TEXT,
+    match_type TEXT,
+    similarity REAL,
+    canonical_project_id TEXT,
+    PRIMARY KEY (run_id, project_id)
+);
+
+CREATE TABLE IF NOT EXISTS token_usage (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    call_index INTEGER NOT NULL,
+    stage TEXT,
+    model TEXT,
+    estimated_tokens INTEGER,
+    prompt_tokens INTEGER,
+    output_tokens INTEGER,
+    latency_ms INTEGER,
+    trimmed TEXT,
+    PRIMARY KEY (run_id, project_id, call_index)
+);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    project_hash TEXT NOT NULL,
+    step TEXT NOT NULL,
+    model TEXT,
+    payload_json TEXT,
+    created_at TEXT,
+    PRIMARY KEY (project_hash, step)
+);
+
+CREATE TABLE IF NOT EXISTS human_overrides (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    human_score REAL,
+    ai_score INTEGER,
+    conflict TEXT,
+    workbook_hash TEXT,
+    ingested_at TEXT,
+    PRIMARY KEY (run_id, project_id, category)
+);
+
+CREATE TABLE IF NOT EXISTS ingested_workbooks (
+    workbook_hash TEXT PRIMARY KEY,
+    path TEXT,
+    run_id INTEGER,
+    overrides INTEGER,
+    conflicts INTEGER,
+    ingested_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS dead_letters (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    position INTEGER,
+    pdf_path TEXT,
+    project_hash TEXT,
+    stage TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT,
+    updated_at TEXT,
+    resolved_at TEXT,
+    PRIMARY KEY (run_id, project_id)
+);
+
+-- Rendered report rows per project, keyed by the digest of the rows they were rendered from.
+CREATE TABLE IF NOT EXISTS report_blocks (
+    run_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    block_json TEXT NOT NULL,
+    rendered_at TEXT,
+    PRIMARY KEY (run_id, project_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_projects_hash ON projects(project_hash);
+DROP INDEX IF EXISTS idx_projects_department;
+CREATE INDEX IF NOT EXISTS idx_projects_department_nocase ON projects(department COLLATE NOCASE);
+DROP INDEX IF EXISTS idx_projects_label;
+CREATE INDEX IF NOT EXISTS idx_projects_run ON projects(run_id, position);
+"""
+
+PROJECT_FIELDS = [
+    "project_hash",
+    "pdf_file",
+    "project_title",
+    "department",
+    "category",
+    "status",
+    "eligibility",
+    "level4_reason",
+    "ai_total_score",
+    "ai_label",
+    "grading_tier",
+    "escalation_reason",
+    "duplicate_of",
+    "error",
+    "grading_mode",
+]
+
+# Columns added after the first release, created on stores that predate them.
+ADDED_COLUMNS = [
+    ("screening_checks", "evidence_check", "TEXT"),
+    ("category_scores", "quote_check", "TEXT"),
+    ("projects", "grading_mode", "TEXT"),
+    ("projects", "final_total_score", "INTEGER"),
+    ("projects", "final_label", "TEXT"),
+]
+
+# Indexes on added columns, created once the columns exist. find_projects filters on the final
+# label, which is NULL until a human override differs from the AI's grade.
+ADDED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_projects_final_label ON projects(COALESCE(final_label, ai_label))",
+]
+
+
+# Tables holding one run's per-project results, keyed by run_id.
+RUN_TABLES = (
+    "projects",
+    "extractions",
+    "screenings",
+    "screening_checks",
+    "debate_arguments",
+    "category_scores",
+    "duplicate_matches",
+    "token_usage",
+    "dead_letters",
+)
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _whole(value):
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+class ResultsStore:
+    """
+    Local SQLite store for every run's extractions, screenings, debates and scores.
+    Each thread gets its own connection; WAL mode lets concurrent workers write.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            for table, column, kind in ADDED_COLUMNS:
+                if column not in {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+            for statement in ADDED_INDEXES:
+                conn.execute(statement)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Writes ---------------------------------------------------------
+
+    def start_run(self, config: Optional[dict] = None) -> int:
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (started_at, config_json) VALUES (?, ?)",
+                (_now(), json.dumps(config or {}, sort_keys=True)),
+            )
+            return cursor.lastrowid
+
+    def finish_run(self, run_id: int, metrics: Optional[dict] = None) -> None:
+        with self.connection() as conn:
+            conn.execute(
+                "UPDATE runs SET finished_at = ?, metrics_json = ? WHERE run_id = ?",
+                (_now(), json.dumps(metrics or {}, sort_keys=True), run_id),
+            )
+            self._refresh_final_scores(conn, run_id)
+
+    def save_project(self, run_id: int, project_id: str, position: int, entry: dict) -> None:
+        values = [entry.get(field) if entry.get(field) != "" else None for field in PROJECT_FIELDS]
+        columns = ", ".join(PROJECT_FIELDS)
+        placeholders = ", ".join("?" for _ in PROJECT_FIELDS)
+        updates = ", ".join(f"{field} = excluded.{field}" for field in PROJECT_FIELDS)
+        with self.connection() as conn:
+            conn.execute(
+                f"INSERT INTO projects (run_id, project_id, position, updated_at, {columns}) "
+                f"VALUES (?, ?, ?, ?, {placeholders}) "
+                f"ON CONFLICT(run_id, project_id) DO UPDATE SET updated_at = excluded.updated_at, {updates}",
+                [run_id, project_id, position, _now()] + values,
+            )
+
+    def save_extraction(self, run_id: int, project_id: str, model: str, data: Optional[dict], error: str = "") -> None:
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (run_id, project_id, model, data_json, error) VALUES (?, ?, ?, ?, ?)",
+                (run_id, project_id, model, json.dumps(data) if data is not None else None, error or None),
+            )
+
+    def save_screening(
+        self,
+        run_id: int,
+        project_id: str,
+        model: str,
+        is_eligible: Optional[bool],
+        primary_violation: str,
+        checks: List[dict],
+        error: str = "",
+    ) -> None:
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO screenings (run_id, project_id, model, is_eligible, primary_violation, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, project_id, model, is_eligible, primary_violation or None, error or None),
+            )
+            conn.execute("DELETE FROM screening_checks WHERE run_id = ? AND project_id = ?", (run_id, project_id))
+            conn.executemany(
+                "INSERT INTO screening_checks "
+                "(run_id, project_id, position, criterion, violation_found, evidence_found, evidence_check) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        project_id,
+                        i,
+                        c.get("criterion"),
+                        c.get("violation_found"),
+                        c.get("evidence_found"),
+                        check_label(c, "evidence_found") or None,
+                    )
+                    for i, c in enumerate(checks)
+                ],
+            )
+
+    def save_debate_argument(
+        self, run_id: int, project_id: str, role: str, model: str, argument: str, proposed_total: Optional[int]
+    ) -> None:
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO debate_arguments "
+                "(run_id, project_id, role, model, argument, proposed_total, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, project_id, role, model, argument, proposed_total, _now()),
+            )
+
+    def save_category_scores(self, run_id: int, project_id: str, assessments: List[dict]) -> None:
+        with self.connection() as conn:
+            conn.execute("DELETE FROM category_scores WHERE run_id = ? AND project_id = ?", (run_id, project_id))
+            conn.executemany(
+                "INSERT INTO category_scores "
+                "(run_id, project_id, position, category, max_score, ai_score, ai_justification, extracted_quote, "
+                "quote_check) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        project_id,
+                        i,
+                        item.get("category"),
+                        item.get("max_score"),
+                        item.get("ai_score"),
+                        item.get("ai_justification"),
+                        item.get("extracted_quote"),
+                        check_label(item, "extracted_quote") or None,
+                    )
+                    for i, item in enumerate(assessments)
+                ],
+            )
+
+    def save_duplicate_rows(self, run_id: int, rows: List[List]) -> None:
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO duplicate_matches "
+                "(run_id, cluster_id, project_id, pdf_file, match_type, similarity, canonical_project_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [[run_id] + list(row) for row in rows],
+            )
+
+    def save_token_usage(self, run_id: int, project_id: str, calls: List[dict]) -> None:
+        with self.connection() as conn:
+            conn.execute("DELETE FROM token_usage WHERE run_id = ? AND project_id = ?", (run_id, project_id))
+            conn.executemany(
+                "INSERT INTO token_usage (run_id, project_id, call_index, stage, model, estimated_tokens, "
+                "prompt_tokens, output_tokens, latency_ms, trimmed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        project_id,
+                        i,
+                        call["stage"],
+                        call["model"],
+                        call["estimated_tokens"],
+                        call["prompt_tokens"],
+                        call["output_tokens"],
+                        call["latency_ms"],
+                        call["trimmed"] or None,
+                    )
+                    for i, call in enumerate(calls)
+                ],
+            )
+
+    def save_dead_letter(
+        self, run_id: int, project_id: str, position: int, pdf_path: str, project_hash: str, stage: str, error: str
+    ) -> None:
+        """Queues a failed project for a later retry, or records another failed attempt of a queued one."""
+        now = _now()
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO dead_letters "
+                "(run_id, project_id, position, pdf_path, project_hash, stage, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(run_id, project_id) DO UPDATE SET stage = excluded.stage, error = excluded.error, "
+                "pdf_path = excluded.pdf_path, project_hash = excluded.project_hash, "
+                "attempts = CASE WHEN resolved_at IS NULL THEN attempts + 1 ELSE 1 END, "
+                "updated_at = excluded.updated_at, resolved_at = NULL",
+                (run_id, project_id, position, pdf_path, project_hash or None, stage, error or None, now, now),
+            )
+
+    def resolve_dead_letter(self, run_id: int, project_id: str) -> bool:
+        """Marks a queued project as recovered; False if it was not waiting in the queue."""
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE dead_letters SET resolved_at = ? WHERE run_id = ? AND project_id = ? AND resolved_at IS NULL",
+                (_now(), run_id, project_id),
+            )
+            return cursor.rowcount > 0
+
+    def save_report_blocks(self, run_id: int, blocks: Dict[str, tuple], keep: Optional[set] = None) -> None:
+        """Caches rendered report blocks, (digest, block) by project; with keep, drops blocks of other projects."""
+        now = _now()
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO report_blocks (run_id, project_id, digest, block_json, rendered_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (run_id, project_id, digest, json.dumps(block, ensure_ascii=False), now)
+                    for project_id, (digest, block) in blocks.items()
+                ],
+            )
+            if keep is not None:
+                stale = [
+                    (run_id, row["project_id"])
+                    for row in conn.execute("SELECT project_id FROM report_blocks WHERE run_id = ?", (run_id,))
+                    if row["project_id"] not in keep
+                ]
+                conn.executemany("DELETE FROM report_blocks WHERE run_id = ? AND project_id = ?", stale)
+
+    def save_checkpoint(self, project_hash: str, step: str, model: str, payload) -> None:
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (project_hash, step, model, payload_json, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (project_hash, step, model, json.dumps(payload), _now()),
+            )
+
+    def clear_checkpoints(self, project_hash: str) -> None:
+        with self.connection() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE project_hash = ?", (project_hash,))
+
+    def save_human_overrides(
+        self, run_id: int, workbook_hash: str, path: str, overrides: List[dict], conflicts: int
+    ) -> None:
+        """Records a workbook's overrides and the workbook itself in one transaction."""
+        now = _now()
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO human_overrides "
+                "(run_id, project_id, category, human_score, ai_score, conflict, workbook_hash, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        item["project_id"],
+                        item["category"],
+                        item["human_score"],
+                        item["ai_score"],
+                        item["conflict"] or None,
+                        workbook_hash,
+                        now,
+                    )
+                    for item in overrides
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO ingested_workbooks "
+                "(workbook_hash, path, run_id, overrides, conflicts, ingested_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (workbook_hash, path, run_id, len(overrides), conflicts, now),
+            )
+            self._refresh_final_scores(conn, run_id)
+
+    def _refresh_final_scores(self, conn: sqlite3.Connection, run_id: int) -> None:
+        """
+        Stores the final total and label of each graded project that has human overrides, scored as
+        the report scores it; duplicates follow their canonical project. Others keep NULL, so
+        COALESCE(final_label, ai_label) is always the label the report shows.
+        """
+        totals = conn.execute(
+            "SELECT s.project_id, SUM(COALESCE(h.human_score, s.ai_score)) AS total "
+            "FROM category_scores s JOIN projects p ON p.run_id = s.run_id AND p.project_id = s.project_id "
+            "LEFT JOIN human_overrides h "
+            "ON h.run_id = s.run_id AND h.project_id = s.project_id AND h.category = s.category "
+            "WHERE s.run_id = ? AND p.status = 'graded' GROUP BY s.project_id HAVING COUNT(h.category) > 0",
+            (run_id,),
+        ).fetchall()
+        conn.execute("UPDATE projects SET final_total_score = NULL, final_label = NULL WHERE run_id = ?", (run_id,))
+        conn.executemany(
+            "UPDATE projects SET final_total_score = ?, final_label = ? WHERE run_id = ? AND project_id = ?",
+            [
+                (_whole(row["total"]), score_to_label(row["total"]), run_id, row["project_id"])
+                for row in totals
+            ],
+        )
+        conn.execute(
+            "UPDATE projects SET (final_total_score, final_label) = "
+            "(SELECT c.final_total_score, c.final_label FROM projects c "
+            "WHERE c.run_id = projects.run_id AND c.project_id = projects.duplicate_of) "
+            "WHERE run_id = ? AND status = 'duplicate'",
+            (run_id,),
+        )
+
+    def copy_project_results(self, from_run: int, from_project: str, to_run: int, to_project: str) -> None:
+        """Copies one project's stage outputs into another run, e.g. for an unchanged resubmission."""
+        with self.connection() as conn:
+            for table in ("extractions", "screenings", "screening_checks", "debate_arguments", "category_scores"):
+                columns = [
+                    row["name"]
+                    for row in conn.execute(f"PRAGMA table_info({table})")
+                    if row["name"] not in ("run_id", "project_id")
+                ]
+                column_list = ", ".join(columns)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {table} (run_id, project_id, {column_list}) "
+                    f"SELECT ?, ?, {column_list} FROM {table} WHERE run_id = ? AND project_id = ?",
+                    (to_run, to_project, from_run, from_project),
+                )
+
+    def import_run(self, source_db: str, from_run: int, to_run: int) -> None:
+        """Copies every per-project row of a run in another store file into to_run of this one."""
+        conn = self.connection()
+        conn.execute("ATTACH DATABASE ? AS source", (source_db,))
+        try:
+            with conn:
+                for table in RUN_TABLES:
+                    columns = ", ".join(
+                        row["name"]
+                        for row in conn.execute(f"PRAGMA main.table_info({table})")
+                        if row["name"] != "run_id"
+                    )
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO main.{table} (run_id, {columns}) "
+                        f"SELECT ?, {columns} FROM source.{table} WHERE run_id = ?",
+                        (to_run, from_run),
+                    )
+        finally:
+            conn.execute("DETACH DATABASE source")
+
+    # --- Reads ----------------------------------------------------------
+
+    def latest_run_id(self) -> Optional[int]:
+        row = self.connection().execute("SELECT MAX(run_id) AS run_id FROM runs").fetchone()
+        return row["run_id"]
+
+    def get_project(self, run_id: int, project_id: str) -> Optional[dict]:
+        row = self.connection().execute(
+            "SELECT * FROM projects WHERE run_id = ? AND project_id = ?", (run_id, project_id)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def find_by_hash(self, project_hash: str, statuses: tuple = ("graded", "level4_ineligible")) -> Optional[dict]:
+        """Most recent finished result for identical file contents, from any run."""
+        placeholders = ", ".join("?" for _ in statuses)
+        row = self.connection().execute(
+            f"SELECT * FROM projects WHERE project_hash = ? AND status IN ({placeholders}) "
+            "ORDER BY run_id DESC LIMIT 1",
+            (project_hash,) + tuple(statuses),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def load_checkpoints(self, project_hash: str) -> Dict[str, dict]:
+        """Completed steps of an unfinished project, keyed by step name."""
+        rows = self.connection().execute(
+            "SELECT step, model, payload_json FROM checkpoints WHERE project_hash = ?", (project_hash,)
+        ).fetchall()
+        return {row["step"]: {"model": row["model"], "payload": json.loads(row["payload_json"])} for row in rows}
+
+    def get_dead_letters(self, run_id: int, pending_only: bool = True) -> List[dict]:
+        where = " AND resolved_at IS NULL" if pending_only else ""
+        rows = self.connection().execute(
+            f"SELECT * FROM dead_letters WHERE run_id = ?{where} ORDER BY position", (run_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def load_report_blocks(self, run_id: int) -> Dict[str, tuple]:
+        rows = self.connection().execute(
+            "SELECT project_id, digest, block_json FROM report_blocks WHERE run_id = ?", (run_id,)
+        ).fetchall()
+        return {row["project_id"]: (row["digest"], json.loads(row["block_json"])) for row in rows}
+
+    def get_ingested_workbook(self, workbook_hash: str) -> Optional[dict]:
+        row = self.connection().execute(
+            "SELECT * FROM ingested_workbooks WHERE workbook_hash = ?", (workbook_hash,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get_category_scores(self, run_id: int) -> Dict[tuple, dict]:
+        rows = self.connection().execute(
+            "SELECT project_id, category, max_score, ai_score FROM category_scores WHERE run_id = ?", (run_id,)
+        ).fetchall()
+        return {(row["project_id"], row["category"]): dict(row) for row in rows}
+
+    def get_human_overrides(self, run_id: int) -> Dict[tuple, dict]:
+        rows = self.connection().execute("SELECT * FROM human_overrides WHERE run_id = ?", (run_id,)).fetchall()
+        return {(row["project_id"], row["category"]): dict(row) for row in rows}
+
+    def find_projects(
+        self, label: Optional[str] = None, department: Optional[str] = None, run_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Projects by final label (human overrides applied) and department, across runs unless run_id
+        is given. The department matches from its start, ignoring case and a leading "Department of",
+        so both filters are index lookups.
+        """
+        clauses, params = [], []
+        if label:
+            clauses.append("COALESCE(final_label, ai_label) = ?")
+            params.append(label)
+        if department:
+            prefix = re.sub(r"([\\%_])", r"\\\1", department) + "%"
+            clauses.append("(department LIKE ? ESCAPE '\\' OR department LIKE ? ESCAPE '\\')")
+            params.extend([prefix, f"Department of {prefix}"])
+        if run_id is not None:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.connection().execute(
+            f"SELECT * FROM projects {where} ORDER BY run_id, position", params
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def token_totals(self, run_id: int) -> Dict[str, dict]:
+        """Per-project call count, token and latency totals for one run."""
+        rows = self.connection().execute(
+            "SELECT project_id, COUNT(*) AS calls, SUM(estimated_tokens) AS estimated_tokens, "
+            "SUM(prompt_tokens) AS prompt_tokens, SUM(output_tokens) AS output_tokens, SUM(latency_ms) AS latency_ms "
+            "FROM token_usage WHERE run_id = ? GROUP BY project_id",
+            (run_id,),
+        ).fetchall()
+        return {row["project_id"]: dict(row) for row in rows}
+
+    def export_report_rows(self, run_id: int) -> Dict[str, List]:
+        """Rebuilds the row lists `write_excel` expects for one run, in processing order."""
+        conn = self.connection()
+        projects = [
+            dict(row)
+            for row in conn.execute("SELECT * FROM projects WHERE run_id = ? ORDER BY position", (run_id,))
+        ]
+        order = {p["project_id"]: p["position"] for p in projects}
+        pdf_files = {p["project_id"]: p["pdf_file"] for p in projects}
+
+        def by_position(rows, key=lambda r: 0):
+            return sorted(rows, key=lambda r: (order.get(r["project_id"], 0), key(r)))
+
+        extraction_rows = []
+        for row in by_position(conn.execute("SELECT * FROM extractions WHERE run_id = ?", (run_id,)).fetchall()):
+            data = json.loads(row["data_json"]) if row["data_json"] else {}
+            extraction_rows.append(
+                [
+                    row["project_id"],
+                    pdf_files.get(row["project_id"]),
+                    data.get("project_title", ""),
+                    data.get("department", ""),
+                    data.get("category", ""),
+                    data.get("problem_statement", ""),
+                    data.get("smart_goals", ""),
+                    "; ".join(data.get("methodology", []) or []),
+                    data.get("key_results", ""),
+                    data.get("follow_up_plan", ""),
+                    row["error"] or "",
+                ]
+            )
+
+        checks = by_position(
+            conn.execute("SELECT * FROM screening_checks WHERE run_id = ?", (run_id,)).fetchall(),
+            key=lambda r: r["position"],
+        )
+        prescreen_detail_rows = [
+            [
+                row["project_id"],
+                row["criterion"],
+                bool(row["violation_found"]),
+                row["evidence_found"],
+                row["evidence_check"] or "",
+            ]
+            for row in checks
+        ]
+
+        violations: Dict[str, List[str]] = {}
+        for c in checks:
+            if c["violation_found"]:
+                violations.setdefault(c["project_id"], []).append(f"{c['criterion']}: {c['evidence_found']}")
+
+        prescreen_summary_rows = []
+        for row in by_position(conn.execute("SELECT * FROM screenings WHERE run_id = ?", (run_id,)).fetchall()):
+            if row["error"]:
+                prescreen_summary_rows.append([row["project_id"], pdf_files.get(row["project_id"]), "", "", "", row["error"]])
+                continue
+            prescreen_summary_rows.append(
+                [
+                    row["project_id"],
+                    pdf_files.get(row["project_id"]),
+                    "Eligible" if row["is_eligible"] else "Ineligible",
+                    row["primary_violation"],
+                    " | ".join(violations.get(row["project_id"], [])),
+                    "",
+                ]
+            )
+
+        overrides = self.get_human_overrides(run_id)
+        scores = by_position(
+            conn.execute("SELECT * FROM category_scores WHERE run_id = ?", (run_id,)).fetchall(),
+            key=lambda r: r["position"],
+        )
+        quote_labels = [(row["project_id"], row["quote_check"]) for row in scores] + [
+            (row["project_id"], row["evidence_check"]) for row in checks if row["violation_found"]
+        ]
+        flagged_quotes: Dict[str, int] = {}
+        for project_id, label in quote_labels:
+            if (label or "").startswith(FLAGGED_STATUSES):
+                flagged_quotes[project_id] = flagged_quotes.get(project_id, 0) + 1
+        grading_detail_rows = [
+            [
+                row["project_id"],
+                pdf_files.get(row["project_id"]),
+                row["category"],
+                row["max_score"],
+                row["ai_score"],
+                _whole(overrides.get((row["project_id"], row["category"]), {}).get("human_score", "")),
+                "",
+                row["ai_justification"],
+                row["extracted_quote"],
+                row["quote_check"] or "",
+            ]
+            for row in scores
+        ]
+
+        tokens = self.token_totals(run_id)
+        summary_entries = [
+            {**{field: project[field] if project[field] is not None else "" for field in PROJECT_FIELDS},
+             "project_id": project["project_id"],
+             "input_tokens": tokens.get(project["project_id"], {}).get("prompt_tokens", ""),
+             "output_tokens": tokens.get(project["project_id"], {}).get("output_tokens", ""),
+             "flagged_quotes": flagged_quotes.get(project["project_id"], 0)}
+            for project in projects
+        ]
+
+        duplicate_rows = [
+            [
+                row["cluster_id"],
+                row["project_id"],
+                row["pdf_file"],
+                row["match_type"],
+                row["similarity"],
+                row["canonical_project_id"],
+            ]
+            for row in conn.execute(
+                "SELECT * FROM duplicate_matches WHERE run_id = ? ORDER BY cluster_id, match_type != 'canonical'",
+                (run_id,),
+            )
+        ]
+
+        return {
+            "extraction_rows": extraction_rows,
+            "prescreen_summary_rows": prescreen_summary_rows,
+            "prescreen_detail_rows": prescreen_detail_rows,
+            "grading_detail_rows": grading_detail_rows,
+            "summary_entries": summary_entries,
+            "duplicate_rows": duplicate_rows,
+        }
+
+
+if __name__ == "__main__":
+    # Example: python qix_store.py Merit "Diagnostic Imaging"
+    label = sys.argv[1] if len(sys.argv) > 1 else None
+    department = sys.argv[2] if len(sys.argv) > 2 else None
+    db_path = os.environ.get("QIX_DB", DEFAULT_DB_PATH)
+
+    store = ResultsStore(db_path)
+    for project in store.find_projects(label=label, department=department):
+        print(
+            f"run {project['run_id']}: {project['project_title']} | {project['department']} | "
+            f"{project['final_total_score'] or project['ai_total_score']} "
+            f"({project['final_label'] or project['ai_label']})"
+        )